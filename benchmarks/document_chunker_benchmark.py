@@ -0,0 +1,36 @@
+import argparse
+import json
+import time
+from workers.storage.local_file_lister_worker import LocalFileListerWorker
+from workflows.nodes.document_chunker_node import DocumentChunkerNode
+
+# Measures the files/sec of the DocumentChunkerNode in serial mode and with a process pool
+# Example usage: python -m benchmarks.document_chunker_benchmark "C:\Alex\Docs\Ebooks\test" --workers 1 4
+def run_benchmark(file_paths: list, num_workers: int, max_chunk_size: int) -> dict:
+    node = DocumentChunkerNode("document_chunker_benchmark", max_chunk_size, num_workers=num_workers)
+    node.start()
+    start = time.perf_counter()
+    chunks = json.loads(node.run(json.dumps({"files": file_paths})))
+    elapsed = time.perf_counter() - start
+    node.stop()
+    return {
+        "num_workers": num_workers,
+        "files": len(file_paths),
+        "chunks": len(chunks),
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(len(file_paths) / elapsed, 3) if elapsed > 0 else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document chunking throughput")
+    parser.add_argument("folder", type=str, help="Path to the folder containing documents to chunk")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Number of worker processes to compare")
+    parser.add_argument("--max-chunk-size", type=int, default=400)
+    args = parser.parse_args()
+
+    file_paths = LocalFileListerWorker("benchmark_file_lister").list_files(args.folder)
+    results = [run_benchmark(file_paths, num_workers, args.max_chunk_size) for num_workers in args.workers]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import glob
+import json
+import random
+import time
+from workers.web.html_text_extractor import HtmlTextExtractor
+from workflows.nodes.web_page_fetcher_node import WebPageFetcherNode
+
+# Compares the pages/sec and the output size of the BeautifulSoup extraction (extract_text_v2) and the streaming HtmlTextExtractor
+# The pages are read from --files (saved html pages) or generated: a travel page with a large menu, cookie banner,
+# link lists and footer around a few paragraphs of content, which is what the search results usually look like
+# Example usage: python -m benchmarks.html_extraction_benchmark --pages 20 --size-mb 2
+def build_page(size_mb: float, seed: int) -> str:
+    rng = random.Random(seed)
+    words = ["venice", "canal", "gondola", "basilica", "museum", "tour", "ticket", "bridge", "palace", "island", "glass", "lagoon"]
+    def sentence(length: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(length)).capitalize() + "."
+
+    menu = "".join(f"<li class='menu-item'><a href='/p{i}'>{sentence(3)}</a></li>" for i in range(200))
+    content = "".join(f"<h2>{sentence(4)}</h2><p>{' '.join(sentence(15) for _ in range(6))}</p>" for _ in range(10))
+    related = "".join(f"<div class='card'><a href='/r{i}'>{sentence(6)}</a><span>{rng.randint(1, 5)} stars</span></div>" for i in range(100))
+    script = "<script>window.__STATE__ = " + json.dumps({"items": [sentence(10) for _ in range(200)]}) + "</script>"
+    page = [
+        "<html><head><title>Venice</title><style>.menu-item { display: inline; }</style></head><body>",
+        f"<header><nav><ul>{menu}</ul></nav></header>",
+        "<div id='cookie-consent'>We use cookies to personalise content and ads.</div>",
+        f"<main><article><h1>Things to do in Venice</h1>{content}</article></main>",
+        f"<section class='related'>{related}</section>",
+    ]
+    size = sum(len(part) for part in page)
+    # multi-megabyte pages are mostly inline state and repeated widgets
+    while size < size_mb * 1024 * 1024:
+        page.append(script)
+        size += len(script)
+    page.append("<footer><a href='/privacy'>Privacy</a> Copyright</footer></body></html>")
+    return "".join(page)
+
+def run_benchmark(name: str, extract, pages: list) -> dict:
+    start = time.perf_counter()
+    texts = [extract(page) for page in pages]
+    elapsed = time.perf_counter() - start
+    input_chars = sum(len(page) for page in pages)
+    output_chars = sum(len(text) for text in texts)
+    return {
+        "extractor": name,
+        "pages": len(pages),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(pages) / elapsed, 2) if elapsed > 0 else None,
+        "input_mb": round(input_chars / 1024 / 1024, 2),
+        "output_chars_per_page": output_chars // len(pages),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark html text extraction")
+    parser.add_argument("--files", type=str, default=None, help="Glob of saved html pages, ex. 'pages/*.html'")
+    parser.add_argument("--pages", type=int, default=20, help="Number of generated pages")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Size of the generated pages")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for file_path in glob.glob(args.files):
+            with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+                pages.append(file.read())
+    else:
+        pages = [build_page(args.size_mb, seed) for seed in range(args.pages)]
+
+    node = WebPageFetcherNode("html_extraction_benchmark", http_cache=False, main_content=False)
+    results = [
+        run_benchmark("beautifulsoup_extract_text_v2", node.extract_text_v2, pages),
+        run_benchmark("streaming_html_parser", HtmlTextExtractor(use_lxml=False).extract, pages),
+        run_benchmark("streaming_html_parser_full_text", HtmlTextExtractor(use_lxml=False, remove_boilerplate=False, main_content=False).extract, pages),
+    ]
+    if HtmlTextExtractor().use_lxml:
+        results.append(run_benchmark("streaming_lxml", HtmlTextExtractor().extract, pages))
+    baseline = results[0]["output_chars_per_page"]
+    for result in results:
+        result["output_size_vs_baseline"] = round(result["output_chars_per_page"] / baseline, 3) if baseline else None
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
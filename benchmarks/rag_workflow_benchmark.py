@@ -0,0 +1,121 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.vector_db_writer_benchmark import peak_rss_mb
+from workers.llm.ollama_stub_server import OllamaStubServer
+from workflows.examples.rag_indexer_workflow import RagIndexerWorkflowBuilder
+from workflows.examples.reg_retriever_workflow import RagRetrieverWorkflowBuilder
+
+# Measures the RAG workflows end to end on a synthetic corpus, without Ollama or Gemini: the embedding model and the
+# answering model are an OllamaStubServer (deterministic embeddings, canned answers) reached through the OllamaWorker url mode
+# - indexing: RagIndexerWorkflowBuilder on --docs text files, docs/sec and chunks/sec
+# - retrieval: RagRetrieverWorkflowBuilder, one workflow run per query, p50/p99 latency and queries/sec
+# - peak RSS of the process and size of the database folder
+# The stub latencies simulate the models, 0 measures only the workflows, the chunker and the vector database
+# Example usage: python -m benchmarks.rag_workflow_benchmark --docs 500 --queries 100 --embedding-latency-ms 5 --generate-latency-ms 200
+TOPICS = ["bread", "pasta", "cheese", "wine", "coffee", "chocolate", "olive oil", "tomato", "rice", "honey"]
+WORDS = ["recipe", "flour", "salt", "yeast", "water", "oven", "season", "harvest", "market", "region", "history",
+         "taste", "sweet", "bitter", "traditional", "ferment", "dough", "slow", "fresh", "aged", "roast", "farm"]
+
+# Each document is about one topic, the queries ask about a topic so that the retrieved chunks depend on the query
+def write_synthetic_corpus(folder: str, docs: int, paragraphs: int = 8, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for doc_index in range(docs):
+        topic = TOPICS[doc_index % len(TOPICS)]
+        text = "\n\n".join(
+            f"{topic.title()} {paragraph}. " + " ".join(rng.choice(WORDS + [topic]) for _ in range(80)) + "."
+            for paragraph in range(paragraphs))
+        with open(os.path.join(folder, f"doc{doc_index}.txt"), "w", encoding="utf-8") as file:
+            file.write(text)
+
+def generate_queries(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [f"What is the {rng.choice(WORDS)} of {rng.choice(TOPICS)}?" for _ in range(count)]
+
+def folder_size_mb(folder: str) -> float:
+    size = 0
+    for root, _, files in os.walk(folder):
+        size += sum(os.path.getsize(os.path.join(root, filename)) for filename in files)
+    return size / (1024 * 1024)
+
+def run_indexing(corpus_folder: str, db_location: str, docs: int, embedding_model_properties: dict) -> dict:
+    workflow = RagIndexerWorkflowBuilder().build(db_location, embedding_model_properties=embedding_model_properties)
+    start = time.perf_counter()
+    workflow.run(json.dumps({"file_location": corpus_folder, "file_type": "local"}))
+    elapsed = time.perf_counter() - start
+    chunks = workflow.nodes["vector_db_writer"].number_of_segments
+    return {
+        "docs": docs,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(docs / elapsed, 2) if elapsed > 0 else None,
+        "chunks_per_sec": round(chunks / elapsed, 2) if elapsed > 0 else None,
+    }
+
+def run_retrieval(db_location: str, queries: list, embedding_model_properties: dict, gen_model_properties: dict) -> dict:
+    builder = RagRetrieverWorkflowBuilder()
+    latencies = []
+    for query in queries:
+        workflow = builder.build(db_location, embedding_model_properties=embedding_model_properties, gen_model_properties=gen_model_properties)
+        start = time.perf_counter()
+        workflow.run(json.dumps([{"text": query}]))
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    return {
+        "queries": len(queries),
+        "seconds": round(total, 3),
+        "queries_per_sec": round(len(queries) / total, 2) if total > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RAG indexer and retriever workflows with a local model stub")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs of 80 words per document")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=256, help="Size of the stub embeddings")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--generate-latency-ms", type=float, default=0.0)
+    parser.add_argument("--db-location", type=str, default=None, help="Defaults to a temporary folder")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="rag_workflow_benchmark_")
+    corpus_folder = os.path.join(folder, "corpus")
+    db_location = args.db_location or os.path.join(folder, "chromadb.db")
+    write_synthetic_corpus(corpus_folder, args.docs, args.paragraphs, args.seed)
+    queries = generate_queries(args.queries, args.seed)
+
+    with OllamaStubServer(dim=args.dim, embedding_latency_ms=args.embedding_latency_ms,
+                          generate_latency_ms=args.generate_latency_ms) as server:
+        embedding_model_properties = {"model_provider": "ollama", "model_name": "stub-embed", "use_lib": False, "base_url": server.base_url}
+        gen_model_properties = {"model_provider": "ollama", "model_name": "stub-llm", "use_lib": False, "base_url": server.base_url}
+        # the nodes print every chunk and prompt, stdout only has the json results
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            print(f"Indexing {args.docs} documents", file=sys.stderr)
+            indexing = run_indexing(corpus_folder, db_location, args.docs, embedding_model_properties)
+            indexing["peak_rss_mb"] = round(peak_rss_mb(), 1)
+            print(f"Running {args.queries} queries", file=sys.stderr)
+            retrieval = run_retrieval(db_location, queries, embedding_model_properties, gen_model_properties)
+            retrieval["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        model_requests = dict(server.requests)
+
+    print(json.dumps({
+        "indexing": indexing,
+        "retrieval": retrieval,
+        "db_size_mb": round(folder_size_mb(db_location), 2),
+        "model_requests": model_requests,
+        "embedding_latency_ms": args.embedding_latency_ms,
+        "generate_latency_ms": args.generate_latency_ms,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
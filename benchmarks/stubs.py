@@ -0,0 +1,86 @@
+import time
+from pydantic import BaseModel
+from workers.llm.ai_worker import AIWorker
+from workflows.nodes.abstract_node import AbstractNode
+
+# Stub nodes and workers for the benchmarks: they do a known amount of work (sleep or CPU) without models, APIs or files
+# so that the rest of the measured time is the overhead of the workflow engine, the tracer and the cache
+
+# Node that sleeps work_ms (I/O bound, like a web fetch) and/or loops cpu_iterations times, then returns its input
+# output_size > 0 returns a payload of that many characters instead, to measure the cost of tracing large outputs
+class StubNode(AbstractNode):
+    def __init__(self, node_id: str, work_ms: float = 0.0, cpu_iterations: int = 0, output_size: int = 0, cache_enabled: bool = False):
+        super().__init__(node_id, cache_enabled)
+        self.work_ms = work_ms
+        self.cpu_iterations = cpu_iterations
+        self.output_size = output_size
+
+    #@override
+    def start_impl(self):
+        pass
+
+    #@override
+    def run_impl(self, input_text: str) -> str:
+        if self.work_ms:
+            time.sleep(self.work_ms / 1000.0)
+        total = 0
+        for i in range(self.cpu_iterations):
+            total += i * i
+        self.result = ("x" * self.output_size) if self.output_size else input_text
+        return self.result
+
+    #@override
+    def stop_impl(self) -> str:
+        return self.result
+
+# AIWorker with a fixed latency, a deterministic response and a token usage like a real provider
+class FakeAIWorker(AIWorker):
+    def __init__(self, worker_name: str = "fake_llm", latency_ms: float = 0.0, response_size: int = 200, model_name: str = "fake-model"):
+        super().__init__(worker_name)
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.response_size = response_size
+        self.prompt = None
+        self.system_prompt = None
+
+    #@override
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+        self.prompt = prompt
+        self.system_prompt = system_prompt
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        response = ("response " * (self.response_size // 9 + 1))[:self.response_size]
+        self.set_usage(len(prompt) // 4 + 1, len(response) // 4 + 1)
+        return response
+
+    #@override
+    def get_worker_prompts(self) -> dict:
+        return {"prompt": self.prompt, "system_prompt": self.system_prompt}
+
+# Node that calls a FakeAIWorker and logs it to the tracer like the TextGenNode
+class FakeLLMNode(AbstractNode):
+    def __init__(self, node_id: str, worker: FakeAIWorker, cache_enabled: bool = False):
+        super().__init__(node_id, cache_enabled)
+        self.worker = worker
+
+    #@override
+    def start_impl(self):
+        pass
+
+    #@override
+    def run_impl(self, input_text: str) -> str:
+        start_ns = time.perf_counter_ns()
+        response = self.worker.generate_response(input_text)
+        worker_prompts = self.worker.get_worker_prompts()
+        self.tracer.log_worker(self.node_id, self.worker.name, input_text, response, worker_prompts.get("prompt"),
+                               worker_prompts.get("system_prompt"), start_ns, self.worker.get_usage())
+        self.result = response
+        return response
+
+    #@override
+    def stop_impl(self) -> str:
+        return self.result
+
+    #@override
+    def get_cache_key(self) -> str:
+        return self.node_id + "_" + self.worker.model_name
@@ -0,0 +1,66 @@
+import argparse
+import json
+import resource
+import tempfile
+import time
+import numpy as np
+from workflows.nodes.vector_db_writer_node import VectorDbWriterNode
+
+# Measures the write throughput and the memory footprint of the VectorDbWriterNode on a synthetic corpus
+# The corpus is sent to the node in several calls, like a workflow with multiple input nodes would do
+# Example usage: python -m benchmarks.vector_db_writer_benchmark --chunks 1000000 --dim 384 --chunks-per-call 10000
+def generate_chunks(rng: np.random.Generator, start: int, count: int, dim: int, chunks_per_doc: int) -> str:
+    embeddings = rng.random((count, dim), dtype=np.float32)
+    chunks = []
+    for i in range(count):
+        chunk_index = start + i
+        chunks.append({
+            "text": f"synthetic chunk {chunk_index}",
+            "embeddings": embeddings[i].tolist(),
+            "text_location_in_doc": (chunk_index % chunks_per_doc) * 1000,
+            "doc_location": f"doc{chunk_index // chunks_per_doc}.txt",
+        })
+    return json.dumps(chunks)
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched writes to the vector database")
+    parser.add_argument("--chunks", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--chunks-per-call", type=int, default=10000)
+    parser.add_argument("--chunks-per-doc", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--db-location", type=str, default=None, help="Defaults to a temporary folder")
+    args = parser.parse_args()
+
+    db_location = args.db_location or tempfile.mkdtemp(prefix="vector_db_writer_benchmark_")
+    node = VectorDbWriterNode("vector_db_writer_benchmark", db_location, "chroma", batch_size=args.batch_size)
+    node.start()
+
+    rng = np.random.default_rng(42)
+    write_seconds = 0.0
+    for start in range(0, args.chunks, args.chunks_per_call):
+        count = min(args.chunks_per_call, args.chunks - start)
+        input_text = generate_chunks(rng, start, count, args.dim, args.chunks_per_doc)
+        call_start = time.perf_counter()
+        node.run(input_text)
+        write_seconds += time.perf_counter() - call_start
+        print(f"Written {start + count} chunks, {((start + count) / write_seconds):.0f} chunks/sec, peak RSS {peak_rss_mb():.0f} MB")
+    node.stop()
+
+    print(json.dumps({
+        "chunks": args.chunks,
+        "dim": args.dim,
+        "batch_size": args.batch_size,
+        "write_seconds": round(write_seconds, 3),
+        "chunks_per_sec": round(args.chunks / write_seconds, 1) if write_seconds > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "collection_count": node.worker.collection.count(),
+        "db_location": db_location,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
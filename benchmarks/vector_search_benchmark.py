@@ -0,0 +1,86 @@
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+from workers.storage.numpy_vector_worker import NumpyVectorWorker
+from workers.storage.local_vector_index_worker import LocalVectorIndexWorker
+
+# Compares the recall and latency of the vector database workers on a synthetic corpus
+# The ground truth is the exact cosine search in float32. The vectors are normalised so l2 (Chroma default) gives the same ranking.
+# Example usage: python -m benchmarks.vector_search_benchmark --vectors 100000 --dim 384 --queries 100
+def build_corpus(num_vectors: int, dim: int, num_queries: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # clustered data is closer to real embeddings than uniform noise
+    centers = rng.normal(size=(max(1, num_vectors // 100), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), num_vectors)] + 0.5 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(num_vectors, num_queries, replace=False)] + 0.1 * rng.normal(size=(num_queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = queries @ vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+def benchmark_worker(name: str, worker, vectors: np.ndarray, queries: np.ndarray, ground_truth: list, k: int, batch_size: int = 5000) -> dict:
+    ids = [str(i) for i in range(len(vectors))]
+    documents = [f"doc{i}" for i in range(len(vectors))]
+    start = time.perf_counter()
+    for batch_start in range(0, len(vectors), batch_size):
+        batch_end = batch_start + batch_size
+        worker.add_vectors(documents[batch_start:batch_end], vectors[batch_start:batch_end].tolist(), ids=ids[batch_start:batch_end])
+    build_seconds = time.perf_counter() - start
+
+    # one batched call with all the queries
+    start = time.perf_counter()
+    batched_response = worker.query(queries.tolist(), results=k, include=[])
+    batched_seconds = time.perf_counter() - start
+
+    # one call per query
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        worker.query([query.tolist()], results=k, include=[])
+        latencies.append(time.perf_counter() - start)
+
+    recalls = [len(set(int(i) for i in found) & expected) / k for found, expected in zip(batched_response["ids"], ground_truth)]
+    return {
+        "worker": name,
+        "build_seconds": round(build_seconds, 3),
+        "batched_query_ms": round(batched_seconds * 1000, 3),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector search recall and latency")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    vectors, queries = build_corpus(args.vectors, args.dim, args.queries)
+    ground_truth = exact_neighbours(vectors, queries, args.k)
+
+    workers = {
+        "numpy_float32": NumpyVectorWorker(dtype="float32"),
+        "numpy_float16": NumpyVectorWorker(dtype="float16"),
+        "numpy_int8": NumpyVectorWorker(dtype="int8"),
+        "local_index_ivf": LocalVectorIndexWorker(tempfile.mkdtemp(prefix="vector_search_benchmark_"), "benchmark_collection"),
+    }
+    if not args.skip_chroma:
+        from workers.storage.chromadb_worker import ChromaDbWorker
+        workers["chroma"] = ChromaDbWorker(tempfile.mkdtemp(prefix="vector_search_benchmark_"), "benchmark_collection")
+
+    results = []
+    for name, worker in workers.items():
+        print(f"Benchmarking {name}")
+        results.append(benchmark_worker(name, worker, vectors, queries, ground_truth, args.k))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
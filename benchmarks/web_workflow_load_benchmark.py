@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from workers.web.local_corpus_search_worker import LocalCorpusSearchWorker
+from workers.web.local_page_server import LocalPageServer
+from workflows.nodes.web_page_fetcher_node import WebPageFetcherNode
+from workflows.nodes.web_search_node import WebSearchNode
+from workflows.workflow import Workflow
+from workflows.workflow_tracer import TRACE_TIMINGS
+
+# Load-tests the search and fetch part of the tourist workflow on a synthetic recorded corpus served locally,
+# deterministic and without internet or API keys: WebSearchNode (LocalCorpusSearchWorker) --> WebPageFetcherNode (batch mode)
+# Each city is one workflow run, --parallel runs are executed at the same time
+# Example usage: python -m benchmarks.web_workflow_load_benchmark --cities 50 --results 6 --latency-ms 80 --jitter-ms 40 --concurrency 1 8
+ATTRACTIONS = ["cathedral", "museum", "old town", "harbour", "castle", "market", "botanical garden", "bridge", "palace", "opera house"]
+WORDS = ["visit", "tickets", "guided", "tour", "history", "view", "famous", "square", "walk", "local", "food", "night", "art"]
+
+def write_synthetic_corpus(folder: str, cities: int, pages_per_city: int, paragraphs: int = 20, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    corpus = {"pages": [], "queries": {}}
+    queries = []
+    for city_index in range(cities):
+        city = f"city{city_index}"
+        query = f"things to do in {city}"
+        queries.append(query)
+        paths = []
+        for page_index in range(pages_per_city):
+            path = f"{city}/page{page_index}.html"
+            content = "".join(
+                f"<h2>{rng.choice(ATTRACTIONS).title()} of {city}</h2><p>{' '.join(rng.choice(WORDS) for _ in range(60))}.</p>"
+                for _ in range(paragraphs))
+            menu = "".join(f"<li><a href='/{city}/page{i}.html'>Page {i}</a></li>" for i in range(pages_per_city))
+            html = f"<html><head><title>{city} guide {page_index}</title></head><body><nav><ul>{menu}</ul></nav><main>{content}</main><footer>Copyright</footer></body></html>"
+            os.makedirs(os.path.join(folder, city), exist_ok=True)
+            with open(os.path.join(folder, path), "w", encoding="utf-8") as file:
+                file.write(html)
+            corpus["pages"].append({"path": path, "title": f"Top things to do in {city} ({page_index})", "description": f"Guide of {city}"})
+            paths.append(path)
+        corpus["queries"][query] = paths
+    with open(os.path.join(folder, "corpus.json"), "w", encoding="utf-8") as file:
+        json.dump(corpus, file)
+    return queries
+
+def build_workflow(search_worker: LocalCorpusSearchWorker, number_of_results: int, concurrency: int) -> Workflow:
+    workflow = Workflow(trace_level=TRACE_TIMINGS)
+    workflow.add_node("search", WebSearchNode("web search node", None, number_of_results, False, fan_out=False, worker=search_worker))
+    workflow.add_node("fetcher", WebPageFetcherNode("web page fetcher", False, batch_mode=True, max_concurrency=concurrency,
+                                                    max_per_host=concurrency, http_cache=False))
+    workflow.connect("search", "fetcher")
+    return workflow
+
+def run_benchmark(search_worker: LocalCorpusSearchWorker, queries: list, number_of_results: int, concurrency: int, parallel: int) -> dict:
+    def run_query(query: str):
+        workflow = build_workflow(search_worker, number_of_results, concurrency)
+        start = time.perf_counter()
+        texts = workflow.run(query)
+        return time.perf_counter() - start, sum(len(text) for text in texts), sum(1 for text in texts if text)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        runs = list(executor.map(run_query, queries))
+    elapsed = time.perf_counter() - start
+    latencies = [run[0] for run in runs]
+    pages = sum(run[2] for run in runs)
+    return {
+        "fetch_concurrency": concurrency,
+        "parallel_workflows": parallel,
+        "workflows": len(queries),
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed > 0 else None,
+        "workflow_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "workflow_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1),
+        "text_chars_per_page": sum(run[1] for run in runs) // max(1, pages),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the web search and fetch workflow on a local corpus")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--results", type=int, default=6, help="Search results (pages) per workflow")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Page server latency")
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--search-latency-ms", type=float, default=150.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Fetch concurrency to compare")
+    parser.add_argument("--parallel", type=int, default=4, help="Workflows run at the same time")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="web_workflow_load_benchmark_")
+    queries = write_synthetic_corpus(folder, args.cities, args.results, seed=args.seed)
+    results = []
+    with LocalPageServer(folder, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed) as server:
+        search_worker = LocalCorpusSearchWorker("local corpus search", folder, server.base_url, latency_ms=args.search_latency_ms)
+        for concurrency in args.concurrency:
+            print(f"Benchmarking fetch concurrency {concurrency}")
+            results.append(run_benchmark(search_worker, queries, args.results, concurrency, args.parallel))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+from benchmarks.stubs import StubNode, FakeAIWorker, FakeLLMNode
+from state.nodes_cache import NodesCache
+from workflows.workflow import Workflow
+from workflows.workflow_tracer import TRACE_OFF, TRACE_TIMINGS, TRACE_SAMPLED, TRACE_FULL
+
+# Measures the overhead of the workflow engine (Workflow.run, AbstractNode, tracer, nodes cache) with stub nodes and
+# a fake AIWorker, so that the results only change when the engine changes. The results are json and can be compared
+# with the results of another commit, the run fails when a scenario is slower than the baseline by more than --threshold
+# Example usage:
+#   python -m benchmarks.workflow_engine_benchmark --output baseline.json
+#   python -m benchmarks.workflow_engine_benchmark --compare baseline.json --threshold 0.2
+
+# Each scenario returns (workflow builder, number of nodes, expected work in ms of one run)
+def linear_chain(length: int = 20, work_ms: float = 0.0, trace_level: str = TRACE_FULL):
+    def build() -> Workflow:
+        workflow = Workflow(trace_level=trace_level)
+        for i in range(length):
+            workflow.add_node(f"node{i}", StubNode(f"node{i}", work_ms))
+            if i > 0:
+                workflow.connect(f"node{i - 1}", f"node{i}")
+        return workflow
+    return build, length, length * work_ms
+
+# start --> width nodes --> end (the end node runs once per input)
+def fan_out_fan_in(width: int = 50, work_ms: float = 0.0):
+    def build() -> Workflow:
+        workflow = Workflow()
+        workflow.add_node("start", StubNode("start"))
+        for i in range(width):
+            workflow.add_node(f"branch{i}", StubNode(f"branch{i}", work_ms))
+            workflow.connect("start", f"branch{i}")
+        workflow.add_node("end", StubNode("end"))
+        for i in range(width):
+            workflow.connect(f"branch{i}", "end")
+        return workflow
+    return build, width + 2, width * work_ms
+
+# Chain of LLM nodes with the fake worker, with or without the nodes cache (the cache is filled by the warmup run)
+def llm_chain(length: int = 10, latency_ms: float = 2.0, cache_enabled: bool = False):
+    def build() -> Workflow:
+        workflow = Workflow()
+        for i in range(length):
+            worker = FakeAIWorker(f"fake_llm{i}", latency_ms)
+            workflow.add_node(f"llm{i}", FakeLLMNode(f"llm{i}", worker, cache_enabled))
+            if i > 0:
+                workflow.connect(f"llm{i - 1}", f"llm{i}")
+        return workflow
+    return build, length, 0.0 if cache_enabled else length * latency_ms
+
+# Chain of nodes returning large outputs (ex. fetched pages), to compare the cost of the trace levels
+def large_payload_chain(trace_level: str, length: int = 20, output_size: int = 100_000):
+    def build() -> Workflow:
+        workflow = Workflow(trace_level=trace_level)
+        for i in range(length):
+            workflow.add_node(f"node{i}", StubNode(f"node{i}", output_size=output_size))
+            if i > 0:
+                workflow.connect(f"node{i - 1}", f"node{i}")
+        return workflow
+    return build, length, 0.0
+
+SCENARIOS = {
+    "linear_chain_20": lambda: linear_chain(20),
+    "linear_chain_20_sleep_1ms": lambda: linear_chain(20, 1.0),
+    "fan_out_fan_in_50": lambda: fan_out_fan_in(50),
+    "deep_chain_300": lambda: linear_chain(300),
+    "llm_chain_10_uncached": lambda: llm_chain(10, 2.0, cache_enabled=False),
+    "llm_chain_10_cached": lambda: llm_chain(10, 2.0, cache_enabled=True),
+    "tracer_off": lambda: large_payload_chain(TRACE_OFF),
+    "tracer_timings": lambda: large_payload_chain(TRACE_TIMINGS),
+    "tracer_sampled": lambda: large_payload_chain(TRACE_SAMPLED),
+    "tracer_full": lambda: large_payload_chain(TRACE_FULL),
+}
+
+def run_scenario(name: str, repeat: int, warmup: int) -> dict:
+    build, nodes, work_ms = SCENARIOS[name]()
+    durations = []
+    # the nodes print, the output is discarded but still formatted like in a real run
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(warmup + repeat):
+            workflow = build()
+            start = time.perf_counter()
+            workflow.run("benchmark input")
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                durations.append(elapsed * 1000)
+    p50 = float(np.percentile(durations, 50))
+    return {
+        "runs": repeat,
+        "nodes": nodes,
+        "mean_ms": round(float(np.mean(durations)), 3),
+        "p50_ms": round(p50, 3),
+        "p99_ms": round(float(np.percentile(durations, 99)), 3),
+        "min_ms": round(min(durations), 3),
+        # time of the engine per node, without the work of the stubs
+        "overhead_per_node_us": round(max(0.0, p50 - work_ms) * 1000 / nodes, 2),
+    }
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+# Returns the comparison of the p50 of the scenarios in both results and whether one of them regressed
+def compare(baseline: dict, current: dict, threshold: float) -> tuple:
+    rows = []
+    regressed = False
+    for name, result in current["scenarios"].items():
+        baseline_result = baseline["scenarios"].get(name)
+        if not baseline_result or not baseline_result["p50_ms"]:
+            continue
+        ratio = result["p50_ms"] / baseline_result["p50_ms"]
+        is_regression = ratio > 1 + threshold
+        regressed = regressed or is_regression
+        rows.append({"scenario": name, "baseline_p50_ms": baseline_result["p50_ms"], "p50_ms": result["p50_ms"],
+                     "ratio": round(ratio, 3), "regression": is_regression})
+    return rows, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workflow engine overhead with stub nodes and a fake AI worker")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", help="Save the results to this json file")
+    parser.add_argument("--compare", help="Results json file of the baseline commit")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown compared to the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # the cached scenarios must not read or fill the cache of the workflows
+    # stdout only has the json results
+    with contextlib.redirect_stdout(sys.stderr):
+        NodesCache.init_database(os.path.join(tempfile.mkdtemp(prefix="workflow_engine_benchmark_"), "database.db"))
+    results = {
+        "meta": {
+            "commit": get_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        print(f"Benchmarking {name}", file=sys.stderr)
+        results["scenarios"][name] = run_scenario(name, args.repeat, args.warmup)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if not args.compare:
+        print(json.dumps(results, indent=2))
+        return
+
+    with open(args.compare, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    rows, regressed = compare(baseline, results, args.threshold)
+    print(json.dumps({"baseline_commit": baseline["meta"].get("commit"), "commit": results["meta"]["commit"], "comparison": rows}, indent=2))
+    if regressed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
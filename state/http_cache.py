@@ -0,0 +1,171 @@
+import re
+import sqlite3
+import threading
+import time
+import requests
+from workflows.metrics import MetricsRegistry
+
+# Uses sqlite3 to store the web pages with their ETag/Last-Modified validators. The key is the url.
+# A fresh page (Cache-Control max-age) is returned without any request, a stale one is revalidated with
+# If-None-Match/If-Modified-Since and the stored body is reused when the server answers 304 Not Modified.
+# The pages are fetched from several threads (ConcurrentPageFetcher) so the connection is shared with a lock.
+# The store is bounded: the pages not fetched or revalidated for max_entry_age seconds are deleted, and the least recently
+# fetched ones above max_entries
+class HttpCache:
+    file_name = None
+    connection = None
+    lock = threading.Lock()
+    stats = {"fresh": 0, "not_modified": 0, "downloaded": 0}
+    max_entries = 10000
+    max_entry_age = 30 * 24 * 3600.0
+    MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)")
+
+    @classmethod
+    def init_database(cls, database_file_name: str = "database.db", max_entries: int = None, max_entry_age: float = None):
+        with cls.lock:
+            cls.file_name = database_file_name
+            if max_entries is not None:
+                cls.max_entries = max_entries
+            if max_entry_age is not None:
+                cls.max_entry_age = max_entry_age
+            if not cls.connection:
+                print("Initializing http cache")
+                cls.connection = sqlite3.connect(database_file_name, check_same_thread=False)
+                cls.connection.execute("CREATE TABLE IF NOT EXISTS http_cache (key TEXT PRIMARY KEY, body TEXT, etag TEXT, last_modified TEXT, fetched_at REAL, max_age REAL)")
+                cls.connection.execute("CREATE INDEX IF NOT EXISTS http_cache_fetched_at ON http_cache (fetched_at)")
+                cls.connection.commit()
+
+    @classmethod
+    def close(cls):
+        with cls.lock:
+            if cls.connection:
+                cls.connection.close()
+                cls.connection = None
+
+    # Returns the body of the url, from the cache when it is fresh or not modified
+    # fetch_body(url, response) replaces the body of a 200 response, ex. with the html rendered by the browser,
+    # in that case use a different key than the url so the raw and rendered pages are stored separately
+    # Raises requests.RequestException like requests.get
+    @classmethod
+    def get(cls, url: str, headers: dict = None, timeout: float = 10, fetch_body=None, key: str = None) -> str:
+        if not cls.connection:
+            cls.init_database()
+        key = key if key is not None else url
+        entry = cls.get_entry(key)
+        if entry and time.time() - entry["fetched_at"] < entry["max_age"]:
+            cls._count("fresh")
+            return entry["body"]
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        response = requests.get(url, headers=request_headers, timeout=timeout)
+
+        max_age, cacheable = cls.parse_cache_control(response.headers.get("Cache-Control", ""))
+        if response.status_code == 304 and entry:
+            cls._count("not_modified")
+            cls.refresh_entry(key, max_age)
+            return entry["body"]
+        response.raise_for_status()
+
+        cls._count("downloaded")
+        body = fetch_body(url, response) if fetch_body else response.text
+        if cacheable and body:
+            cls.set_entry(key, body, response.headers.get("ETag"), response.headers.get("Last-Modified"), max_age)
+        return body
+
+    # For the pages that are not downloaded with requests (ex. rendered by the browser), stored with store()
+    # Returns the stored body when it is fresh or the server answers 304, None when the page must be fetched again:
+    # not stored, stored without validators or changed (the body of the 200 response is not downloaded)
+    # Raises requests.RequestException like requests.get
+    @classmethod
+    def revalidate(cls, url: str, headers: dict = None, timeout: float = 10, key: str = None) -> str:
+        if not cls.connection:
+            cls.init_database()
+        key = key if key is not None else url
+        entry = cls.get_entry(key)
+        if entry is None:
+            return None
+        if time.time() - entry["fetched_at"] < entry["max_age"]:
+            cls._count("fresh")
+            return entry["body"]
+        if not entry["etag"] and not entry["last_modified"]:
+            return None
+
+        request_headers = dict(headers or {})
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+        with requests.get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304:
+                cls._count("not_modified")
+                cls.refresh_entry(key, cls.parse_cache_control(response.headers.get("Cache-Control", ""))[0])
+                return entry["body"]
+        return None
+
+    # Stores a body fetched without requests with the headers of its response, when they allow to reuse or revalidate it
+    @classmethod
+    def store(cls, key: str, body: str, response_headers: dict) -> bool:
+        if not cls.connection:
+            cls.init_database()
+        response_headers = {name.lower(): value for name, value in (response_headers or {}).items()}
+        max_age, cacheable = cls.parse_cache_control(response_headers.get("cache-control", ""))
+        etag = response_headers.get("etag")
+        last_modified = response_headers.get("last-modified")
+        if not body or not cacheable or not (etag or last_modified or max_age > 0):
+            return False
+        cls._count("downloaded")
+        cls.set_entry(key, body, etag, last_modified, max_age)
+        return True
+
+    # Returns (max_age, cacheable). no-cache keeps the page but always revalidates it
+    @classmethod
+    def parse_cache_control(cls, cache_control: str):
+        cache_control = cache_control.lower()
+        if "no-store" in cache_control:
+            return 0, False
+        if "no-cache" in cache_control:
+            return 0, True
+        match = cls.MAX_AGE_PATTERN.search(cache_control)
+        return (int(match.group(1)) if match else 0), True
+
+    @classmethod
+    def get_entry(cls, key: str) -> dict:
+        with cls.lock:
+            row = cls.connection.execute("SELECT body, etag, last_modified, fetched_at, max_age FROM http_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"body": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3], "max_age": row[4]}
+
+    @classmethod
+    def set_entry(cls, key: str, body: str, etag: str, last_modified: str, max_age: float):
+        with cls.lock:
+            now = time.time()
+            cls.connection.execute("INSERT OR REPLACE INTO http_cache (key, body, etag, last_modified, fetched_at, max_age) VALUES (?, ?, ?, ?, ?, ?)",
+                                   (key, body, etag, last_modified, now, max_age))
+            cls._prune(now)
+            cls.connection.commit()
+
+    # Called with the lock held
+    @classmethod
+    def _prune(cls, now: float):
+        cls.connection.execute("DELETE FROM http_cache WHERE fetched_at < ?", (now - cls.max_entry_age,))
+        cls.connection.execute("DELETE FROM http_cache WHERE key IN (SELECT key FROM http_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                               (cls.max_entries,))
+
+    @classmethod
+    def refresh_entry(cls, key: str, max_age: float):
+        with cls.lock:
+            cls.connection.execute("UPDATE http_cache SET fetched_at = ?, max_age = ? WHERE key = ?", (time.time(), max_age, key))
+            cls.connection.commit()
+
+    @classmethod
+    def _count(cls, stat: str):
+        with cls.lock:
+            cls.stats[stat] += 1
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("http_cache_requests_total", "HTTP cache lookups by result").inc(result=stat)
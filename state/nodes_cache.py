@@ -1,6 +1,7 @@
 import hashlib
 import json
 import sqlite3
+from workflows.metrics import MetricsRegistry
 
 # Uses sqlite3 to store the output of the nodes. The key is the nodeid_input.
 class NodesCache:
@@ -23,6 +24,8 @@ class NodesCache:
         key = cls.build_cache_key(cache_key, input)
         print(f"Getting output for key: {key}")
         result = cls.cursor.execute("SELECT output, output_type FROM node_outputs WHERE key = ?", (key,)).fetchone()
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("nodes_cache_requests_total", "Nodes cache lookups").inc(result="hit" if result else "miss")
         if result:
             output = result[0]
             output_type = result[1]
@@ -41,6 +44,8 @@ class NodesCache:
             output = json.dumps(output)
         cls.cursor.execute("INSERT INTO node_outputs (key, output, output_type) VALUES (?, ?, ?)", (key, output, output_type))
         cls.connection.commit()
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("nodes_cache_writes_total", "Node outputs stored in the cache").inc()
     
     @classmethod
     def build_cache_key(cls, node_cache_key: str, input: str) -> str:
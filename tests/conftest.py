@@ -0,0 +1,8 @@
+import pytest
+from state.nodes_cache import NodesCache
+
+# The nodes open the output cache in ./database.db when they are created, it is opened once per process so opening it
+# first in a temporary folder keeps the checkout clean
+@pytest.fixture(scope="session", autouse=True)
+def nodes_cache_database(tmp_path_factory):
+    NodesCache.init_database(str(tmp_path_factory.mktemp("nodes_cache") / "database.db"))
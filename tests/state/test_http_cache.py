@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from state.http_cache import HttpCache
+
+class PageHandler(BaseHTTPRequestHandler):
+    pages = {}
+    requests = []
+
+    def do_GET(self):
+        body, etag, cache_control = self.pages[self.path]
+        PageHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    PageHandler.requests = []
+    PageHandler.pages = {
+        "/page": ("<html>v1</html>", '"v1"', "no-cache"),
+        "/fresh": ("<html>fresh</html>", '"f1"', "max-age=3600"),
+        "/private": ("<html>secret</html>", '"p1"', "no-store"),
+    }
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{http_server.server_port}"
+    http_server.shutdown()
+
+@pytest.fixture
+def cache(tmp_path):
+    HttpCache.close()
+    HttpCache.init_database(str(tmp_path / "http_cache.db"))
+    HttpCache.stats = {"fresh": 0, "not_modified": 0, "downloaded": 0}
+    yield HttpCache
+    HttpCache.close()
+
+def test_revalidation_with_etag(server, cache):
+    assert cache.get(server + "/page") == "<html>v1</html>"
+    assert cache.get(server + "/page") == "<html>v1</html>"
+    assert PageHandler.requests == [("/page", None), ("/page", '"v1"')]
+    assert cache.stats["not_modified"] == 1
+
+    # changed page
+    PageHandler.pages["/page"] = ("<html>v2</html>", '"v2"', "no-cache")
+    assert cache.get(server + "/page") == "<html>v2</html>"
+    assert cache.stats["downloaded"] == 2
+
+def test_fresh_page_is_not_requested(server, cache):
+    cache.get(server + "/fresh")
+    assert cache.get(server + "/fresh") == "<html>fresh</html>"
+    assert len(PageHandler.requests) == 1
+    assert cache.stats["fresh"] == 1
+
+def test_no_store_is_not_cached(server, cache):
+    cache.get(server + "/private")
+    cache.get(server + "/private")
+    assert PageHandler.requests == [("/private", None), ("/private", None)]
+
+def test_rendered_body_stored_under_its_key(server, cache):
+    rendered = cache.get(server + "/page", key="rendered:/page", fetch_body=lambda url, response: "<html>rendered</html>")
+    assert rendered == "<html>rendered</html>"
+    # the revalidation returns the stored rendered page
+    assert cache.get(server + "/page", key="rendered:/page", fetch_body=lambda url, response: "<html>rendered again</html>") == "<html>rendered</html>"
+
+def test_revalidate_without_stored_page_sends_no_request(server, cache):
+    assert cache.revalidate(server + "/page", key="rendered:/page") is None
+    assert not cache.store("rendered:/page", "<html>rendered</html>", {"Content-Type": "text/html"}) # no validators
+    assert cache.revalidate(server + "/page", key="rendered:/page") is None
+    assert PageHandler.requests == []
+
+def test_revalidate_stored_page(server, cache):
+    assert cache.store("rendered:/page", "<html>rendered</html>", {"etag": '"v1"', "cache-control": "no-cache"})
+    assert cache.revalidate(server + "/page", key="rendered:/page") == "<html>rendered</html>"
+    assert PageHandler.requests == [("/page", '"v1"')]
+    # changed page
+    PageHandler.pages["/page"] = ("<html>v2</html>", '"v2"', "no-cache")
+    assert cache.revalidate(server + "/page", key="rendered:/page") is None
+
+def test_store_is_bounded(cache):
+    cache.max_entries, max_entries = 3, cache.max_entries
+    try:
+        for i in range(5):
+            cache.set_entry(f"page{i}", "<html></html>", '"e"', None, 0)
+        assert cache.get_entry("page0") is None and cache.get_entry("page1") is None
+        assert cache.get_entry("page4") is not None
+        assert cache.connection.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0] == 3
+    finally:
+        cache.max_entries = max_entries
+
+def test_old_entries_expire(cache):
+    cache.set_entry("old", "<html></html>", '"e"', None, 0)
+    cache.connection.execute("UPDATE http_cache SET fetched_at = fetched_at - ?", (cache.max_entry_age + 1,))
+    cache.set_entry("new", "<html></html>", '"e"', None, 0)
+    assert cache.get_entry("old") is None and cache.get_entry("new") is not None
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from ollama import ChatResponse
+from workers.llm.mistral_worker import MistralWorker
+from workers.llm.ollama_worker import OllamaWorker
+
+def test_ollama_client_usage():
+    response = ChatResponse(model="llama3.2:1b", message={"role": "assistant", "content": "Paris"},
+                            prompt_eval_count=12, eval_count=3, eval_duration=150_000_000)
+    worker = OllamaWorker("ollama_llama3.2:1b", None, "llama3.2:1b")
+    with patch("workers.llm.ollama_worker.chat", return_value=response):
+        assert worker.generate_response("Capital of France?") == "Paris"
+    assert worker.get_usage() == {"model": "llama3.2:1b", "prompt_tokens": 12, "completion_tokens": 3, "generation_seconds": 0.15}
+
+def test_ollama_url_usage():
+    http_response = MagicMock()
+    http_response.json.return_value = {"response": "Paris", "prompt_eval_count": 20, "eval_count": 5}
+    worker = OllamaWorker("ollama_llama3.2:1b", None, "llama3.2:1b", use_lib=False)
+    with patch("workers.llm.ollama_worker.requests.post", return_value=http_response):
+        worker._generate_response_with_url("Capital of France?", None, None)
+    assert worker.get_usage()["prompt_tokens"] == 20 and worker.get_usage()["completion_tokens"] == 5
+
+def test_mistral_usage():
+    worker = MistralWorker("mistral_small", None, "mistral-small-latest", api_key="key")
+    chat_response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Paris"))],
+                                    usage=SimpleNamespace(prompt_tokens=30, completion_tokens=4))
+    worker.client = MagicMock()
+    worker.client.chat.complete.return_value = chat_response
+    assert worker.generate_response("Capital of France?") == "Paris"
+    assert worker.get_usage() == {"model": "mistral-small-latest", "prompt_tokens": 30, "completion_tokens": 4}
+
+def test_usage_is_reset_for_each_response():
+    worker = MistralWorker("mistral_small", None, "mistral-small-latest", api_key="key")
+    worker.client = MagicMock()
+    worker.client.chat.complete.return_value = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Paris"))],
+                                                               usage=SimpleNamespace(prompt_tokens=30, completion_tokens=4))
+    worker.generate_response("Capital of France?")
+    worker.client.chat.complete.return_value = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Rome"))], usage=None)
+    worker.generate_response("Capital of Italy?")
+    assert worker.get_usage() is None
@@ -0,0 +1,28 @@
+import numpy as np
+from pydantic import BaseModel
+from workers.llm.ollama_stub_server import OllamaStubServer, hash_embedding
+from workers.llm.ollama_worker import OllamaWorker
+
+class Answer(BaseModel):
+    text: str
+
+def test_hash_embedding_is_deterministic_and_normalized():
+    embedding = hash_embedding("Bread with flour and yeast", 64)
+    assert embedding == hash_embedding("bread with flour and yeast", 64)
+    assert len(embedding) == 64
+    assert abs(np.linalg.norm(embedding) - 1.0) < 1e-5
+
+def test_hash_embedding_texts_sharing_words_are_closer():
+    query = hash_embedding("bread flour yeast", 256)
+    related = hash_embedding("bread dough with flour and yeast", 256)
+    unrelated = hash_embedding("aged wine from the region", 256)
+    assert np.dot(query, related) > np.dot(query, unrelated)
+
+def test_ollama_worker_url_mode_with_stub_server():
+    with OllamaStubServer(dim=32) as server:
+        worker = OllamaWorker("ollama_stub", None, "stub", use_lib=False, base_url=server.base_url)
+        assert worker.generate_embeddings("How are you?") == hash_embedding("How are you?", 32)
+        response = worker.generate_response("Capital of France?", response_model=Answer)
+        assert response.startswith("Answer: Capital of France")
+        assert worker.get_usage()["prompt_tokens"] == 4
+        assert server.requests == {"embeddings": 1, "generate": 1}
@@ -0,0 +1,36 @@
+from workers.storage.bm25_index_worker import BM25IndexWorker
+from workers.storage.vector_db_worker import VectorDbWorker
+
+DOCUMENTS = ["Pizza dough needs flour, salt, water and yeast", "Pasta is made with flour and eggs", "Rome is the capital of Italy"]
+
+def test_search_ranks_by_bm25():
+    worker = BM25IndexWorker()
+    worker.add_documents(DOCUMENTS)
+    response = worker.search(["flour yeast", "capital of Italy", "unknown words"], results=2)
+    assert response["documents"][0] == [DOCUMENTS[0], DOCUMENTS[1]]
+    assert response["scores"][0][0] > response["scores"][0][1]
+    assert response["documents"][1] == [DOCUMENTS[2]]
+    assert response["documents"][2] == []
+
+def test_ids_match_vector_workers():
+    worker = BM25IndexWorker()
+    metadata = {"doc_location": "recipes.txt", "text_location_in_doc": 0}
+    worker.add_documents([DOCUMENTS[0]], [metadata])
+    response = worker.search(["yeast"])
+    assert response["ids"] == [[VectorDbWorker.build_id(DOCUMENTS[0], metadata)]]
+    assert response["metadatas"] == [[metadata]]
+
+def test_upsert_replaces_postings():
+    worker = BM25IndexWorker()
+    worker.add_documents(["old text about yeast"], ids=["1"])
+    worker.add_documents(["new text about eggs"], ids=["1"])
+    assert worker.search(["yeast"])["ids"] == [[]]
+    assert worker.search(["eggs"])["ids"] == [["1"]]
+
+def test_flush_and_reload(tmp_path):
+    worker = BM25IndexWorker(str(tmp_path), "recipes")
+    worker.add_documents(DOCUMENTS)
+    worker.flush()
+
+    reloaded = BM25IndexWorker(str(tmp_path), "recipes")
+    assert reloaded.search(["eggs"], 1)["documents"] == [[DOCUMENTS[1]]]
@@ -0,0 +1,33 @@
+from workers.storage.chromadb_worker import ChromaDbWorker
+
+def test_add_vectors_upserts(tmp_path):
+    worker = ChromaDbWorker(uri=str(tmp_path / "chroma.db"), collection_name="test_collection", batch_size=2)
+    documents = ["point1", "point2", "point3"]
+    embeddings = [[1, 1], [2, 2], [3, 3]]
+    metadatas = [{"doc_location": "file1.txt", "text_location_in_doc": i} for i in range(3)]
+
+    worker.add_vectors(documents, embeddings, metadatas)
+    worker.add_vectors(documents, embeddings, metadatas)
+    assert worker.collection.count() == 3
+
+    stored = worker.collection.get(include=["metadatas"])
+    assert sorted(metadata["text_location_in_doc"] for metadata in stored["metadatas"]) == [0, 1, 2]
+
+def test_add_vectors_without_metadata(tmp_path):
+    worker = ChromaDbWorker(uri=str(tmp_path / "chroma.db"), collection_name="test_collection")
+    worker.add_vectors(["point1", "point1"], [[1, 1], [1, 1]], [{"doc_location": None}, None])
+    assert worker.collection.count() == 1
+
+    closest_embeddings, closest_texts = worker.find_closest_embeddings([[1, 1]], results=1)
+    assert closest_texts == [["point1"]]
+    assert closest_embeddings[0].tolist() == [[1, 1]]
+
+def test_query_returns_requested_fields(tmp_path):
+    worker = ChromaDbWorker(uri=str(tmp_path / "chroma.db"), collection_name="test_collection", batch_size=1)
+    worker.add_vectors(["point1", "point2"], [[1, 1], [5, 5]])
+
+    response = worker.query([[1, 1], [5, 5]], results=1, include=["documents", "distances"])
+    assert response["documents"] == [["point1"], ["point2"]]
+    assert response["distances"] == [[0.0], [0.0]]
+    assert len(response["ids"]) == 2
+    assert "embeddings" not in response
@@ -0,0 +1,63 @@
+import numpy as np
+from workers.storage.local_vector_index_worker import LocalVectorIndexWorker
+from workers.storage.vector_math import METRIC_L2
+
+def random_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+def test_exact_search_before_training(tmp_path):
+    worker = LocalVectorIndexWorker(str(tmp_path), "test_collection", metric=METRIC_L2)
+    worker.add_vectors(["point1", "point2", "point3"], [[1, 1], [2, 2], [5, 5]], [{"doc_location": "a.txt"}, None, None])
+
+    response = worker.query([[1, 1], [5, 5]], results=2, include=["documents", "distances", "metadatas", "embeddings"])
+    assert response["documents"] == [["point1", "point2"], ["point3", "point2"]]
+    assert response["distances"][0] == [0.0, 2.0]
+    assert response["metadatas"][0] == [{"doc_location": "a.txt"}, None]
+    assert response["embeddings"][1].tolist() == [[5, 5], [2, 2]]
+
+def test_upsert_hides_previous_row(tmp_path):
+    worker = LocalVectorIndexWorker(str(tmp_path), "test_collection", metric=METRIC_L2)
+    worker.add_vectors(["old"], [[1, 1]], ids=["id1"])
+    worker.add_vectors(["new"], [[9, 9]], ids=["id1"])
+
+    response = worker.query([[1, 1]], results=5)
+    assert response["ids"] == [["id1"]]
+    assert response["documents"] == [["new"]]
+
+def test_persisted_and_reopened(tmp_path):
+    worker = LocalVectorIndexWorker(str(tmp_path), "test_collection")
+    vectors = random_vectors(50)
+    worker.add_vectors([f"doc{i}" for i in range(50)], vectors.tolist())
+
+    reopened = LocalVectorIndexWorker(str(tmp_path), "test_collection")
+    closest_embeddings, closest_texts = reopened.find_closest_embeddings([vectors[7].tolist()], results=1)
+    assert closest_texts == [["doc7"]]
+    assert reopened.count == 50
+
+def test_ivf_search_recall(tmp_path):
+    vectors = random_vectors(3000, dim=32)
+    documents = [f"doc{i}" for i in range(len(vectors))]
+    worker = LocalVectorIndexWorker(str(tmp_path), "test_collection", n_lists=16, n_probe=4, min_train_size=1000)
+    worker.add_vectors(documents[:2000], vectors[:2000].tolist())
+    assert worker.centroids is not None
+    # rows added after training are assigned to the existing lists
+    worker.add_vectors(documents[2000:], vectors[2000:].tolist())
+
+    queries = vectors[::100]
+    response = worker.query(queries.tolist(), results=1)
+    found = [ids[0] == worker.build_id(documents[i * 100]) for i, ids in enumerate(response["ids"])]
+    assert all(found)
+
+    reopened = LocalVectorIndexWorker(str(tmp_path), "test_collection", min_train_size=1000)
+    assert reopened.n_lists == 16
+    assert reopened.query(queries.tolist(), results=1)["ids"] == response["ids"]
+
+def test_interrupted_write_is_discarded(tmp_path):
+    worker = LocalVectorIndexWorker(str(tmp_path), "test_collection", metric=METRIC_L2)
+    worker.add_vectors(["point1"], [[1, 1]])
+    with open(worker._file("vectors.f32"), "ab") as file:
+        file.write(np.zeros(2, dtype=np.float32).tobytes())
+
+    reopened = LocalVectorIndexWorker(str(tmp_path), "test_collection", metric=METRIC_L2)
+    reopened.add_vectors(["point2"], [[2, 2]])
+    assert reopened.query([[2, 2]], results=2)["documents"] == [["point2", "point1"]]
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+from workers.storage.milvus_db_worker import MilvusDbWorker
+from workers.storage.vector_db_worker import VectorDbWorker
+
+def make_worker(search_results: list) -> MilvusDbWorker:
+    with patch('workers.storage.milvus_db_worker.MilvusClient') as mock_client_class:
+        mock_client_class.return_value.search.return_value = search_results
+        return MilvusDbWorker(uri="./milvus_test.db", collection_name="test_collection", embeddings_dim=2)
+
+def test_query_returns_the_included_fields():
+    worker = make_worker([[
+        {"id": 1, "distance": 0.9, "entity": {"text": "Paris", "vector": [1, 2], "doc_location": "france.txt"}},
+        {"id": 2, "distance": 0.5, "entity": {"text": "Nice", "vector": [3, 4]}},
+    ]])
+    response = worker.query([[1, 2]], results=2, include=["documents", "embeddings", "metadatas"])
+
+    assert worker.milvus_client.search.call_args.kwargs["output_fields"] == ["*"]
+    assert response == {
+        "ids": [[1, 2]],
+        "documents": [["Paris", "Nice"]],
+        "embeddings": [[[1, 2], [3, 4]]],
+        "metadatas": [[{"doc_location": "france.txt"}, None]],
+    }
+
+def test_query_reads_only_the_requested_fields():
+    worker = make_worker([[{"id": 1, "distance": 0.9, "entity": {"vector": [1, 2]}}]])
+    response = worker.query([[1, 2]], results=1, include=["embeddings", "distances"])
+
+    assert worker.milvus_client.search.call_args.kwargs["output_fields"] == ["vector"]
+    assert response == {"ids": [[1]], "embeddings": [[[1, 2]]], "distances": [[0.9]]}
+
+def test_default_ids_are_derived_from_build_id():
+    worker = make_worker([])
+    metadata = {"doc_location": "france.txt", "text_location_in_doc": 0}
+    worker.add_vectors(["Paris", "Nice"], [[1, 2], [3, 4]], [metadata, None])
+
+    data = worker.milvus_client.upsert.call_args.kwargs["data"]
+    assert [row["id"] for row in data] == [int(VectorDbWorker.build_id("Paris", metadata)[:15], 16),
+                                           int(VectorDbWorker.build_id("Nice")[:15], 16)]
+    assert data[0]["doc_location"] == "france.txt"
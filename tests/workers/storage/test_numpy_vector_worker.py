@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from workers.storage.numpy_vector_worker import NumpyVectorWorker
+from workers.storage.vector_math import METRIC_L2
+
+def random_vectors(count: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+def test_l2_search():
+    worker = NumpyVectorWorker(metric=METRIC_L2)
+    worker.add_vectors(["point1", "point2", "point3"], [[1, 1], [2, 2], [5, 5]])
+    response = worker.query([[1, 1], [5, 5]], results=2, include=["documents", "distances"])
+    assert response["documents"] == [["point1", "point2"], ["point3", "point2"]]
+    assert response["distances"][0] == [0.0, 2.0]
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_across_blocks_matches_exact(dtype):
+    vectors = random_vectors(1000)
+    worker = NumpyVectorWorker(dtype=dtype, block_size=128)
+    worker.add_vectors([f"doc{i}" for i in range(len(vectors))], vectors.tolist(), ids=[str(i) for i in range(len(vectors))])
+
+    queries = vectors[:20] + 0.01
+    response = worker.query(queries.tolist(), results=5)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(queries @ normalized.T), axis=1)[:, :5]
+    for ids, expected_rows in zip(response["ids"], expected):
+        assert ids[0] == str(expected_rows[0])
+        if dtype == "float32":
+            assert ids == [str(row) for row in expected_rows]
+
+def test_upsert_and_growth():
+    worker = NumpyVectorWorker(metric=METRIC_L2)
+    vectors = random_vectors(3000, dim=4)
+    worker.add_vectors([f"doc{i}" for i in range(3000)], vectors.tolist(), ids=[str(i) for i in range(3000)])
+    worker.add_vectors(["updated"], [[100, 100, 100, 100]], ids=["5"])
+
+    assert worker.count == 3000
+    response = worker.query([[100, 100, 100, 100]], results=1, include=["documents", "embeddings"])
+    assert response["documents"] == [["updated"]]
+    assert response["embeddings"][0].tolist() == [[100, 100, 100, 100]]
+
+def test_wrong_dimension_leaves_the_collection_unchanged():
+    worker = NumpyVectorWorker()
+    worker.add_vectors(["a", "b"], [[1, 0], [0, 1]], ids=["a", "b"])
+    with pytest.raises(ValueError, match="Expected embeddings of dimension 2, got 3"):
+        worker.add_vectors(["b", "c"], [[1, 1, 1], [1, 0, 1]], ids=["b", "c"])
+
+    assert worker.count == 2 and worker.ids == ["a", "b"] and worker.documents == ["a", "b"]
+    assert "c" not in worker.id_to_row
+    worker.add_vectors(["c"], [[1, 1]], ids=["c"])
+    assert worker.query([[1, 1]], results=1) == {"ids": [["c"]], "documents": [["c"]]}
+
+def test_flush_and_reload(tmp_path):
+    worker = NumpyVectorWorker(uri=str(tmp_path), collection_name="test_collection", dtype="int8")
+    worker.add_vectors(["a", "b"], [[1, 0], [0, 1]], [{"doc_location": "a.txt"}, None])
+    worker.flush()
+
+    reloaded = NumpyVectorWorker(uri=str(tmp_path), collection_name="test_collection", dtype="int8")
+    response = reloaded.query([[0, 1]], results=1, include=["documents", "metadatas"])
+    assert response["documents"] == [["b"]]
+    assert response["metadatas"] == [[None]]
+
+    with pytest.raises(ValueError, match="was saved with dtype int8"):
+        NumpyVectorWorker(uri=str(tmp_path), collection_name="test_collection", dtype="float32")
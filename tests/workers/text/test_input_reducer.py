@@ -0,0 +1,25 @@
+import pytest
+from workers.text.input_reducer import InputReducer, embedding_scorer
+
+def test_unsupported_strategy():
+    with pytest.raises(ValueError, match="Unsupported input reduction strategy"):
+        InputReducer(100, strategy="summarize")
+
+def test_long_line_is_split_in_sections():
+    reducer = InputReducer(max_tokens=50)
+    text = " ".join(f"word{i}" for i in range(1000))
+    parts = reducer.split(text)
+    assert len(parts) > 1
+    assert all(reducer.count_tokens(part) <= 50 for part in parts)
+    assert " ".join(parts) == text
+
+def test_select_keeps_original_order():
+    lines = ["Gondola rides on the Grand Canal.", "Cookie policy and terms of use.", "Murano glass museum opening hours."]
+    reducer = InputReducer(max_tokens=20, section_tokens=10)
+    assert reducer.reduce("\n".join(lines), "gondola and glass museum") == lines[0] + "\n" + lines[2]
+
+def test_embedding_scorer():
+    embeddings = {"query": [1, 0], "close": [0.9, 0.1], "far": [0, 1]}
+    scorer = embedding_scorer(lambda text: embeddings[text])
+    scores = scorer("query", ["far", "close"])
+    assert scores[1] > scores[0]
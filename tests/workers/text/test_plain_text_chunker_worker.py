@@ -0,0 +1,49 @@
+import pytest
+from workers.text.plain_text_chunker_worker import PlainTextChunkerWorker
+
+@pytest.fixture
+def worker():
+    return PlainTextChunkerWorker("test_worker", max_chunk_size=10, min_chunk_size=4, overlap=2)
+
+def test_short_text_is_one_chunk(worker):
+    chunks = worker.chunk_text("Hello world.", "doc.txt")
+    assert chunks == [{"text": ": Hello world.", "text_location_in_doc": 0, "doc_location": "doc.txt"}]
+
+def test_windows_respect_max_size_and_overlap(worker):
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = worker.chunk_text(text, "doc.txt")
+    windows = [chunk["text"][2:].split(" ") for chunk in chunks]
+    assert all(len(window) <= 10 for window in windows)
+    # consecutive windows share the overlap tokens
+    assert windows[0][-2:] == windows[1][:2]
+    # every token is covered
+    assert set(token for window in windows for token in window) == set(text.split(" "))
+
+def test_last_window_is_not_smaller_than_min_size(worker):
+    text = " ".join(f"w{i}" for i in range(17))
+    chunks = worker.chunk_text(text, "doc.txt")
+    assert len(chunks[-1]["text"][2:].split(" ")) >= 4
+    assert chunks[-1]["text"].endswith("w16")
+
+def test_text_location_is_character_offset(worker):
+    text = " ".join(f"w{i}" for i in range(25))
+    for chunk in worker.chunk_text(text, "doc.txt"):
+        location = chunk["text_location_in_doc"]
+        assert text[location:].startswith(chunk["text"][2:])
+
+def test_markdown_headings_are_prefixed():
+    worker = PlainTextChunkerWorker("test_worker", max_chunk_size=50, min_chunk_size=4, overlap=2)
+    text = "# Pizza\nIntro text.\n## Dough\nMix flour.\n```\n# not a heading\n```\n# Sauce\nTomatoes.\n"
+    chunks = worker.chunk_text(text, "doc.md", markdown=True)
+    texts = [chunk["text"] for chunk in chunks]
+    assert texts[0] == "Pizza: Intro text."
+    assert texts[1].startswith("Pizza. Dough: Mix flour.")
+    assert "# not a heading" in texts[1]
+    assert texts[2] == "Sauce: Tomatoes."
+
+def test_chunk_file_detects_markdown(worker, tmp_path):
+    file_path = tmp_path / "notes.md"
+    file_path.write_text("# Title\nSome text.\n", encoding="utf-8")
+    chunks = worker.chunk_file(str(file_path))
+    assert chunks[0]["text"] == "Title: Some text."
+    assert chunks[0]["doc_location"] == str(file_path)
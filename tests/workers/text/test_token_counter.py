@@ -0,0 +1,13 @@
+from workers.text.token_counter import count_tokens, get_context_window, DEFAULT_CONTEXT_WINDOW
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("a" * 400) == 101
+    # short words and punctuation count more than the characters heuristic
+    assert count_tokens("a, b, c, d") > len("a, b, c, d") / 4
+
+def test_context_window_longest_prefix():
+    assert get_context_window("llama3.2:1b") == 131072
+    assert get_context_window("llama3") == 8192
+    assert get_context_window("unknown-model") == DEFAULT_CONTEXT_WINDOW
+    assert get_context_window(None) == DEFAULT_CONTEXT_WINDOW
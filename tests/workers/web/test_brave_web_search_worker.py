@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from unittest.mock import Mock
+import pytest
+from workers.web.brave_web_search_worker import BraveWebSearchWorker
+from workers.web.web_search_worker import WebSearchWorker
+
+WEB_RESPONSE = {
+    "mixed": {"main": [{"type": "web", "index": 0, "all": False}]},
+    "web": {"results": [{"url": "https://example.com", "title": "Example", "description": "An example"}]},
+}
+IMAGE_RESPONSE = {"results": [{"title": "Puppy", "url": "https://example.com/puppy", "properties": {"url": "https://example.com/puppy.jpg"}}]}
+
+def mock_session(response_object: dict, delay: float = 0.0, headers: dict = None) -> Mock:
+    def get(url, params=None):
+        time.sleep(delay)
+        response = Mock()
+        response.text = json.dumps(response_object)
+        response.headers = headers or {}
+        return response
+    session = Mock()
+    session.get.side_effect = get
+    return session
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    BraveWebSearchWorker.clear_cache()
+    BraveWebSearchWorker.stats.update({"requests": 0, "cache_hits": 0, "coalesced": 0, "errors": 0})
+    yield
+    BraveWebSearchWorker.clear_cache()
+
+def test_cache_shared_between_workers():
+    worker1 = BraveWebSearchWorker("worker1", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    worker2 = BraveWebSearchWorker("worker2", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    worker1.session = mock_session(WEB_RESPONSE)
+    worker2.session = mock_session(WEB_RESPONSE)
+
+    results = worker1.search("cute puppies", 1)
+    assert results[0]["url"] == "https://example.com"
+    assert worker2.search("Cute  Puppies", 1) == results
+    worker2.session.get.assert_not_called()
+    assert BraveWebSearchWorker.get_stats()["cache_hits"] == 1
+
+def test_cache_key_includes_result_type_and_count():
+    web_worker = BraveWebSearchWorker("web", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    image_worker = BraveWebSearchWorker("image", WebSearchWorker.RESULT_TYPE_IMAGE, "key")
+    web_worker.session = mock_session(WEB_RESPONSE)
+    image_worker.session = mock_session(IMAGE_RESPONSE)
+    web_worker.search("puppies", 1)
+    web_worker.search("puppies", 2)
+    assert image_worker.search("puppies", 1)[0]["image_url"] == "https://example.com/puppy.jpg"
+    assert web_worker.session.get.call_count == 2
+
+def test_ttl_expiry():
+    worker = BraveWebSearchWorker("worker", WebSearchWorker.RESULT_TYPE_WEB, "key", cache_ttl=0.05)
+    worker.session = mock_session(WEB_RESPONSE)
+    worker.search("puppies", 1)
+    time.sleep(0.1)
+    worker.search("puppies", 1)
+    assert worker.session.get.call_count == 2
+
+def test_expired_queries_are_dropped_when_caching():
+    short_worker = BraveWebSearchWorker("short", WebSearchWorker.RESULT_TYPE_WEB, "key", cache_ttl=0.05)
+    long_worker = BraveWebSearchWorker("long", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    short_worker.session = mock_session(WEB_RESPONSE)
+    long_worker.session = mock_session(WEB_RESPONSE)
+    long_worker.search("kittens", 1)
+    short_worker.search("puppies", 1)
+    time.sleep(0.1)
+    long_worker.search("parrots", 1)
+    assert [key[1] for key in BraveWebSearchWorker._cache] == ["kittens", "parrots"]
+
+def test_least_recently_used_queries_are_evicted(monkeypatch):
+    monkeypatch.setattr(BraveWebSearchWorker, "cache_max_entries", 2)
+    worker = BraveWebSearchWorker("worker", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    worker.session = mock_session(WEB_RESPONSE)
+    worker.search("kittens", 1)
+    worker.search("puppies", 1)
+    worker.search("kittens", 1) # cache hit, puppies is now the least recently used
+    worker.search("parrots", 1)
+
+    assert [key[1] for key in BraveWebSearchWorker._cache] == ["kittens", "parrots"]
+    worker.search("puppies", 1)
+    assert worker.session.get.call_count == 4
+
+def test_in_flight_queries_are_coalesced():
+    worker = BraveWebSearchWorker("worker", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    worker.session = mock_session(WEB_RESPONSE, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(worker.search("puppies", 1))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert worker.session.get.call_count == 1
+    assert len(results) == 5 and all(result == results[0] for result in results)
+    assert BraveWebSearchWorker.stats["coalesced"] + BraveWebSearchWorker.stats["cache_hits"] == 4
+
+def test_quota_from_headers():
+    worker = BraveWebSearchWorker("worker", WebSearchWorker.RESULT_TYPE_WEB, "key")
+    worker.session = mock_session(WEB_RESPONSE, headers={"X-RateLimit-Limit": "1, 15000", "X-RateLimit-Remaining": "0, 14321", "X-RateLimit-Reset": "1, 86400"})
+    worker.search("puppies", 1)
+    assert BraveWebSearchWorker.get_stats()["quota"] == {"limit": [1, 15000], "remaining": [0, 14321], "reset": [1, 86400]}
@@ -0,0 +1,76 @@
+import threading
+import time
+from workers.web.concurrent_page_fetcher import ConcurrentPageFetcher
+
+STATIC_PAGE = "<html><body><p>" + "Venice has many canals and bridges. " * 10 + "</p></body></html>"
+SCRIPT_PAGE = "<html><body><div id='root'></div><script>render()</script></body></html>"
+
+class FakeSite:
+    def __init__(self, pages: dict, robots: dict = None, delay: float = 0.0):
+        self.pages = pages
+        self.robots = robots or {}
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_running = {}
+        self.max_total = 0
+        self.http_calls = []
+        self.browser_calls = []
+
+    def _track(self, url: str, calls: list):
+        host = url.split("/")[2]
+        with self.lock:
+            calls.append(url)
+            self.running[host] = self.running.get(host, 0) + 1
+            self.max_running[host] = max(self.max_running.get(host, 0), self.running[host])
+            self.max_total = max(self.max_total, sum(self.running.values()))
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[host] -= 1
+
+    def http_fetch(self, url: str) -> str:
+        if url.endswith("/robots.txt"):
+            return self.robots.get(url.split("/")[2])
+        self._track(url, self.http_calls)
+        return self.pages.get(url)
+
+    def browser_fetch(self, url: str) -> str:
+        self._track(url, self.browser_calls)
+        return "<html><body>rendered " + url + "</body></html>"
+
+def test_results_in_input_order_with_limits():
+    urls = [f"https://host{i % 2}.com/page{i}" for i in range(12)]
+    site = FakeSite({url: STATIC_PAGE + url for url in urls}, delay=0.02)
+    fetcher = ConcurrentPageFetcher(max_concurrency=6, max_per_host=2, http_fetch=site.http_fetch, browser_fetch=site.browser_fetch)
+    assert fetcher.fetch_all(urls) == [STATIC_PAGE + url for url in urls]
+    assert max(site.max_running.values()) <= 2
+    assert site.max_total <= 4
+    assert site.browser_calls == []
+    assert fetcher.stats["http"] == 12
+
+def test_browser_only_for_javascript_pages():
+    site = FakeSite({"https://a.com/static": STATIC_PAGE, "https://a.com/app": SCRIPT_PAGE})
+    fetcher = ConcurrentPageFetcher(http_fetch=site.http_fetch, browser_fetch=site.browser_fetch)
+    html_pages = fetcher.fetch_all(["https://a.com/static", "https://a.com/app", "https://a.com/missing"])
+    assert html_pages[0] == STATIC_PAGE
+    assert html_pages[1] == "<html><body>rendered https://a.com/app</body></html>"
+    assert sorted(site.browser_calls) == ["https://a.com/app", "https://a.com/missing"]
+
+def test_robots_disallow_and_crawl_delay():
+    robots = {"a.com": "User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"}
+    urls = ["https://a.com/1", "https://a.com/private/2", "https://a.com/3"]
+    site = FakeSite({url: STATIC_PAGE for url in urls}, robots)
+    fetcher = ConcurrentPageFetcher(max_per_host=2, http_fetch=site.http_fetch, browser_fetch=site.browser_fetch)
+    start = time.monotonic()
+    html_pages = fetcher.fetch_all(urls)
+    assert html_pages == [STATIC_PAGE, None, STATIC_PAGE]
+    assert fetcher.stats["disallowed"] == 1
+    # the second allowed request waits for the crawl delay
+    assert time.monotonic() - start >= 1.0
+
+def test_failed_fetch_returns_none():
+    def failing_fetch(url: str) -> str:
+        raise RuntimeError("connection reset")
+    fetcher = ConcurrentPageFetcher(respect_robots=False, http_fetch=failing_fetch, browser_fetch=failing_fetch)
+    assert fetcher.fetch_all(["https://a.com/1"]) == [None]
+    assert fetcher.stats["failed"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from workers.web.crawler_pool import CrawlerPool
+
+class FakeResult:
+    def __init__(self, html: str):
+        self.html = html
+
+class FakeCrawler:
+    instances = []
+
+    def __init__(self):
+        self.started = False
+        self.closed = False
+        self.sessions = []
+        self.running = 0
+        self.max_running = 0
+        FakeCrawler.instances.append(self)
+
+    async def start(self):
+        self.started = True
+
+    async def close(self):
+        self.closed = True
+
+    async def arun(self, url: str, session_id: str):
+        if url.endswith("/error"):
+            raise RuntimeError("page failed")
+        self.sessions.append(session_id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return FakeResult(f"<html>{url}</html>")
+
+@pytest.fixture
+def pool():
+    FakeCrawler.instances = []
+    pool = CrawlerPool(max_contexts=3, idle_timeout=60, crawler_factory=FakeCrawler)
+    yield pool
+    pool.shutdown()
+
+def test_one_browser_for_many_urls(pool):
+    urls = [f"https://example.com/{i}" for i in range(20)]
+    assert pool.fetch_many(urls) == [f"<html>{url}</html>" for url in urls]
+    assert pool.fetch("https://example.com/last") == "<html>https://example.com/last</html>"
+    assert pool.browser_starts == 1
+    crawler = FakeCrawler.instances[0]
+    assert crawler.max_running <= 3
+    # the pages of the 3 sessions are reused
+    assert set(crawler.sessions) == {"crawler_pool_session_0", "crawler_pool_session_1", "crawler_pool_session_2"}
+
+def test_failed_fetches_return_none(pool):
+    assert pool.fetch_many(["https://example.com/ok", "https://example.com/error"]) == ["<html>https://example.com/ok</html>", None]
+    with pytest.raises(RuntimeError):
+        pool.fetch("https://example.com/error")
+    # the session is released after a failure
+    assert len(pool.fetch_many([f"https://example.com/{i}" for i in range(5)])) == 5
+
+def test_idle_timeout_closes_browser():
+    FakeCrawler.instances = []
+    pool = CrawlerPool(max_contexts=1, idle_timeout=0.05, crawler_factory=FakeCrawler)
+    try:
+        pool.fetch("https://example.com/1")
+        time.sleep(0.3)
+        assert FakeCrawler.instances[0].closed
+        pool.fetch("https://example.com/2")
+        assert pool.browser_starts == 2
+    finally:
+        pool.shutdown()
+
+def test_shutdown_closes_browser(pool):
+    pool.fetch("https://example.com/1")
+    pool.shutdown()
+    assert FakeCrawler.instances[0].closed
+    assert not pool.thread.is_alive()
@@ -0,0 +1,73 @@
+import pytest
+from workers.web.html_text_extractor import HtmlTextExtractor
+
+PARAGRAPH1 = "St Mark's Basilica is the cathedral church of the city, famous for its golden mosaics and its Byzantine architecture."
+PARAGRAPH2 = "The Grand Canal is the main waterway of Venice, best seen from a vaporetto or a gondola at sunset."
+
+PAGE = f"""<!DOCTYPE html>
+<html><head><title>Venice</title><style>p {{ color: red; }}</style><script>var tracking = "<p>not text</p>";</script></head>
+<body>
+    <header><a href="/">Home</a></header>
+    <nav><ul><li><a href="/tours">Tours</a></li><li><a href="/hotels">Hotels</a></li></ul></nav>
+    <div class="cookie-banner">We use cookies to improve your experience on this website, please accept them.</div>
+    <div class="links"><a href="/a">Rome tours and tickets</a> <a href="/b">Florence tours and tickets</a> <a href="/c">Milan</a></div>
+    <article>
+        <header><h1>Top things to do in Venice</h1></header>
+        <p>{PARAGRAPH1}</p>
+        <p>{PARAGRAPH2.replace("gondola", "<b>gondola</b>")}
+        <aside>Book now with 10% off</aside>
+    </article>
+    <footer>Copyright 2025 <a href="/privacy">Privacy</a></footer>
+</body></html>"""
+
+@pytest.fixture(params=[True, False], ids=["lxml", "html.parser"])
+def extractor(request):
+    return HtmlTextExtractor(use_lxml=request.param)
+
+def test_main_content(extractor):
+    assert extractor.extract(PAGE).split("\n") == ["Top things to do in Venice", PARAGRAPH1, PARAGRAPH2]
+
+def test_without_main_element_link_blocks_are_dropped(extractor):
+    page = PAGE.replace("<article>", "<div>").replace("</article>", "</div>")
+    text = extractor.extract(page)
+    assert PARAGRAPH1 in text and PARAGRAPH2 in text
+    assert "Rome tours" not in text
+    assert "cookies" not in text
+
+def test_streaming_chunks(extractor):
+    chunks = [PAGE[i:i + 50] for i in range(0, len(PAGE), 50)]
+    assert extractor.extract_from_chunks(chunks) == extractor.extract(PAGE)
+
+def test_full_text_mode():
+    text = HtmlTextExtractor(remove_boilerplate=False, main_content=False).extract(PAGE)
+    assert "Tours" in text and "Copyright 2025" in text
+    assert "not text" not in text
+    assert "color" not in text
+
+def test_empty_page(extractor):
+    assert extractor.extract("") == ""
+
+def test_page_state_classes_are_not_boilerplate(extractor):
+    page = PAGE.replace("<body>", '<body class="has-sidebar modal-open" id="page">')
+    assert extractor.extract(page).split("\n") == ["Top things to do in Venice", PARAGRAPH1, PARAGRAPH2]
+
+def test_main_content_inside_a_boilerplate_wrapper_is_kept(extractor):
+    page = PAGE.replace("<article>", '<div class="modal"><article>').replace("</article>", "</article></div>")
+    assert extractor.extract(page).split("\n") == ["Top things to do in Venice", PARAGRAPH1, PARAGRAPH2]
+
+def test_inline_boilerplate_is_dropped(extractor):
+    page = PAGE.replace(f"<p>{PARAGRAPH1}</p>", f'<p>{PARAGRAPH1} <span class="share-buttons">Share on Facebook</span></p>')
+    text = extractor.extract(page)
+    assert PARAGRAPH1 in text and "Facebook" not in text
+
+def test_unfiltered_text_when_everything_looks_like_boilerplate(extractor):
+    page = f'<html><body><div class="sidebar"><p>{PARAGRAPH1}</p></div></body></html>'
+    assert extractor.extract(page) == PARAGRAPH1
+
+def test_short_list_items_outside_main_are_kept(extractor):
+    page = (f"<html><body><div class=content><h1>Top attractions in Venice</h1><p>{PARAGRAPH1}</p>"
+            "<ul><li>Doge's Palace</li><li>St Mark's Basilica</li><li>Rialto Bridge</li></ul>"
+            "<p>Top attractions:<br>Grand Canal<br>Murano</p>"
+            '<ul><li><a href="/tours">Tours</a></li><li><a href="/hotels">Hotels</a></li></ul></div></body></html>')
+    assert extractor.extract(page).split("\n") == ["Top attractions in Venice", PARAGRAPH1, "Doge's Palace", "St Mark's Basilica",
+                                                   "Rialto Bridge", "Top attractions:", "Grand Canal", "Murano"]
@@ -0,0 +1,70 @@
+import json
+import os
+import time
+import pytest
+import requests
+from workers.web.local_corpus_search_worker import LocalCorpusSearchWorker
+from workers.web.local_page_server import LocalPageServer
+from workers.web.web_search_worker import WebSearchWorker
+from workflows.nodes.web_search_node import WebSearchNode
+
+PAGES = {
+    "venice/1.html": "<html><body><main><p>Gondola rides on the Grand Canal and the Rialto bridge.</p></main></body></html>",
+    "venice/2.html": "<html><body><main><p>Murano glass museum and the lagoon islands.</p></main></body></html>",
+    "rome/1.html": "<html><body><main><p>The Colosseum and the Roman Forum.</p></main></body></html>",
+}
+
+@pytest.fixture
+def corpus_folder(tmp_path):
+    for path, html in PAGES.items():
+        os.makedirs(tmp_path / os.path.dirname(path), exist_ok=True)
+        (tmp_path / path).write_text(html, encoding="utf-8")
+    corpus = {
+        "pages": [
+            {"path": "venice/1.html", "title": "Venice canals", "description": "Gondolas", "image_url": "https://example.com/gondola.jpg"},
+            {"path": "venice/2.html", "title": "Venice islands", "description": "Murano"},
+            {"path": "rome/1.html", "title": "Rome", "description": "Ancient Rome"},
+        ],
+        "queries": {"things to do in Venice": ["venice/2.html", "venice/1.html"]},
+    }
+    (tmp_path / "corpus.json").write_text(json.dumps(corpus), encoding="utf-8")
+    return str(tmp_path)
+
+@pytest.fixture
+def server(corpus_folder):
+    with LocalPageServer(corpus_folder, latency_ms=20, jitter_ms=10) as server:
+        yield server
+
+def test_recorded_query(corpus_folder, server):
+    worker = LocalCorpusSearchWorker("local", corpus_folder, server.base_url)
+    results = worker.search("Things to do in  venice", 5)
+    assert [result["url"] for result in results] == [server.base_url + "/venice/2.html", server.base_url + "/venice/1.html"]
+    assert results[0] == {"rank": 0, "url": server.base_url + "/venice/2.html", "title": "Venice islands", "description": "Murano", "type": "web"}
+
+def test_unrecorded_query_uses_bm25(corpus_folder, server):
+    worker = LocalCorpusSearchWorker("local", corpus_folder, server.base_url)
+    assert worker.search("colosseum", 1)[0]["url"] == server.base_url + "/rome/1.html"
+
+def test_image_results(corpus_folder, server):
+    worker = LocalCorpusSearchWorker("local", corpus_folder, server.base_url, WebSearchWorker.RESULT_TYPE_IMAGE)
+    result = worker.search("gondola", 1)[0]
+    assert result["image_url"] == "https://example.com/gondola.jpg"
+    assert result["type"] == "image"
+
+def test_page_server_latency_etag_and_robots(corpus_folder, server):
+    start = time.perf_counter()
+    response = requests.get(server.base_url + "/venice/1.html")
+    assert time.perf_counter() - start >= 0.01
+    assert response.text == PAGES["venice/1.html"]
+    assert requests.get(server.base_url + "/venice/1.html", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert requests.get(server.base_url + "/robots.txt").text.startswith("User-agent: *")
+    assert server._resolve("/../../etc/passwd") is None
+    assert requests.get(server.base_url + "/missing.html").status_code == 404
+
+def test_web_search_node_with_custom_worker(corpus_folder, server):
+    worker = LocalCorpusSearchWorker("local", corpus_folder, server.base_url)
+    node = WebSearchNode("search", None, 2, fan_out=False, worker=worker)
+    node.start()
+    results = json.loads(node.run("things to do in Venice"))
+    node.stop()
+    assert len(results) == 2
@@ -1,5 +1,6 @@
 import pytest
 import json
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 from workflows.nodes.document_chunker_node import DocumentChunkerNode
 from docling.document_converter import DocumentConverter
@@ -72,3 +73,50 @@ def test_chunker_with_cache(test_file_path):
         second_result = node.run(input_json)
         assert first_result == second_result
         assert node.cache_hit == True
+
+@patch.object(DocumentConverter, 'convert')
+def test_chunker_created_once_for_multiple_files(mock_convert, chunker_node):
+    with patch('workflows.nodes.document_chunker_node.HybridChunker') as mock_chunker_class:
+        mock_chunk = Mock()
+        mock_chunk.meta.headings = []
+        mock_chunk.text = "text"
+        mock_chunker_class.return_value.chunk.return_value = [mock_chunk]
+
+        chunker_node.start()
+        input_json = json.dumps({"files": ["doc1.pdf", "doc2.pdf", "doc3.pdf"]})
+        chunks = json.loads(chunker_node.run(input_json))
+
+        assert mock_chunker_class.call_count == 1
+        assert [chunk["doc_location"] for chunk in chunks] == ["doc1.pdf", "doc2.pdf", "doc3.pdf"]
+
+def test_iter_chunks_serial_yields_per_file(chunker_node):
+    chunker_node.start()
+    with patch.object(chunker_node, 'chunk_file', side_effect=lambda path: [{"doc_location": path}]):
+        results = list(chunker_node.iter_chunks(["a.pdf", "b.pdf"]))
+    assert results == [("a.pdf", [{"doc_location": "a.pdf"}]), ("b.pdf", [{"doc_location": "b.pdf"}])]
+
+@patch.object(DocumentConverter, 'convert')
+def test_text_files_skip_docling(mock_convert, chunker_node, tmp_path):
+    file_path = tmp_path / "notes.txt"
+    file_path.write_text("Plain text notes.", encoding="utf-8")
+    chunker_node.start()
+    chunks = json.loads(chunker_node.run(json.dumps({"files": [str(file_path)]})))
+
+    mock_convert.assert_not_called()
+    assert chunks == [{"text": ": Plain text notes.", "text_location_in_doc": 0, "doc_location": str(file_path)}]
+
+def test_process_pool_is_reused_across_runs():
+    pools = []
+    def create_pool(max_workers, initializer, initargs):
+        pools.append(ThreadPoolExecutor(max_workers=max_workers))
+        return pools[-1]
+    with patch("workflows.nodes.document_chunker_node.ProcessPoolExecutor", side_effect=create_pool), \
+         patch("workflows.nodes.document_chunker_node._chunk_file_in_process", side_effect=lambda path: [{"doc_location": path}]):
+        node = DocumentChunkerNode("test_node", num_workers=2)
+        node.start()
+        for _ in range(3):
+            chunks = json.loads(node.run(json.dumps({"files": ["doc1.pdf", "doc2.pdf"]})))
+            assert [chunk["doc_location"] for chunk in chunks] == ["doc1.pdf", "doc2.pdf"]
+        node.stop()
+    assert len(pools) == 1 and node.pool is None
+    assert pools[0]._shutdown
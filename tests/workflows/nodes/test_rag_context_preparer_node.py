@@ -0,0 +1,67 @@
+import json
+import pytest
+from workflows.nodes.rag_context_preparer_node import RagContextPreparerNode
+
+def run_node(node: RagContextPreparerNode, prompts: list):
+    node.start()
+    result = node.run(json.dumps(prompts))
+    node.stop()
+    return result
+
+def test_single_prompt_format():
+    node = RagContextPreparerNode("test_node")
+    result = run_node(node, [{"text": "What is the capital of France?", "closest_texts": ["Paris", "Nice"]}])
+    assert result == ("Relevant information:\n[1] Paris\n[2] Nice\n\n"
+                      "Use the provided relevant information to respond to this prompt:\nWhat is the capital of France?")
+
+def test_all_prompts_are_prepared():
+    node = RagContextPreparerNode("test_node")
+    result = run_node(node, [
+        {"text": "Capital of France?", "closest_texts": ["Paris"]},
+        {"text": "Capital of Italy?", "closest_texts": ["Rome"]},
+    ])
+    assert isinstance(result, list)
+    assert "[1] Paris" in result[0] and result[0].endswith("Capital of France?")
+    assert "[1] Rome" in result[1] and result[1].endswith("Capital of Italy?")
+
+def test_overlapping_chunks_are_removed():
+    node = RagContextPreparerNode("test_node")
+    chunk = "Pizza dough needs flour salt water and yeast"
+    run_node(node, [{"text": "pizza", "closest_texts": [chunk, chunk, chunk + " and olive oil", "Pasta needs eggs"]}])
+    assert node.context_segments == [[chunk, "Pasta needs eggs"]]
+
+def test_token_budget():
+    node = RagContextPreparerNode("test_node", max_context_tokens=12)
+    long_chunk = "flour " * 20
+    run_node(node, [{"text": "recipes", "closest_texts": ["Pizza needs yeast", long_chunk, "Bread needs water"]}])
+    # the long chunk doesn't fit, the next smaller one is still added
+    assert node.context_segments == [["Pizza needs yeast", "Bread needs water"]]
+
+def test_similarity_rerank():
+    node = RagContextPreparerNode("test_node", rerank="similarity")
+    run_node(node, [{"text": "q", "embeddings": [1, 0], "closest_texts": ["far", "close"], "closest_embeddings": [[0, 1], [1, 0.1]]}])
+    assert node.context_segments == [["close", "far"]]
+
+def test_cross_encoder_and_custom_rerank():
+    prompt = {"text": "How to make bread with yeast?", "closest_texts": ["Pasta needs eggs", "Bread needs yeast"]}
+    node = RagContextPreparerNode("test_node", rerank="cross_encoder")
+    run_node(node, [prompt])
+    assert node.context_segments == [["Bread needs yeast", "Pasta needs eggs"]]
+
+    node = RagContextPreparerNode("test_node", rerank=lambda prompt, texts: [len(text) for text in texts])
+    run_node(node, [prompt])
+    assert node.context_segments == [["Bread needs yeast", "Pasta needs eggs"]]
+
+def test_unsupported_rerank():
+    with pytest.raises(ValueError, match="Unsupported rerank"):
+        RagContextPreparerNode("test_node", rerank="bm25")
+
+def test_chunks_without_words_are_dropped():
+    node = RagContextPreparerNode("test_node")
+    run_node(node, [{"text": "pizza", "closest_texts": ["---", "Pizza dough needs flour", "", "Pasta needs eggs"]}])
+    assert node.context_segments == [["Pizza dough needs flour", "Pasta needs eggs"]]
+
+def test_single_prompt():
+    node = RagContextPreparerNode("test_node", single_prompt=True)
+    with pytest.raises(ValueError):
+        run_node(node, [{"text": "Capital of France?", "closest_texts": ["Paris"]}, {"text": "Capital of Italy?", "closest_texts": ["Rome"]}])
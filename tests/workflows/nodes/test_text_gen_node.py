@@ -74,3 +74,48 @@ def test_run_method():
         
         assert result == "Generated text"
         mock_worker.generate_response.assert_called_once_with("Test input", None, None, None)
+
+def create_node_with_mock_worker(prompt_properties: dict, instructions: str = "List the museums in Venice: {input_text}"):
+    mock_worker = Mock()
+    mock_worker.generate_response.side_effect = lambda prompt, *args: f"response {len(prompt)}"
+    mock_worker.get_worker_prompts.return_value = {}
+    with patch('workflows.nodes.text_gen_node.OllamaWorker', return_value=mock_worker):
+        node = TextGenNode("test_node", {"model_provider": "ollama", "model_name": "llama2", "instructions": instructions}, prompt_properties)
+        node.start()
+    return node, mock_worker
+
+PAGE = "\n".join(["Book your hotel now with our partners and save money."] * 30 + ["The Accademia museum shows Venetian paintings."])
+
+def test_small_input_is_not_reduced():
+    node, mock_worker = create_node_with_mock_worker({"max_input_tokens": 1000})
+    node.run(PAGE)
+    mock_worker.generate_response.assert_called_once_with(PAGE, None, None, None)
+    assert node.input_tokens_before == node.input_tokens_after
+
+def test_select_keeps_relevant_sections():
+    node, mock_worker = create_node_with_mock_worker({"max_input_tokens": 30})
+    node.run(PAGE)
+    prompt = mock_worker.generate_response.call_args[0][0]
+    assert "Accademia museum" in prompt
+    assert node.input_tokens_after <= 30 < node.input_tokens_before
+
+def test_truncate():
+    node, mock_worker = create_node_with_mock_worker({"max_input_tokens": 30, "input_reduction": "truncate"})
+    node.run(PAGE)
+    prompt = mock_worker.generate_response.call_args[0][0]
+    assert PAGE.startswith(prompt)
+    assert node.input_reducer.count_tokens(prompt) <= 30
+
+def test_map_reduce():
+    node, mock_worker = create_node_with_mock_worker({"max_input_tokens": 100, "input_reduction": "map_reduce"})
+    result = node.run(PAGE)
+    parts = node.input_reducer.split(PAGE)
+    assert len(parts) > 1
+    # one call per part and one call with the combined partial responses
+    assert mock_worker.generate_response.call_count == len(parts) + 1
+    assert mock_worker.generate_response.call_args[0][0].startswith("response")
+    assert result.startswith("response")
+
+def test_default_budget_uses_context_window():
+    node, _ = create_node_with_mock_worker({})
+    assert 8192 - 2048 - 20 < node.input_reducer.max_tokens < 8192 - 2048
@@ -0,0 +1,150 @@
+import pytest
+import json
+import numpy as np
+from unittest.mock import Mock, patch
+from workflows.nodes.vector_db_reader_node import VectorDbReaderNode
+
+@pytest.fixture
+def mock_worker():
+    with patch('workflows.nodes.vector_db_reader_node.ChromaDbWorker') as mock_worker_class:
+        mock_worker = Mock()
+        mock_worker.query.return_value = {
+            "ids": [["1", "2"], ["3", "4"]],
+            "documents": [["Paris", "Nice"], ["Rome", "Milan"]],
+            "embeddings": [np.array([[1, 2], [3, 4]]), np.array([[5, 6], [7, 8]])],
+            "distances": [[0.1, 0.2], [0.3, 0.4]],
+        }
+        mock_worker_class.return_value = mock_worker
+        yield mock_worker
+
+@pytest.fixture
+def input_text():
+    return json.dumps([
+        {"text": "Capital of France?", "embeddings": [1, 2]},
+        {"text": "Capital of Italy?", "embeddings": [5, 6]},
+    ])
+
+def test_all_inputs_in_one_query(mock_worker, input_text):
+    node = VectorDbReaderNode("test_node", "./test.db", num_results=2)
+    node.start()
+    result = json.loads(node.run(input_text))
+
+    mock_worker.query.assert_called_once_with(query_embeddings=[[1, 2], [5, 6]], results=2, include=["embeddings", "documents"])
+    assert result[0]["closest_texts"] == ["Paris", "Nice"]
+    assert result[0]["closest_embeddings"] == [[1, 2], [3, 4]]
+    assert result[1]["closest_texts"] == ["Rome", "Milan"]
+
+def test_selected_result_fields(mock_worker, input_text):
+    node = VectorDbReaderNode("test_node", "./test.db", num_results=2, result_fields=["closest_texts", "closest_distances", "closest_ids"])
+    node.start()
+    result = json.loads(node.run(input_text))
+
+    mock_worker.query.assert_called_once_with(query_embeddings=[[1, 2], [5, 6]], results=2, include=["documents", "distances"])
+    assert "closest_embeddings" not in result[0]
+    assert result[1]["closest_distances"] == [0.3, 0.4]
+    assert result[1]["closest_ids"] == ["3", "4"]
+
+def test_default_result_fields_are_not_shared():
+    node = VectorDbReaderNode("test_node", "./test.db")
+    node.result_fields.append("closest_ids")
+    assert VectorDbReaderNode("test_node", "./test.db").result_fields == ["closest_embeddings", "closest_texts"]
+
+def test_unsupported_result_field():
+    with pytest.raises(ValueError, match="Unsupported result field"):
+        VectorDbReaderNode("test_node", "./test.db", result_fields=["closest_unknown"])
+
+def test_missing_embeddings(mock_worker):
+    node = VectorDbReaderNode("test_node", "./test.db")
+    node.start()
+    with pytest.raises(ValueError, match="'text' and 'embeddings' are required"):
+        node.run(json.dumps([{"text": "hello"}]))
+    mock_worker.query.assert_not_called()
+
+def test_local_index_round_trip(tmp_path):
+    from workflows.nodes.vector_db_writer_node import VectorDbWriterNode
+    db_location = str(tmp_path / "local_index.db")
+    writer = VectorDbWriterNode("writer_node", db_location, "local_index")
+    writer.start()
+    writer.run(json.dumps([
+        {"text": "Paris", "embeddings": [1, 0], "text_location_in_doc": 0, "doc_location": "france.txt"},
+        {"text": "Rome", "embeddings": [0, 1], "text_location_in_doc": 0, "doc_location": "italy.txt"},
+    ]))
+    writer.stop()
+
+    reader = VectorDbReaderNode("reader_node", db_location, "local_index", num_results=1, result_fields=["closest_texts", "closest_metadatas"])
+    reader.start()
+    result = json.loads(reader.run(json.dumps([{"text": "Capital of Italy?", "embeddings": [0.1, 0.9]}])))
+    assert result[0]["closest_texts"] == ["Rome"]
+    assert result[0]["closest_metadatas"] == [{"doc_location": "italy.txt", "text_location_in_doc": 0}]
+
+@pytest.fixture
+def mock_lexical_worker():
+    with patch('workflows.nodes.vector_db_reader_node.BM25IndexWorker') as mock_worker_class:
+        mock_worker = Mock()
+        mock_worker.search.return_value = {
+            "ids": [["1", "5"], ["6", "3"]],
+            "documents": [["Paris", "Lyon"], ["Turin", "Rome"]],
+            "metadatas": [[None, None], [None, None]],
+            "scores": [[8.0, 1.0], [2.0, 1.5]],
+        }
+        mock_worker_class.return_value = mock_worker
+        yield mock_worker
+
+def test_unsupported_retrieval_mode():
+    with pytest.raises(ValueError, match="Unsupported retrieval mode"):
+        VectorDbReaderNode("test_node", "./test.db", retrieval_mode="semantic")
+    with pytest.raises(ValueError, match="only supported in vector retrieval mode"):
+        VectorDbReaderNode("test_node", "./test.db", retrieval_mode="hybrid")
+
+def test_lexical_mode_skips_vector_search(mock_worker, mock_lexical_worker):
+    node = VectorDbReaderNode("test_node", "./test.db", num_results=2, result_fields=["closest_texts"], retrieval_mode="lexical")
+    node.start()
+    result = json.loads(node.run(json.dumps([{"text": "Capital of France?"}, {"text": "Capital of Italy?"}])))
+
+    mock_lexical_worker.search.assert_called_once_with(["Capital of France?", "Capital of Italy?"], 2)
+    mock_worker.query.assert_not_called()
+    assert result[1]["closest_texts"] == ["Turin", "Rome"]
+    assert result[1]["retrieval"] == "lexical"
+
+def test_hybrid_mode_fuses_only_undecided_inputs(mock_worker, mock_lexical_worker, input_text):
+    mock_worker.query.return_value = {"ids": [["3", "4"]], "documents": [["Rome", "Milan"]]}
+    node = VectorDbReaderNode("test_node", "./test.db", num_results=2, result_fields=["closest_texts", "closest_ids"], retrieval_mode="hybrid")
+    node.start()
+    result = json.loads(node.run(input_text))
+
+    # the first input is decisive (8.0 >= 2 * 1.0), only the second one is sent to the vector database
+    mock_worker.query.assert_called_once_with(query_embeddings=[[5, 6]], results=2, include=["documents"])
+    assert result[0]["closest_texts"] == ["Paris", "Lyon"]
+    assert result[0]["retrieval"] == "lexical"
+    # "Rome" is second in the lexical ranking and first in the vector one
+    assert result[1]["closest_ids"] == ["3", "6"]
+    assert result[1]["retrieval"] == "hybrid"
+
+def test_hybrid_mode_embeds_only_when_needed(mock_worker, mock_lexical_worker):
+    mock_worker.query.return_value = {"ids": [["3"]], "documents": [["Rome"]]}
+    with patch('workflows.nodes.vector_db_reader_node.OllamaWorker') as mock_ollama_class:
+        mock_ollama_class.return_value.generate_embeddings.return_value = [0.5, 0.5]
+        node = VectorDbReaderNode("test_node", "./test.db", num_results=1, result_fields=["closest_texts"], retrieval_mode="hybrid",
+                                  embedding_model_properties={"model_provider": "ollama", "model_name": "mxbai-embed-large"})
+        node.start()
+        node.run(json.dumps([{"text": "Capital of France?"}, {"text": "Capital of Italy?"}]))
+
+    mock_ollama_class.return_value.generate_embeddings.assert_called_once_with("Capital of Italy?")
+    mock_worker.query.assert_called_once_with(query_embeddings=[[0.5, 0.5]], results=1, include=["documents"])
+
+def test_hybrid_round_trip(tmp_path):
+    from workflows.nodes.vector_db_writer_node import VectorDbWriterNode
+    db_location = str(tmp_path / "hybrid.db")
+    writer = VectorDbWriterNode("writer_node", db_location, "numpy", lexical_index=True)
+    writer.start()
+    writer.run(json.dumps([
+        {"text": "Paris is the capital of France", "embeddings": [1, 0], "text_location_in_doc": 0, "doc_location": "france.txt"},
+        {"text": "Rome is the capital of Italy", "embeddings": [0, 1], "text_location_in_doc": 0, "doc_location": "italy.txt"},
+    ]))
+    writer.stop()
+
+    reader = VectorDbReaderNode("reader_node", db_location, "numpy", num_results=1, result_fields=["closest_texts"], retrieval_mode="hybrid")
+    reader.start()
+    result = json.loads(reader.run(json.dumps([{"text": "Rome"}])))
+    assert result[0]["closest_texts"] == ["Rome is the capital of Italy"]
+    assert result[0]["retrieval"] == "lexical"
@@ -0,0 +1,85 @@
+import pytest
+import json
+from unittest.mock import Mock, patch
+from workflows.nodes.vector_db_writer_node import VectorDbWriterNode
+
+def make_chunks(count: int, doc_location: str = "doc.txt") -> list:
+    return [{"text": f"text{i}", "embeddings": [i, i], "text_location_in_doc": i, "doc_location": doc_location} for i in range(count)]
+
+@pytest.fixture
+def mock_worker():
+    with patch('workflows.nodes.vector_db_writer_node.ChromaDbWorker') as mock_worker_class:
+        mock_worker = Mock()
+        mock_worker_class.return_value = mock_worker
+        yield mock_worker
+
+def test_writes_in_batches(mock_worker):
+    node = VectorDbWriterNode("test_node", "./test.db", batch_size=2)
+    node.start()
+    result = json.loads(node.run(json.dumps(make_chunks(5))))
+
+    assert result == {"number_of_segments": 5, "number_of_documents": 1}
+    batch_sizes = [len(call.args[0]) for call in mock_worker.add_vectors.call_args_list]
+    assert batch_sizes == [2, 2, 1]
+
+def test_writes_metadata(mock_worker):
+    node = VectorDbWriterNode("test_node", "./test.db")
+    node.start()
+    node.run(json.dumps(make_chunks(1, "file1.txt")))
+
+    texts, embeddings, metadatas = mock_worker.add_vectors.call_args.args
+    assert texts == ["text0"]
+    assert embeddings == [[0, 0]]
+    assert metadatas == [{"doc_location": "file1.txt", "text_location_in_doc": 0}]
+
+def test_multiple_calls_do_not_resend_previous_chunks(mock_worker):
+    node = VectorDbWriterNode("test_node", "./test.db")
+    node.start()
+    node.run(json.dumps(make_chunks(3, "file1.txt")))
+    result = json.loads(node.run(json.dumps(make_chunks(2, "file2.txt"))))
+
+    assert [len(call.args[0]) for call in mock_worker.add_vectors.call_args_list] == [3, 2]
+    assert result == {"number_of_segments": 5, "number_of_documents": 2}
+
+def test_missing_embeddings(mock_worker):
+    node = VectorDbWriterNode("test_node", "./test.db")
+    node.start()
+    with pytest.raises(ValueError, match="missing text/embeddings"):
+        node.run(json.dumps([{"text": "hello"}]))
+
+def test_invalid_chunk_is_found_before_writing(mock_worker):
+    node = VectorDbWriterNode("test_node", "./test.db", batch_size=2)
+    node.start()
+    with pytest.raises(ValueError, match="missing text/embeddings"):
+        node.run(json.dumps(make_chunks(4) + [{"text": "hello"}]))
+    mock_worker.add_vectors.assert_not_called()
+
+def test_vector_and_lexical_indexes_share_ids(mock_worker):
+    with patch('workflows.nodes.vector_db_writer_node.BM25IndexWorker') as mock_lexical_class:
+        node = VectorDbWriterNode("test_node", "./test.db", lexical_index=True)
+        node.start()
+        node.run(json.dumps([{"text": "hello", "embeddings": [1, 2]}]))
+
+    ids = mock_worker.add_vectors.call_args.kwargs["ids"]
+    assert ids == mock_lexical_class.return_value.add_documents.call_args.kwargs["ids"]
+    assert len(ids) == 1
+
+def test_hybrid_round_trip_without_metadata(tmp_path):
+    from workflows.nodes.vector_db_reader_node import VectorDbReaderNode
+    db_location = str(tmp_path / "hybrid.db")
+    writer = VectorDbWriterNode("writer_node", db_location, "chroma", lexical_index=True)
+    writer.start()
+    # no doc_location and text_location_in_doc, Chroma stores the chunks without metadata
+    writer.run(json.dumps([
+        {"text": "Paris is the capital of France", "embeddings": [1, 0]},
+        {"text": "Rome is the capital of Italy", "embeddings": [0, 1]},
+    ]))
+    writer.stop()
+    assert sorted(writer.worker.collection.get()["ids"]) == sorted(writer.lexical_worker.ids)
+
+    reader = VectorDbReaderNode("reader_node", db_location, "chroma", num_results=2, result_fields=["closest_ids"], retrieval_mode="hybrid")
+    reader.start()
+    result = json.loads(reader.run(json.dumps([{"text": "capital", "embeddings": [0, 1]}])))
+    assert result[0]["retrieval"] == "hybrid"
+    # each chunk found by both searches is fused into one result
+    assert sorted(result[0]["closest_ids"]) == sorted(writer.lexical_worker.ids)
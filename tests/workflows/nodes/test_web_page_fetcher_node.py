@@ -0,0 +1,40 @@
+import json
+from unittest.mock import MagicMock, patch
+from state.http_cache import HttpCache
+from workflows.nodes.web_page_fetcher_node import WebPageFetcherNode
+
+def test_batch_mode_returns_texts_in_rank_order():
+    pages = {
+        "https://a.com": "<html><body><p>First result</p></body></html>",
+        "https://b.com": "<html><body><p>Second result</p></body></html>",
+    }
+    search_results = [{"rank": 1, "url": "https://b.com"}, {"rank": 0, "url": "https://a.com"}, {"rank": 2, "url": "https://c.com"}]
+    node = WebPageFetcherNode("fetcher", batch_mode=True, http_cache=False, main_content=False)
+    with patch.object(WebPageFetcherNode, "get_web_page", side_effect=lambda url: pages.get(url)), \
+         patch.object(WebPageFetcherNode, "get_web_page_with_crawl4ai", return_value=None):
+        node.start()
+        node.page_fetcher.respect_robots = False
+        node.page_fetcher.min_text_length = 5
+        result = node.run(json.dumps(search_results))
+    assert [text.strip() for text in result] == ["First result", "Second result", ""]
+
+def test_main_content_extraction():
+    article = "The Doge's Palace was the residence of the Doge of Venice and the seat of the government of the Republic."
+    html = f"<html><body><nav><a href='/'>Home</a></nav><p>{article}</p><footer>Copyright</footer></body></html>"
+    assert WebPageFetcherNode("fetcher").extract_page_text(html) == article
+    assert "Home" in WebPageFetcherNode("fetcher", main_content=False).extract_page_text(html)
+
+def test_browser_path_renders_uncached_pages_without_http_request(tmp_path):
+    HttpCache.close()
+    HttpCache.init_database(str(tmp_path / "http_cache.db"))
+    pool = MagicMock()
+    pool.fetch_with_headers.return_value = ("<html>rendered</html>", {"ETag": '"v1"'})
+    node = WebPageFetcherNode("fetcher")
+    try:
+        with patch("workflows.nodes.web_page_fetcher_node.CrawlerPool.get_instance", return_value=pool), \
+             patch("state.http_cache.requests.get") as http_get:
+            assert node.get_web_page_with_crawl4ai("https://a.com") == "<html>rendered</html>"
+        http_get.assert_not_called()
+        assert HttpCache.get_entry("rendered:https://a.com")["etag"] == '"v1"'
+    finally:
+        HttpCache.close()
@@ -0,0 +1,87 @@
+import uuid
+import pytest
+import requests
+from workers.llm.ai_worker import AIWorker
+from workflows.metrics import MetricsRegistry
+from workflows.nodes.passthrough_node import PassthroughNode
+
+class FakeWorker(AIWorker):
+    def __init__(self, response: str = "response"):
+        super().__init__("fake_worker")
+        self.model_name = "fake-model"
+        self.response = response
+
+    def generate_response_impl(self, prompt, system_prompt=None, output_format=None, response_model=None, **kwargs) -> str:
+        if self.response is None:
+            raise RuntimeError("model unavailable")
+        return self.response
+
+    def get_worker_prompts(self) -> dict:
+        return {}
+
+@pytest.fixture
+def metrics():
+    MetricsRegistry.reset()
+    MetricsRegistry.enable()
+    yield MetricsRegistry
+    MetricsRegistry.disable()
+    MetricsRegistry.stop_http_server()
+    MetricsRegistry.reset()
+
+def test_disabled_registry_records_nothing():
+    MetricsRegistry.reset()
+    FakeWorker().generate_response("hello")
+    node = PassthroughNode("node")
+    node.start()
+    node.run("hello")
+    assert MetricsRegistry.metrics == {}
+
+def test_prometheus_text_format(metrics):
+    metrics.counter("requests_total", "Requests").inc(model="a")
+    metrics.counter("requests_total").inc(2, model='b"c')
+    histogram = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, model="a")
+    metrics.gauge("queue_size", "Queue size").set(3)
+    text = metrics.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{model="a"} 1' in text
+    assert 'requests_total{model="b\\"c"} 2' in text
+    assert 'latency_seconds_bucket{model="a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{model="a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{model="a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{model="a"} 4' in text
+    assert 'latency_seconds_sum{model="a"} 3.65' in text
+    assert "queue_size 3" in text
+    with pytest.raises(ValueError):
+        metrics.gauge("requests_total")
+
+def test_ai_worker_metrics(metrics):
+    FakeWorker().generate_response("hello")
+    with pytest.raises(RuntimeError):
+        FakeWorker(None).generate_response("hello")
+    requests_total = metrics.counter("ai_worker_requests_total")
+    assert requests_total.get(model="fake-model", status="ok") == 1
+    assert requests_total.get(model="fake-model", status="error") == 1
+    assert metrics.histogram("ai_worker_request_seconds").get_count(model="fake-model") == 2
+
+def test_node_and_cache_metrics(metrics):
+    node = PassthroughNode("node")
+    node.cache_enabled = True
+    node.start()
+    input_text = str(uuid.uuid4())
+    node.run(input_text)
+    node.run(input_text)
+    assert metrics.counter("workflow_node_runs_total").get(node="node") == 2
+    assert metrics.counter("nodes_cache_requests_total").get(result="miss") == 1
+    assert metrics.counter("nodes_cache_requests_total").get(result="hit") == 1
+    assert metrics.counter("nodes_cache_writes_total").get() == 1
+
+def test_http_endpoint(metrics):
+    metrics.counter("requests_total", "Requests").inc()
+    url = metrics.start_http_server(port=0)
+    response = requests.get(url, timeout=5)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "requests_total 1" in response.text
+    assert requests.get(url.replace("/metrics", "/other"), timeout=5).status_code == 404
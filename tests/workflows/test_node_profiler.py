@@ -0,0 +1,67 @@
+import pytest
+from workflows.node_profiler import NodeProfiler
+from workflows.nodes.abstract_node import AbstractNode
+from workflows.nodes.passthrough_node import PassthroughNode
+from workflows.workflow import Workflow
+
+def busy_loop(iterations: int) -> int:
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+class BusyNode(AbstractNode):
+    def start_impl(self):
+        pass
+
+    def run_impl(self, input_text: str) -> str:
+        busy_loop(300_000)
+        self.result = input_text
+        return self.result
+
+    def stop_impl(self) -> str:
+        return self.result
+
+def build_workflow(profile: str) -> Workflow:
+    workflow = Workflow(profile=profile, profile_interval_ms=1.0)
+    workflow.add_node("start", PassthroughNode("start"))
+    workflow.add_node("busy", BusyNode("busy node"))
+    workflow.connect("start", "busy")
+    return workflow
+
+@pytest.mark.parametrize("mode", ["sampling", "cprofile"])
+def test_samples_are_attributed_to_the_node(mode):
+    workflow = build_workflow(mode)
+    workflow.run("venice")
+    stacks = workflow.profiler.get_collapsed_stacks("busy node")
+    assert stacks
+    # the stacks start at run_impl, the workflow engine frames are cut
+    assert all("run_impl" in stack.split(";")[0] for stack in stacks)
+    assert any("busy_loop" in stack for stack in stacks)
+    assert workflow.profiler.get_top_functions("busy node", 1)[0][0].endswith("busy_loop")
+
+def test_collapsed_files_are_written_next_to_the_report(tmp_path):
+    workflow = build_workflow("sampling")
+    workflow.run("venice")
+    filename = str(tmp_path / "report.html")
+    workflow.save_trace_report(filename)
+
+    with open(filename + ".busy_node.collapsed", "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    with open(filename + ".collapsed", "r", encoding="utf-8") as file:
+        assert all(line.startswith(("busy_node;", "start;")) for line in file.read().splitlines())
+    with open(filename, "r", encoding="utf-8") as file:
+        report = file.read()
+    assert "<h2>Profile (sampling, samples)</h2>" in report
+    assert 'href="report.html.busy_node.collapsed"' in report
+
+def test_profiling_is_off_by_default():
+    workflow = Workflow()
+    workflow.add_node("start", PassthroughNode("start"))
+    workflow.run("venice")
+    assert workflow.profiler is None and workflow.nodes["start"].profiler is None
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        NodeProfiler("perf")
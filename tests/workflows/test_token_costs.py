@@ -0,0 +1,41 @@
+import json
+import time
+import pytest
+from workflows import token_costs
+from workflows.token_costs import compute_cost, get_price, load_prices
+from workflows.workflow_tracer import WorkflowTracer, TRACE_TIMINGS
+
+def test_price_prefix_match():
+    assert get_price("gemini-2.0-flash-lite-001") == token_costs.PRICES["gemini-2.0-flash-lite"]
+    assert get_price("llama3.2:1b") == (0.0, 0.0)
+    assert compute_cost("model", 1_000_000, 500_000, {"model": (1.0, 4.0)}) == pytest.approx(3.0)
+
+def test_load_prices(tmp_path, monkeypatch):
+    monkeypatch.setattr(token_costs, "PRICES", dict(token_costs.PRICES))
+    filename = tmp_path / "prices.json"
+    filename.write_text(json.dumps({"llama3.2": [0.01, 0.02]}))
+    load_prices(str(filename))
+    assert get_price("llama3.2:1b") == (0.01, 0.02)
+
+def test_tracer_token_usage_per_node_and_run():
+    tracer = WorkflowTracer(TRACE_TIMINGS)
+    prices = {"big-model": (2.0, 8.0)}
+    tracer.start_trace("summarize")
+    tracer.log_worker("summarize", "big", "input", "output", start_ns=time.perf_counter_ns() - 2_000_000_000,
+                      usage={"model": "big-model", "prompt_tokens": 1000, "completion_tokens": 100})
+    tracer.stop_trace("summarize")
+    tracer.start_trace("extract")
+    for _ in range(2):
+        tracer.log_worker("extract", "local", "input", "output",
+                          usage={"model": "llama3.2:1b", "prompt_tokens": 500, "completion_tokens": 50, "generation_seconds": 0.5})
+    tracer.log_worker("extract", "fetcher", "url", "page")
+    tracer.stop_trace("extract")
+
+    usage = tracer.get_token_usage(prices)
+    assert usage["nodes"]["summarize"]["cost"] == pytest.approx(0.0028)
+    assert usage["nodes"]["summarize"]["tokens_per_sec"] == pytest.approx(50, rel=0.05)
+    assert usage["nodes"]["extract"]["requests"] == 2
+    assert usage["nodes"]["extract"]["tokens_per_sec"] == 100
+    assert usage["nodes"]["extract"]["cost"] == 0
+    assert usage["total"]["prompt_tokens"] == 2000 and usage["total"]["completion_tokens"] == 200
+    assert "Token Usage" in tracer.generate_report_as_html()
@@ -0,0 +1,86 @@
+import json
+import time
+from unittest.mock import patch
+import pytest
+from workflows import trace_analysis
+from workflows.nodes.passthrough_node import PassthroughNode
+from workflows.trace_analysis import analyze_spans, analyze_tracer, critical_path, format_summary, topological_order
+from workflows.trace_sinks import JsonlTraceSink, Span
+from workflows.workflow import Workflow
+from workflows.workflow_tracer import NodeTrace, TRACE_TIMINGS
+
+def make_trace(node_id: str, start_ms: int, end_ms: int) -> NodeTrace:
+    return NodeTrace(node_id, None, start_ns=start_ms * 1_000_000, end_ns=end_ms * 1_000_000)
+
+# start --> fast --> end
+#       \-> slow ---^
+def test_critical_path_follows_the_slowest_branch():
+    traces = {trace.node_id: trace for trace in [
+        make_trace("start", 0, 10), make_trace("fast", 10, 15), make_trace("slow", 15, 115), make_trace("end", 115, 120)]}
+    connections = {"start": ["fast", "slow"], "fast": ["end"], "slow": ["end"]}
+    assert topological_order(traces, connections) == ["start", "fast", "slow", "end"]
+    assert critical_path(traces, connections) == ["start", "slow", "end"]
+
+def test_critical_path_without_connections():
+    traces = {trace.node_id: trace for trace in [make_trace("a", 0, 10), make_trace("b", 10, 50)]}
+    assert critical_path(traces) == ["b"]
+    assert critical_path({}) == []
+
+# Node that calls a slow fake worker
+class SleepingNode(PassthroughNode):
+    def run_impl(self, input_text: str) -> str:
+        start_ns = time.perf_counter_ns()
+        time.sleep(0.05)
+        self.tracer.log_worker(self.node_id, "sleeping_worker", input_text, input_text, None, None, start_ns)
+        return super().run_impl(input_text)
+
+# start --> slow --> end
+#       \-> fast --^
+def build_workflow(trace_sinks: list = None) -> Workflow:
+    workflow = Workflow(trace_level=TRACE_TIMINGS, trace_sinks=trace_sinks)
+    workflow.add_node("start", PassthroughNode("start"))
+    workflow.add_node("slow", SleepingNode("slow"))
+    workflow.add_node("fast", PassthroughNode("fast"))
+    workflow.add_node("end", PassthroughNode("end"))
+    workflow.connect("start", "slow")
+    workflow.connect("start", "fast")
+    workflow.connect("slow", "end")
+    workflow.connect("fast", "end")
+    return workflow
+
+def test_analyze_tracer_self_wait_and_worker_time():
+    workflow = build_workflow()
+    workflow.run("hello")
+    summary = analyze_tracer(workflow.tracer, workflow.connections)
+    assert summary["critical_path"] == ["start", "slow", "end"]
+    slow = summary["nodes"]["slow"]
+    assert slow["worker_ms"] >= 50 and slow["self_ms"] >= slow["worker_ms"]
+    assert slow["overhead_ms"] < 20
+    # the end node is started by its first input and waits for the second one
+    end = summary["nodes"]["end"]
+    assert end["wait_ms"] == pytest.approx(end["duration_ms"] - end["self_ms"], abs=0.01)
+
+def test_analyze_spans_cache_savings(tmp_path):
+    def node_span(trace_id: str, start_ms: int, end_ms: int, cache_hit: bool) -> Span:
+        return Span(trace_id, trace_id[:16], None, "llm", "node", start_ms * 1_000_000, end_ms * 1_000_000,
+                    {"node.self_ns": (end_ms - start_ms) * 1_000_000, "node.cache_hit": cache_hit})
+    spans = [node_span("a" * 32, 0, 100, False), node_span("b" * 32, 0, 120, False), node_span("c" * 32, 0, 2, True)]
+    summary = analyze_spans(spans)
+    assert summary["runs"] == 3
+    assert summary["nodes"]["llm"]["cache_hit_rate"] == pytest.approx(0.333)
+    assert summary["cache_savings_ms"] == pytest.approx(108.0)
+
+def test_cli_over_jsonl(tmp_path, capsys):
+    filename = str(tmp_path / "spans.jsonl")
+    sink = JsonlTraceSink(filename)
+    for _ in range(3):
+        build_workflow([sink]).run("hello")
+    sink.close()
+    with patch("sys.argv", ["trace_analysis", filename, "--json"]):
+        trace_analysis.main()
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["runs"] == 3
+    assert summary["nodes"]["slow"]["critical_rate"] == 1.0
+    assert summary["nodes"]["fast"]["critical_rate"] == 0.0
+    assert summary["nodes"]["slow"]["worker_mean_ms"] >= 50
+    assert "slow" in format_summary(summary).split("\n")[3]
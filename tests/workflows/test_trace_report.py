@@ -0,0 +1,52 @@
+import os
+from workflows.nodes.passthrough_node import PassthroughNode
+from workflows.trace_report import TraceReportWriter
+from workflows.workflow import Workflow
+
+def build_workflow() -> Workflow:
+    workflow = Workflow()
+    workflow.add_node("start", PassthroughNode("start"))
+    workflow.add_node("node1", PassthroughNode("node1"))
+    workflow.add_node("end", PassthroughNode("end"))
+    workflow.connect("start", "node1")
+    workflow.connect("node1", "end")
+    return workflow
+
+def test_content_is_escaped():
+    workflow = build_workflow()
+    workflow.run("<script>alert('x')</script>")
+    report = workflow.tracer.generate_report_as_html()
+    assert "<script>alert" not in report
+    assert "&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt;" in report
+
+def test_large_payload_is_written_once(tmp_path):
+    workflow = build_workflow()
+    page = "<p>" + "venice " * 10000 + "</p>"
+    workflow.run(page)
+    filename = str(tmp_path / "report.html")
+    workflow.save_trace_report(filename)
+
+    with open(filename, "r", encoding="utf-8") as file:
+        report = file.read()
+    with open(filename + ".payloads.js", "r", encoding="utf-8") as file:
+        payloads = file.read()
+    # the same page is the input and output of the 3 nodes
+    assert payloads.count("venice venice") > 0
+    assert payloads.count('"1": ') == 1 and '"2": ' not in payloads
+    assert report.count("Show More (total 70007 chars)") == 6
+    assert len(report) < len(page)
+    assert 'data-payloads="report.html.payloads.js"' in report
+
+def test_embedded_payloads_cannot_close_the_script():
+    workflow = build_workflow()
+    workflow.run("</script>" * 1000)
+    report = workflow.tracer.generate_report_as_html()
+    assert report.count("</script>") == report.count("<script>")
+
+def test_timeline_and_critical_path():
+    workflow = build_workflow()
+    workflow.run("hello")
+    report = TraceReportWriter(workflow.tracer, workflow.connections).to_html()
+    assert report.count('class="timeline-row"') == 3
+    assert report.count('class="bar critical"') == 3
+    assert "<h2>Critical Path" in report
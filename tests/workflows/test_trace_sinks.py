@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from workflows.nodes.abstract_node import AbstractNode
+from workflows.nodes.passthrough_node import PassthroughNode
+from workflows.trace_sinks import JsonlTraceSink, OtlpSpanExporter, read_jsonl_spans
+from workflows.workflow import Workflow
+from workflows.workflow_tracer import TRACE_TIMINGS
+
+# Node with a fake worker, logs one worker execution per run
+class FakeWorkerNode(AbstractNode):
+    def start_impl(self):
+        pass
+
+    def run_impl(self, input_text: str) -> str:
+        start_ns = time.perf_counter_ns()
+        self.result = input_text.upper()
+        self.tracer.log_worker(self.node_id, "fake_worker", input_text, self.result, None, None, start_ns)
+        return self.result
+
+    def stop_impl(self) -> str:
+        return self.result
+
+class FailingNode(PassthroughNode):
+    def run_impl(self, input_text: str) -> str:
+        raise RuntimeError("boom")
+
+# Local OTLP collector that keeps the received requests
+@pytest.fixture
+def collector():
+    received = []
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, json.loads(body)))
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/traces", received
+    server.shutdown()
+    server.server_close()
+
+def build_workflow(sink, fail: bool = False) -> Workflow:
+    workflow = Workflow(trace_level=TRACE_TIMINGS, trace_sinks=[sink])
+    workflow.add_node("start", PassthroughNode("start"))
+    workflow.add_node("upper", FailingNode("upper") if fail else FakeWorkerNode("upper"))
+    workflow.connect("start", "upper")
+    return workflow
+
+def test_jsonl_spans_have_parent_links(tmp_path):
+    filename = str(tmp_path / "spans.jsonl")
+    sink = JsonlTraceSink(filename)
+    assert build_workflow(sink).run("hello") == "HELLO"
+    sink.close()
+
+    spans = {span.name: span for span in read_jsonl_spans(filename)}
+    assert set(spans) == {"workflow", "start", "upper", "fake_worker"}
+    assert len({span.trace_id for span in spans.values()}) == 1
+    assert spans["workflow"].parent_span_id is None
+    assert spans["start"].parent_span_id == spans["workflow"].span_id
+    assert spans["fake_worker"].parent_span_id == spans["upper"].span_id
+    assert spans["fake_worker"].kind == "worker"
+    assert spans["upper"].start_time_ns <= spans["fake_worker"].start_time_ns <= spans["fake_worker"].end_time_ns
+    assert spans["workflow"].end_time_ns >= spans["upper"].end_time_ns
+
+def test_jsonl_records_starts_before_a_crash(tmp_path):
+    filename = str(tmp_path / "spans.jsonl")
+    sink = JsonlTraceSink(filename)
+    with pytest.raises(RuntimeError):
+        build_workflow(sink, fail=True).run("hello")
+    with open(filename, "r", encoding="utf-8") as file:
+        records = [json.loads(line) for line in file]
+    assert [record["name"] for record in records if record["event"] == "start"] == ["workflow", "start", "upper"]
+    spans = {span.name: span for span in read_jsonl_spans(filename)}
+    assert spans["workflow"].error == "boom"
+    assert spans["upper"].error == "boom"
+    sink.close()
+
+def test_otlp_exporter_sends_spans_to_collector(collector):
+    endpoint, received = collector
+    exporter = OtlpSpanExporter(endpoint, service_name="test", batch_size=2)
+    build_workflow(exporter).run("hello")
+    exporter.close()
+
+    assert all(path == "/v1/traces" for path, _ in received)
+    spans = [span for _, body in received
+             for resource_spans in body["resourceSpans"]
+             for scope_spans in resource_spans["scopeSpans"]
+             for span in scope_spans["spans"]]
+    assert exporter.exported_spans == 4 and exporter.dropped_spans == 0
+    by_name = {span["name"]: span for span in spans}
+    assert by_name["fake_worker"]["parentSpanId"] == by_name["upper"]["spanId"]
+    assert by_name["fake_worker"]["kind"] == OtlpSpanExporter.SPAN_KIND_CLIENT
+    assert "parentSpanId" not in by_name["workflow"]
+    assert len(by_name["upper"]["traceId"]) == 32 and len(by_name["upper"]["spanId"]) == 16
+    assert int(by_name["upper"]["endTimeUnixNano"]) >= int(by_name["upper"]["startTimeUnixNano"])
+    attributes = {attribute["key"]: attribute["value"] for attribute in by_name["upper"]["attributes"]}
+    assert attributes["node.cache_hit"] == {"boolValue": False}
+    assert attributes["node.runs"] == {"intValue": "1"}
+
+def test_otlp_exporter_drops_spans_when_collector_is_down():
+    exporter = OtlpSpanExporter("http://127.0.0.1:9/v1/traces", timeout=1.0)
+    assert build_workflow(exporter).run("hello") == "HELLO"
+    exporter.close()
+    assert exporter.dropped_spans == 4
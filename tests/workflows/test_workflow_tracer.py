@@ -0,0 +1,109 @@
+import time
+import tracemalloc
+import pytest
+from workflows.metrics import MetricsRegistry
+from workflows.nodes.abstract_node import AbstractNode
+from workflows.workflow import Workflow
+from workflows.workflow_tracer import WorkflowTracer, PayloadDigest, TRACE_OFF, TRACE_TIMINGS, TRACE_SAMPLED, TRACE_FULL
+
+def trace_node(tracer: WorkflowTracer, node_id: str = "node", payload: str = "x" * 5000):
+    tracer.start_trace(node_id)
+    tracer.record_input(node_id, payload)
+    start_ns = time.perf_counter_ns()
+    time.sleep(0.01)
+    tracer.log_worker(node_id, "worker", payload, "output", "prompt", "system prompt", start_ns)
+    tracer.record_output(node_id, payload, cache_hit=False)
+    tracer.stop_trace(node_id)
+
+def test_full_level_keeps_payloads():
+    tracer = WorkflowTracer(TRACE_FULL)
+    payload = "x" * 5000
+    trace_node(tracer, payload=payload)
+    trace = tracer.get_node_trace("node")
+    assert trace.input_data[0] is payload
+    assert trace.output_data is payload
+    assert trace.worker_executions[0].worker_prompt == "prompt"
+
+def test_timings_level_records_durations_only():
+    tracer = WorkflowTracer(TRACE_TIMINGS)
+    trace_node(tracer)
+    trace = tracer.get_node_trace("node")
+    assert trace.input_data == [] and trace.output_data is None
+    worker_execution = trace.worker_executions[0]
+    assert worker_execution.worker_input is None and worker_execution.worker_prompt is None
+    assert worker_execution.duration_ns >= 10_000_000
+    assert tracer.get_execution_time("node") >= 0.01
+    assert trace.end_time >= trace.start_time
+
+def test_off_level_records_nothing():
+    tracer = WorkflowTracer(TRACE_OFF)
+    trace_node(tracer)
+    assert tracer.get_all_traces() == {}
+    assert tracer.get_execution_time("node") is None
+
+def test_sampled_level_keeps_digests():
+    tracer = WorkflowTracer(TRACE_SAMPLED, sample_rate=1.0, preview_size=10)
+    trace_node(tracer, payload="hello world " * 100)
+    trace = tracer.get_node_trace("node")
+    digest = trace.input_data[0]
+    assert isinstance(digest, PayloadDigest)
+    assert digest.length == 1200 and digest.preview == "hello worl"
+    assert digest == PayloadDigest.from_payload("hello world " * 100, 10)
+    assert "1200 chars" in str(trace.worker_executions[0].worker_input)
+
+def test_sample_rate():
+    tracer = WorkflowTracer(TRACE_SAMPLED, sample_rate=0.5, seed=1)
+    for i in range(200):
+        trace_node(tracer, f"node{i}", "payload")
+    sampled = sum(1 for trace in tracer.get_all_traces().values() if trace.input_data)
+    assert 60 < sampled < 140
+    assert all(trace.duration_ns is not None for trace in tracer.get_all_traces().values())
+
+def test_report_with_digests():
+    tracer = WorkflowTracer(TRACE_SAMPLED, sample_rate=1.0)
+    trace_node(tracer)
+    report = tracer.generate_report_as_html()
+    assert "5000 chars" in report and "Duration:" in report
+
+def test_invalid_level():
+    with pytest.raises(ValueError):
+        WorkflowTracer("verbose")
+
+class AllocatingNode(AbstractNode):
+    def start_impl(self):
+        pass
+
+    def run_impl(self, input_text: str) -> str:
+        temporary = [bytearray(1024) for _ in range(4000)] # ~4 MB freed before the end of the run
+        del temporary
+        self.result = "x" * 2_000_000 # kept
+        return self.result
+
+    def stop_impl(self) -> str:
+        return self.result
+
+def test_memory_profile_records_the_node_runs():
+    MetricsRegistry.reset()
+    MetricsRegistry.enable()
+    try:
+        workflow = Workflow(trace_memory=True)
+        workflow.add_node("allocating", AllocatingNode("allocating"))
+        workflow.run("venice")
+    finally:
+        MetricsRegistry.disable()
+    memory = workflow.tracer.get_node_trace("allocating").memory[0]
+    assert memory.peak_bytes > 4_000_000
+    # the result is still allocated, the temporary list is not
+    assert memory.allocation_sites[0].location.endswith("test_workflow_tracer.py:" + str(AllocatingNode.run_impl.__code__.co_firstlineno + 3))
+    assert memory.allocation_sites[0].size_bytes >= 2_000_000
+    assert memory.max_rss_bytes > 0
+    assert not tracemalloc.is_tracing()
+    assert MetricsRegistry.histogram("workflow_node_memory_peak_bytes").get_count(node="allocating") == 1
+    assert "<h2>Memory</h2>" in workflow.tracer.generate_report_as_html()
+
+def test_memory_profile_is_off_by_default():
+    workflow = Workflow()
+    workflow.add_node("allocating", AllocatingNode("allocating"))
+    workflow.run("venice")
+    assert workflow.tracer.get_node_trace("allocating").memory == []
+    assert "<h2>Memory</h2>" not in workflow.tracer.generate_report_as_html()
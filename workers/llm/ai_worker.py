@@ -1,5 +1,7 @@
+import time
 from abc import ABC, abstractmethod
 from pydantic import BaseModel
+from workflows.metrics import MetricsRegistry
 
 class AIWorker(ABC):
     """Base class for AI workers that process text input and produce text output."""
@@ -12,11 +14,44 @@ class AIWorker(ABC):
             name (str): The name of the worker
         """
         self._name = name
+        self.usage = None # token usage of the last response, see set_usage()
 
-    @abstractmethod
     def generate_response(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
         """
-        Process the input text and return the predicted output.
+        Process the input text and return the predicted output, and record the request metrics when they are enabled.
+        
+        Args:
+            prompt (str): The llm prompt
+            system_prompt (str): The system prompt
+            output_format (str): The output format (e.g. json)
+            response_model (BaseModel): The response model for structured output
+            
+        Returns:
+            str: The llm response
+        """
+        self.usage = None
+        if not MetricsRegistry.enabled:
+            return self.generate_response_impl(prompt, system_prompt, output_format, response_model, **kwargs)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = self.generate_response_impl(prompt, system_prompt, output_format, response_model, **kwargs)
+            if response is not None:
+                status = "ok"
+            return response
+        finally:
+            model = getattr(self, "model_name", None) or self.name
+            MetricsRegistry.counter("ai_worker_requests_total", "LLM requests").inc(model=model, status=status)
+            MetricsRegistry.histogram("ai_worker_request_seconds", "LLM request latency").observe(time.perf_counter() - start, model=model)
+            if self.usage:
+                tokens = MetricsRegistry.counter("ai_worker_tokens_total", "LLM tokens")
+                tokens.inc(self.usage["prompt_tokens"], model=model, type="prompt")
+                tokens.inc(self.usage["completion_tokens"], model=model, type="completion")
+
+    @abstractmethod
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+        """
+        Process the input text and return the predicted output. Implemented by the workers.
         
         Args:
             prompt (str): The llm prompt
@@ -39,6 +74,32 @@ class AIWorker(ABC):
         """
         pass
 
+    def set_usage(self, prompt_tokens: int, completion_tokens: int, generation_seconds: float = None) -> None:
+        """
+        Record the token usage returned by the provider for the last response.
+        
+        Args:
+            prompt_tokens (int): The input tokens
+            completion_tokens (int): The output tokens
+            generation_seconds (float): The generation time measured by the provider, when it returns it
+        """
+        self.usage = {
+            "model": getattr(self, "model_name", None) or self.name,
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+        }
+        if generation_seconds:
+            self.usage["generation_seconds"] = generation_seconds
+
+    def get_usage(self) -> dict:
+        """
+        Get the token usage of the last response.
+        
+        Returns:
+            dict: {"model": "model name", "prompt_tokens": 10, "completion_tokens": 20}, None if the provider didn't return it
+        """
+        return self.usage
+
     @property
     def name(self) -> str:
         """
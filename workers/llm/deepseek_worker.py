@@ -21,7 +21,7 @@ class DeepSeekWorker(AIWorker):
         self.structured_client = instructor.from_openai(self.client)
 
     #@override
-    def generate_response(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
         print("Using DeepSeek with OpenAI client")
         # If instructions are provided, replace the placeholder from instructions with the prompt
         if self.instructions:
@@ -48,12 +48,13 @@ class DeepSeekWorker(AIWorker):
 
         print(f"response_model: {response_model}")
         if response_model:
-            response_obj = self.structured_client.chat.completions.create(
+            response_obj, completion = self.structured_client.chat.completions.create_with_completion(
                 model=self.model_name,
                 messages=messages,
                 stream=False,
                 response_model=response_model
             )
+            self._set_usage_from_completion(completion)
             # Convert object to json
             response_json = response_obj.json()
             print(f"response_json: {response_json}")
@@ -65,8 +66,14 @@ class DeepSeekWorker(AIWorker):
                 stream=False
             )
 
+        self._set_usage_from_completion(response)
         return response.choices[0].message.content # return the text response
 
+    def _set_usage_from_completion(self, completion):
+        usage = getattr(completion, "usage", None)
+        if usage:
+            self.set_usage(usage.prompt_tokens, usage.completion_tokens)
+
     #@override
     def get_worker_prompts(self) -> dict:
         return {"prompt": self.prompt, "system_prompt": self.system_prompt}
@@ -21,7 +21,7 @@ class GeminiWorker(AIWorker):
         self.client = genai.Client(api_key=api_key)
 
     #@override
-    def generate_response(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
         print("Using Gemini client")
         # If instructions are provided, replace the placeholder from instructions with the prompt
         if self.instructions:
@@ -46,6 +46,9 @@ class GeminiWorker(AIWorker):
                         contents=prompt
                 )
         print(f"response: {response.text}")
+        usage = response.usage_metadata
+        if usage:
+            self.set_usage(usage.prompt_token_count, usage.candidates_token_count)
         return response.text
     
     #@override
@@ -20,7 +20,7 @@ class MistralWorker(AIWorker):
         self.client= Mistral(api_key=api_key)
 
     #@override
-    def generate_response(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
         print("Using Mistral client")
         # If instructions are provided, replace the placeholder from instructions with the prompt
         if self.instructions:
@@ -57,6 +57,8 @@ class MistralWorker(AIWorker):
                 messages = messages,
             )
 
+        if chat_response.usage:
+            self.set_usage(chat_response.usage.prompt_tokens, chat_response.usage.completion_tokens)
         return chat_response.choices[0].message.content
 
     #@override
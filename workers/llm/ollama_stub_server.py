@@ -0,0 +1,126 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+import numpy as np
+import requests
+
+# In-process HTTP server with the Ollama API used by the OllamaWorker in url mode (use_lib False), to test and benchmark
+# the RAG workflows without models: /api/embeddings returns a deterministic embedding of the prompt and /api/generate
+# a canned answer with the token counts of a real response. Each request is delayed by the latency of its endpoint
+# The embeddings hash the words of the text (feature hashing), so texts sharing words are close like with a real model
+WORD_PATTERN = re.compile(r"\w+")
+
+def hash_embedding(text: str, dim: int = 256) -> List[float]:
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in WORD_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dim] += 1.0 if (value >> 63) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector.tolist()
+
+class OllamaStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dim: int = 256, embedding_latency_ms: float = 0.0,
+                 generate_latency_ms: float = 0.0, response_size: int = 400):
+        self.dim = dim
+        self.embedding_latency_ms = embedding_latency_ms
+        self.generate_latency_ms = generate_latency_ms
+        self.response_size = response_size
+        self.lock = threading.Lock()
+        self.requests = {"embeddings": 0, "generate": 0}
+        self.server = ThreadingHTTPServer((host, port), self._create_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStubServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, name="ollama_stub_server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _count(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def embeddings(self, request: dict) -> dict:
+        self._count("embeddings")
+        time.sleep(self.embedding_latency_ms / 1000.0)
+        return {"embedding": hash_embedding(request.get("prompt", ""), self.dim)}
+
+    # The answer repeats the start of the prompt, so that the response changes with the retrieved context
+    def generate(self, request: dict) -> dict:
+        self._count("generate")
+        start_ns = time.perf_counter_ns()
+        time.sleep(self.generate_latency_ms / 1000.0)
+        prompt = request.get("prompt", "")
+        words = WORD_PATTERN.findall(prompt)
+        response = ("Answer: " + " ".join(words))[:self.response_size]
+        return {
+            "model": request.get("model"),
+            "response": response,
+            "done": True,
+            "prompt_eval_count": len(words) + 1,
+            "eval_count": len(WORD_PATTERN.findall(response)) + 1,
+            "eval_duration": time.perf_counter_ns() - start_ns,
+        }
+
+    def _create_handler(self):
+        stub_server = self
+        endpoints = {"/api/embeddings": stub_server.embeddings, "/api/generate": stub_server.generate}
+
+        class OllamaHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                endpoint = endpoints.get(self.path.split("?", 1)[0])
+                if endpoint is None:
+                    self._send(404, {"error": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send(400, {"error": "invalid json"})
+                    return
+                self._send(200, endpoint(request))
+
+            def _send(self, status: int, result: dict):
+                body = json.dumps(result).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return OllamaHandler
+
+def main():
+    with OllamaStubServer(dim=8, generate_latency_ms=20) as server:
+        print(requests.post(server.base_url + "/api/embeddings", json={"model": "stub", "prompt": "How are you?"}).json())
+        print(requests.post(server.base_url + "/api/generate", json={"model": "stub", "prompt": "How are you?", "stream": False}).json())
+
+if __name__ == "__main__":
+    main()
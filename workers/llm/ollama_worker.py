@@ -20,7 +20,7 @@ class OllamaWorker(AIWorker):
 
     # Generates a response using the Ollama library or server url
     #@override
-    def generate_response(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
+    def generate_response_impl(self, prompt: str, system_prompt: str = None, output_format: str = None, response_model: BaseModel = None, **kwargs) -> str:
         # If instructions are provided, replace the placeholder from instructions with the prompt
         if self.instructions:
             # replace {input_text} from instructions with the prompt
@@ -66,13 +66,14 @@ class OllamaWorker(AIWorker):
                 response: ChatResponse = chat(model=self.model_name, messages=messages, format=response_model.model_json_schema())
             else:
                 response: ChatResponse = chat(model=self.model_name, messages=messages)
+            self.set_usage(response.prompt_eval_count, response.eval_count, (response.eval_duration or 0) / 1e9)
             return response["message"]["content"]
         except Exception as e:
             print(f"Error generating prediction: {e}")
             return None
 
     # Generates a response using the Ollama server url
-    def _generate_response_with_url(self, prompt: str, system_prompt: str, output_format: str) -> str:
+    def _generate_response_with_url(self, prompt: str, system_prompt: str, output_format: str, response_model: BaseModel = None) -> str:
         print("Using Ollama url")
         headers = {'Content-Type': 'application/json'}
         data: Dict[Any, Any] = {
@@ -83,11 +84,15 @@ class OllamaWorker(AIWorker):
         
         if system_prompt:
             data['system'] = system_prompt
+        # same structured output as the client
+        if response_model:
+            data['format'] = response_model.model_json_schema()
 
         try:
             response = requests.post(f"{self.base_url}/api/generate", json=data, headers=headers)
             response.raise_for_status()
             result = response.json()
+            self.set_usage(result.get('prompt_eval_count'), result.get('eval_count'), (result.get('eval_duration') or 0) / 1e9)
             return result.get('response', '')
         except requests.RequestException as e:
             raise Exception(f"Failed to communicate with Ollama: {str(e)}")
@@ -0,0 +1,119 @@
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import List
+from workers.storage.vector_db_worker import VectorDbWorker
+
+# Lexical search with a BM25 inverted index, built next to the vector database during indexing
+# https://en.wikipedia.org/wiki/Okapi_BM25
+# The chunk ids are the same as the ones of the vector database workers (VectorDbWorker.build_id) so the results can be fused
+# When uri is set the index is loaded from <uri>/<collection_name>.bm25.json and saved by flush()
+class BM25IndexWorker:
+    TOKEN_PATTERN = re.compile(r"\w+")
+    STOP_WORDS = frozenset(["a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in", "is", "it",
+                            "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which", "who", "with", "you"])
+
+    def __init__(self, uri: str = None, collection_name: str = "collection", k1: float = 1.5, b: float = 0.75):
+        self.uri = uri
+        self.collection_name = collection_name
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self.lengths = [] # number of tokens of each document, 0 for the removed ones
+        self.postings = {} # term -> {row: term frequency}
+        self.id_to_row = {}
+        self.total_length = 0
+        self._load()
+
+    # Same arguments as VectorDbWorker.add_vectors without the embeddings
+    def add_documents(self, documents: List[str], metadatas: List[dict] = None, ids: List[str] = None):
+        if metadatas is None:
+            metadatas = [None] * len(documents)
+        if ids is None:
+            ids = [VectorDbWorker.build_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        assert len(metadatas) == len(documents) and len(ids) == len(documents)
+
+        for document, metadata, document_id in zip(documents, metadatas, ids):
+            row = self.id_to_row.get(document_id)
+            if row is None:
+                row = len(self.ids)
+                self.id_to_row[document_id] = row
+                self.ids.append(document_id)
+                self.documents.append(None)
+                self.metadatas.append(None)
+                self.lengths.append(0)
+            else: # upsert, remove the previous postings
+                for term in set(self.tokenize(self.documents[row])):
+                    self.postings[term].pop(row, None)
+                self.total_length -= self.lengths[row]
+
+            term_counts = Counter(self.tokenize(document))
+            for term, count in term_counts.items():
+                self.postings.setdefault(term, {})[row] = count
+            self.documents[row] = document
+            self.metadatas[row] = metadata
+            self.lengths[row] = sum(term_counts.values())
+            self.total_length += self.lengths[row]
+
+    # Returns {"ids": [[...] per query], "documents": [[...]], "metadatas": [[...]], "scores": [[...]]} sorted by score descending
+    def search(self, queries: List[str], results: int = 5) -> dict:
+        response = {"ids": [], "documents": [], "metadatas": [], "scores": []}
+        number_of_documents = len(self.id_to_row)
+        average_length = self.total_length / number_of_documents if number_of_documents else 0
+        for query in queries:
+            scores = {}
+            for term in set(self.tokenize(query)):
+                term_postings = self.postings.get(term)
+                if not term_postings:
+                    continue
+                idf = math.log(1 + (number_of_documents - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for row, frequency in term_postings.items():
+                    length_norm = self.k1 * (1 - self.b + self.b * self.lengths[row] / average_length)
+                    scores[row] = scores.get(row, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+            best = heapq.nlargest(results, scores.items(), key=lambda item: item[1])
+            response["ids"].append([self.ids[row] for row, _ in best])
+            response["documents"].append([self.documents[row] for row, _ in best])
+            response["metadatas"].append([self.metadatas[row] for row, _ in best])
+            response["scores"].append([score for _, score in best])
+        return response
+
+    def tokenize(self, text: str) -> List[str]:
+        return [token for token in self.TOKEN_PATTERN.findall(text.lower()) if token not in self.STOP_WORDS]
+
+    def flush(self):
+        if not self.uri:
+            return
+        os.makedirs(self.uri, exist_ok=True)
+        index = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }
+        with open(self._file(), "w", encoding="utf-8") as file:
+            json.dump(index, file)
+
+    def _file(self) -> str:
+        return os.path.join(self.uri, self.collection_name + ".bm25.json")
+
+    # The postings are rebuilt from the documents, it is faster than parsing them from json
+    def _load(self):
+        if not self.uri or not os.path.exists(self._file()):
+            return
+        with open(self._file(), "r", encoding="utf-8") as file:
+            index = json.load(file)
+        self.add_documents(index["documents"], index["metadatas"], index["ids"])
+
+def main():
+    worker = BM25IndexWorker()
+    worker.add_documents(["Pizza dough needs flour, salt, water and yeast", "Pasta is made with flour and eggs", "Rome is the capital of Italy"])
+    print(worker.search(["flour yeast", "capital of Italy"], 2))
+
+if __name__ == "__main__":
+    main()
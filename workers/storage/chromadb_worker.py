@@ -1,35 +1,78 @@
 from typing import List
 import chromadb
+from workers.storage.vector_db_worker import VectorDbWorker
 
-class ChromaDbWorker():
-    def __init__(self, uri: str, collection_name: str):
+class ChromaDbWorker(VectorDbWorker):
+    def __init__(self, uri: str, collection_name: str, batch_size: int = 1000):
         self.uri = uri
         self.collection_name = collection_name
         self.client = chromadb.PersistentClient(path=uri)
         self.collection = self.client.get_or_create_collection(name=collection_name)
+        # Chroma rejects writes larger than the max batch size of the client
+        self.batch_size = min(batch_size, self.client.get_max_batch_size())
 
-    # TODO add metadata (ex. document and position) and ids    
-    def add_vectors(self, documents: List[str], embeddings: List[List[float]]):
+    # Upserts the vectors in batches of batch_size so a write is never larger than what Chroma accepts
+    # metadatas: optional list of dicts, ex. {"doc_location": "file1.txt", "text_location_in_doc": 0}
+    # ids: optional list of ids, by default the ids are derived from the document and metadata so re-indexing the same chunk overwrites it
+    def add_vectors(self, documents: List[str], embeddings: List[List[float]], metadatas: List[dict] = None, ids: List[str] = None):
         assert len(documents) == len(embeddings)
-        document_ids = []
-        for i in range(len(documents)):
-            document_ids.append(str(i))
+        if metadatas is None:
+            metadatas = [None] * len(documents)
+        assert len(metadatas) == len(documents)
+        metadatas = [self._clean_metadata(metadata) for metadata in metadatas]
+        if ids is None:
+            ids = [self.build_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        assert len(ids) == len(documents)
 
-        self.collection.add(
+        for start in range(0, len(documents), self.batch_size):
+            end = start + self.batch_size
+            self._upsert_batch(documents[start:end], embeddings[start:end], metadatas[start:end], ids[start:end])
+
+    def _upsert_batch(self, documents: List[str], embeddings: List[List[float]], metadatas: List[dict], ids: List[str]):
+        # Chroma fails if the same id is sent twice in one call, keep the last one
+        positions = {}
+        for i, document_id in enumerate(ids):
+            positions[document_id] = i
+        if len(positions) < len(ids):
+            indexes = sorted(positions.values())
+            documents = [documents[i] for i in indexes]
+            embeddings = [embeddings[i] for i in indexes]
+            metadatas = [metadatas[i] for i in indexes]
+            ids = [ids[i] for i in indexes]
+
+        self.collection.upsert(
             documents = documents,
             embeddings = embeddings,
-            ids = document_ids
+            metadatas = metadatas if any(metadatas) else None,
+            ids = ids
         )
 
-    # Finds the closest embeddings in the vector database
+    # Chroma only accepts non empty metadata with str, int, float or bool values
+    def _clean_metadata(self, metadata: dict) -> dict:
+        if not metadata:
+            return None
+        metadata = {key: value for key, value in metadata.items() if isinstance(value, (str, int, float, bool))}
+        return metadata if metadata else None
+
+    # Queries all the embeddings at once (in batches of batch_size) and returns only the requested fields
     # https://docs.trychroma.com/docs/querying-collections/query-and-get
-    def find_closest_embeddings(self, query_embeddings: List[List[float]], results: int = 5):
-        results = self.collection.query(
-            query_embeddings=query_embeddings,
-            n_results=results,
-            include=["embeddings", "documents"] # need to specify this so that the embeddings are also returned
-        )
-        return results["embeddings"], results["documents"]
+    # include: any of "documents", "embeddings", "distances", "metadatas", the ids are always returned
+    # Returns {"ids": [[...] per query], "<field>": [[...] per query]}
+    def query(self, query_embeddings: List[List[float]], results: int = 5, include: List[str] = None) -> dict:
+        if include is None:
+            include = ["documents"]
+        response = {"ids": []}
+        for field in include:
+            response[field] = []
+        for start in range(0, len(query_embeddings), self.batch_size):
+            batch_response = self.collection.query(
+                query_embeddings=query_embeddings[start:start + self.batch_size],
+                n_results=results,
+                include=include
+            )
+            for field in response:
+                response[field].extend(batch_response[field])
+        return response
 
 def main():
     documents = ["point1", "point2", "point3", "point4", "point5"]
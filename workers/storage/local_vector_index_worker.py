@@ -0,0 +1,316 @@
+import json
+import os
+from typing import List
+import numpy as np
+from workers.storage.vector_db_worker import VectorDbWorker
+from workers.storage.vector_math import METRIC_COSINE, METRIC_L2, normalize_rows, distances, top_k
+
+# In-process vector database with an IVF (inverted file) approximate nearest neighbour index, no server needed.
+# The vectors are stored in a float32 matrix that is memory mapped when the collection is opened, so opening a
+# large collection doesn't read it in memory. Until the collection has min_train_size vectors the search is exact.
+# Files in <uri>/<collection_name>:
+#   index.json     dimension, metric, committed sizes and number of IVF lists
+#   vectors.f32    float32 matrix with one row per chunk (normalised for the cosine metric)
+#   lists.i32      IVF list of each row, -1 for the rows added before the index was trained
+#   centroids.npy  IVF centroids
+#   rows.jsonl     id, metadata and position of the document text of each row
+#   documents.bin  utf-8 document texts
+# The files are append only: upserting an existing id appends a new row that hides the previous one.
+class LocalVectorIndexWorker(VectorDbWorker):
+    def __init__(self, uri: str, collection_name: str, metric: str = METRIC_COSINE, n_lists: int = None, n_probe: int = 8, min_train_size: int = 1024):
+        if metric not in (METRIC_COSINE, METRIC_L2):
+            raise ValueError(f"Unsupported metric: {metric}")
+        self.uri = uri
+        self.collection_name = collection_name
+        self.path = os.path.join(uri, collection_name)
+        self.metric = metric
+        self.n_lists = n_lists # default is sqrt of the number of vectors when the index is trained
+        self.n_probe = n_probe # number of IVF lists searched for each query
+        self.min_train_size = min_train_size
+
+        self.dim = None
+        self.count = 0 # committed rows, including the ones hidden by an upsert
+        self.documents_size = 0
+        self.rows_size = 0
+        self.row_ids = []
+        self.row_metadatas = []
+        self.row_documents = [] # (offset, length) in documents.bin
+        self.id_to_row = {}
+        self.centroids = None
+        self.vectors = None
+        self.row_lists = None
+        self.documents = None
+        self._lists_index = None # (row order sorted by list, list start positions), rebuilt on the next query after a write
+        self._live_rows = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def add_vectors(self, documents: List[str], embeddings: List[List[float]], metadatas: List[dict] = None, ids: List[str] = None):
+        assert len(documents) == len(embeddings)
+        if not documents:
+            return
+        if metadatas is None:
+            metadatas = [None] * len(documents)
+        if ids is None:
+            ids = [self.build_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        assert len(metadatas) == len(documents) and len(ids) == len(documents)
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}")
+        if self.metric == METRIC_COSINE:
+            vectors = normalize_rows(vectors)
+        if self.centroids is not None:
+            lists = self._assign_lists(vectors)
+        else:
+            lists = np.full(len(documents), -1, dtype=np.int32)
+
+        rows_text = []
+        documents_bytes = []
+        documents_offset = self.documents_size
+        for i, document in enumerate(documents):
+            document_bytes = document.encode("utf-8")
+            documents_bytes.append(document_bytes)
+            row = {"id": ids[i], "metadata": metadatas[i], "offset": documents_offset, "length": len(document_bytes)}
+            rows_text.append(json.dumps(row) + "\n")
+            self.row_ids.append(ids[i])
+            self.row_metadatas.append(metadatas[i])
+            self.row_documents.append((documents_offset, len(document_bytes)))
+            self.id_to_row[ids[i]] = self.count + i
+            documents_offset += len(document_bytes)
+        rows_bytes = "".join(rows_text).encode("utf-8")
+
+        self._close_matrices()
+        with open(self._file("vectors.f32"), "ab") as file:
+            file.write(vectors.tobytes())
+        with open(self._file("lists.i32"), "ab") as file:
+            file.write(lists.astype(np.int32).tobytes())
+        with open(self._file("documents.bin"), "ab") as file:
+            file.write(b"".join(documents_bytes))
+        with open(self._file("rows.jsonl"), "ab") as file:
+            file.write(rows_bytes)
+
+        # The write is committed when index.json has the new sizes
+        self.count += len(documents)
+        self.documents_size = documents_offset
+        self.rows_size += len(rows_bytes)
+        self._write_index_info()
+        self._open_matrices()
+
+        if self.centroids is None and len(self.id_to_row) >= self.min_train_size:
+            self.rebuild_index()
+
+    def query(self, query_embeddings: List[List[float]], results: int = 5, include: List[str] = None) -> dict:
+        if include is None:
+            include = ["documents"]
+        response = {"ids": []}
+        for field in include:
+            response[field] = []
+        if not query_embeddings:
+            return response
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.metric == METRIC_COSINE:
+            queries = normalize_rows(queries)
+
+        if self.count == 0:
+            closest_rows = [np.zeros(0, dtype=np.int64) for _ in range(len(queries))]
+            closest_distances = [np.zeros(0) for _ in range(len(queries))]
+        elif self.centroids is None:
+            closest_rows, closest_distances = self._exact_search(queries, results)
+        else:
+            closest_rows, closest_distances = self._ivf_search(queries, results)
+
+        for rows, row_distances in zip(closest_rows, closest_distances):
+            response["ids"].append([self.row_ids[row] for row in rows])
+            if "documents" in include:
+                response["documents"].append([self._read_document(row) for row in rows])
+            if "embeddings" in include:
+                response["embeddings"].append(np.array(self.vectors[rows]))
+            if "distances" in include:
+                response["distances"].append(row_distances.tolist())
+            if "metadatas" in include:
+                response["metadatas"].append([self.row_metadatas[row] for row in rows])
+        return response
+
+    # Trains the IVF centroids with k-means on a sample of the vectors and assigns every row to a list
+    def rebuild_index(self, n_lists: int = None, iterations: int = 10):
+        live_rows = self._get_live_rows()
+        if len(live_rows) == 0:
+            return
+        n_lists = n_lists or self.n_lists or int(np.sqrt(len(live_rows)))
+        n_lists = max(1, min(n_lists, len(live_rows)))
+        print(f"Training IVF index with {n_lists} lists on {len(live_rows)} vectors")
+
+        rng = np.random.default_rng(42)
+        sample_size = min(len(live_rows), max(n_lists * 64, 10000))
+        sample = np.array(self.vectors[np.sort(rng.choice(live_rows, sample_size, replace=False))])
+        self.centroids = self._train_centroids(sample, n_lists, iterations, rng)
+
+        lists = np.empty(self.count, dtype=np.int32)
+        block_size = 65536
+        for start in range(0, self.count, block_size):
+            lists[start:start + block_size] = self._assign_lists(self.vectors[start:start + block_size])
+
+        self._close_matrices()
+        lists.tofile(self._file("lists.i32.tmp"))
+        os.replace(self._file("lists.i32.tmp"), self._file("lists.i32"))
+        np.save(self._file("centroids.npy"), self.centroids)
+        self.n_lists = n_lists
+        self._write_index_info()
+        self._open_matrices()
+
+    def _exact_search(self, queries: np.ndarray, results: int):
+        live_rows = self._get_live_rows()
+        indexes, closest_distances = top_k(distances(self.vectors[live_rows], queries, self.metric), results)
+        return [live_rows[row_indexes] for row_indexes in indexes], list(closest_distances)
+
+    def _ivf_search(self, queries: np.ndarray, results: int):
+        order, starts = self._get_lists_index()
+        live = np.zeros(self.count, dtype=bool)
+        live[self._get_live_rows()] = True
+        probed_lists, _ = top_k(distances(self.centroids, queries, self.metric), self.n_probe)
+        # rows that were added before the index was trained are always searched (list -1 is at position 0)
+        untrained_rows = order[starts[0]:starts[1]]
+
+        closest_rows = []
+        closest_distances = []
+        for query, query_lists in zip(queries, probed_lists):
+            candidates = np.concatenate([untrained_rows] + [order[starts[list_id + 1]:starts[list_id + 2]] for list_id in query_lists])
+            candidates = np.sort(candidates[live[candidates]])
+            indexes, query_distances = top_k(distances(self.vectors[candidates], query[np.newaxis, :], self.metric), results)
+            closest_rows.append(candidates[indexes[0]])
+            closest_distances.append(query_distances[0])
+        return closest_rows, closest_distances
+
+    def _train_centroids(self, sample: np.ndarray, n_lists: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = self._nearest(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            non_empty = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+            centroids[non_empty] = sums / counts[non_empty, np.newaxis]
+            # move the empty lists to random vectors
+            if not non_empty.all():
+                centroids[~non_empty] = sample[rng.choice(len(sample), int((~non_empty).sum()), replace=False)]
+            if self.metric == METRIC_COSINE:
+                centroids = normalize_rows(centroids)
+        return centroids.astype(np.float32)
+
+    def _assign_lists(self, vectors: np.ndarray) -> np.ndarray:
+        return self._nearest(vectors, self.centroids).astype(np.int32)
+
+    def _nearest(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        nearest = np.empty(len(vectors), dtype=np.int64)
+        block_size = 16384
+        for start in range(0, len(vectors), block_size):
+            nearest[start:start + block_size] = np.argmin(distances(centroids, np.asarray(vectors[start:start + block_size]), self.metric), axis=1)
+        return nearest
+
+    def _get_live_rows(self) -> np.ndarray:
+        if self._live_rows is None:
+            self._live_rows = np.sort(np.fromiter(self.id_to_row.values(), dtype=np.int64, count=len(self.id_to_row)))
+        return self._live_rows
+
+    # Sorting the rows by list gives each list as a contiguous range of the order array
+    def _get_lists_index(self):
+        if self._lists_index is None:
+            order = np.argsort(self.row_lists, kind="stable")
+            starts = np.searchsorted(self.row_lists[order], np.arange(-1, self.n_lists + 1))
+            starts = np.append(starts, len(order))
+            self._lists_index = (order, starts)
+        return self._lists_index
+
+    def _read_document(self, row: int) -> str:
+        offset, length = self.row_documents[row]
+        if length == 0:
+            return ""
+        return bytes(self.documents[offset:offset + length]).decode("utf-8")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _write_index_info(self):
+        index_info = {
+            "dim": self.dim,
+            "metric": self.metric,
+            "count": self.count,
+            "documents_size": self.documents_size,
+            "rows_size": self.rows_size,
+            "n_lists": self.n_lists if self.centroids is not None else None,
+        }
+        with open(self._file("index.json.tmp"), "w", encoding="utf-8") as file:
+            json.dump(index_info, file)
+        os.replace(self._file("index.json.tmp"), self._file("index.json"))
+
+    def _load(self):
+        if not os.path.exists(self._file("index.json")):
+            return
+        with open(self._file("index.json"), "r", encoding="utf-8") as file:
+            index_info = json.load(file)
+        if index_info["metric"] != self.metric:
+            raise ValueError(f"Collection {self.collection_name} uses the {index_info['metric']} metric")
+        self.dim = index_info["dim"]
+        self.count = index_info["count"]
+        self.documents_size = index_info["documents_size"]
+        self.rows_size = index_info["rows_size"]
+
+        # Drop anything written after the last commit (ex. interrupted write)
+        if self.count > 0:
+            self._truncate("vectors.f32", self.count * self.dim * 4)
+            self._truncate("lists.i32", self.count * 4)
+            self._truncate("documents.bin", self.documents_size)
+            self._truncate("rows.jsonl", self.rows_size)
+
+        with open(self._file("rows.jsonl"), "r", encoding="utf-8") as file:
+            for row_index, line in enumerate(file):
+                row = json.loads(line)
+                self.row_ids.append(row["id"])
+                self.row_metadatas.append(row["metadata"])
+                self.row_documents.append((row["offset"], row["length"]))
+                self.id_to_row[row["id"]] = row_index
+
+        if index_info["n_lists"]:
+            self.n_lists = index_info["n_lists"]
+            self.centroids = np.load(self._file("centroids.npy"))
+        self._open_matrices()
+
+    def _truncate(self, name: str, size: int):
+        if os.path.getsize(self._file(name)) > size:
+            with open(self._file(name), "r+b") as file:
+                file.truncate(size)
+
+    def _open_matrices(self):
+        self._lists_index = None
+        self._live_rows = None
+        if self.count == 0:
+            return
+        self.vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        self.row_lists = np.memmap(self._file("lists.i32"), dtype=np.int32, mode="r", shape=(self.count,))
+        if self.documents_size > 0:
+            self.documents = np.memmap(self._file("documents.bin"), dtype=np.uint8, mode="r", shape=(self.documents_size,))
+
+    # Memory mapped files can't be replaced on Windows while they are open
+    def _close_matrices(self):
+        self.vectors = None
+        self.row_lists = None
+        self.documents = None
+
+def main():
+    documents = ["point1", "point2", "point3", "point4", "point5"]
+    embeddings = [[1,1], [2,2], [3,3], [4,4], [5,5]]
+    worker = LocalVectorIndexWorker(uri="./local_index_test.db", collection_name="test_collection", metric=METRIC_L2)
+    worker.add_vectors(documents, embeddings)
+
+    closest_embeddings, closest_texts = worker.find_closest_embeddings(query_embeddings=[[1,1]], results=2)
+    print("Closest embeddings:", closest_embeddings)
+    print("Closest texts:", closest_texts)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # https://milvus.io/docs/build-rag-with-milvus.md
 from pymilvus import MilvusClient
 from typing import List
+from workers.storage.vector_db_worker import VectorDbWorker
 
 # This doesn't work on Windows so it is not tested
 class MilvusDbWorker():
@@ -11,27 +12,69 @@ class MilvusDbWorker():
         if not self.milvus_client.has_collection(collection_name):
             self.milvus_client.create_collection(collection_name=collection_name, dimension=embeddings_dim, metric_type=metric_type)
         
-    def add_vectors(self, chunks: List[str], embeddings: List[List[float]]):
+    # Same interface as ChromaDbWorker.add_vectors: upserts in batches, ids default to a hash of the chunk and metadata
+    def add_vectors(self, chunks: List[str], embeddings: List[List[float]], metadatas: List[dict] = None, ids: List[int] = None, batch_size: int = 1000):
         assert len(chunks) == len(embeddings)
         data = []
         for i, chunk in enumerate(chunks):
             embedding = embeddings[i]
-            data.append({"id": i, "vector": embedding, "text": chunk})
+            metadata = metadatas[i] if metadatas and metadatas[i] else {}
+            # milvus ids are integers, the start of the id of the other workers
+            chunk_id = ids[i] if ids else int(VectorDbWorker.build_id(chunk, metadata)[:15], 16)
+            data.append({"id": chunk_id, "vector": embedding, "text": chunk, **metadata})
+            if len(data) >= batch_size:
+                self.milvus_client.upsert(collection_name=self.collection_name, data=data)
+                data = []
 
-        self.milvus_client.insert(collection_name=self.collection_name, data=data)
+        if data:
+            self.milvus_client.upsert(collection_name=self.collection_name, data=data)
 
     # Not tested
-    def find_closest_embeddings(self, query_embeddings: List[List[float]], results: int = 5):
+    def find_closest_embeddings(self, query_embeddings: List[List[float]], results: int = 5, output_fields: List[str] = None):
         search_params = {"metric_type": "IP", "params": {}}
         results = self.milvus_client.search(
             collection_name=self.collection_name, 
             data=query_embeddings, 
             limit=results, 
             search_params=search_params,
-            output_fields=["text"],
+            output_fields=output_fields if output_fields is not None else ["text"],
         )
         return results
 
+    # Same interface as ChromaDbWorker.query, only the requested fields are read from Milvus
+    # The metadata is stored in the dynamic fields of the collection, "*" returns them with the text and the vector
+    def query(self, query_embeddings: List[List[float]], results: int = 5, include: List[str] = None) -> dict:
+        if include is None:
+            include = ["documents"]
+        output_fields = []
+        if "metadatas" in include:
+            output_fields = ["*"]
+        else:
+            if "documents" in include:
+                output_fields.append("text")
+            if "embeddings" in include:
+                output_fields.append("vector")
+
+        search_results = self.find_closest_embeddings(query_embeddings, results, output_fields)
+        response = {"ids": []}
+        for field in include:
+            response[field] = []
+        for hits in search_results:
+            response["ids"].append([hit["id"] for hit in hits])
+            if "documents" in include:
+                response["documents"].append([hit["entity"]["text"] for hit in hits])
+            if "embeddings" in include:
+                response["embeddings"].append([hit["entity"]["vector"] for hit in hits])
+            if "distances" in include:
+                response["distances"].append([hit["distance"] for hit in hits])
+            if "metadatas" in include:
+                response["metadatas"].append([self._metadata(hit["entity"]) for hit in hits])
+        return response
+
+    def _metadata(self, entity: dict) -> dict:
+        metadata = {key: value for key, value in entity.items() if key not in ("id", "text", "vector")}
+        return metadata if metadata else None
+
 def main():
     chunks = ["point1", "point2", "point3", "point4", "point5"]
     embeddings = [[1,1], [2,2], [3,3], [4,4], [5,5]]
@@ -0,0 +1,189 @@
+import json
+import os
+from typing import List
+import numpy as np
+from workers.storage.vector_db_worker import VectorDbWorker
+from workers.storage.vector_math import METRIC_COSINE, METRIC_L2, normalize_rows, distances, top_k
+
+# Exact (brute force) vector search for small corpora (up to ~100k chunks), no index and no database server.
+# The embeddings are kept in one contiguous matrix and a batch of queries is answered with one matrix multiply
+# per block of rows plus argpartition, which is vectorised by numpy/BLAS.
+# dtype: "float32" (fastest), "float16" (half the memory) or "int8" (quarter of the memory, one scale per row)
+# When uri is set the collection is loaded from <uri>/<collection_name>.npz and saved by flush()
+class NumpyVectorWorker(VectorDbWorker):
+    DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+    def __init__(self, uri: str = None, collection_name: str = "collection", dtype: str = "float32", metric: str = METRIC_COSINE, block_size: int = 65536):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        if metric not in (METRIC_COSINE, METRIC_L2):
+            raise ValueError(f"Unsupported metric: {metric}")
+        self.uri = uri
+        self.collection_name = collection_name
+        self.dtype = dtype
+        self.metric = metric
+        self.block_size = block_size # rows scored at once, bounds the size of the distance matrix
+
+        self.count = 0
+        self.matrix = None # capacity x dim, only the first count rows are used
+        self.scales = None # int8 only, dequantised row = matrix row * scale
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self.id_to_row = {}
+        self._load()
+
+    def add_vectors(self, documents: List[str], embeddings: List[List[float]], metadatas: List[dict] = None, ids: List[str] = None):
+        assert len(documents) == len(embeddings)
+        if not documents:
+            return
+        if metadatas is None:
+            metadatas = [None] * len(documents)
+        if ids is None:
+            ids = [self.build_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        assert len(metadatas) == len(documents) and len(ids) == len(documents)
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        # checked before the ids and documents are updated, a failed call leaves the collection unchanged
+        if vectors.ndim != 2:
+            raise ValueError("Expected a list of embeddings of the same dimension")
+        if self.matrix is not None and vectors.shape[1] != self.matrix.shape[1]:
+            raise ValueError(f"Expected embeddings of dimension {self.matrix.shape[1]}, got {vectors.shape[1]}")
+        if self.metric == METRIC_COSINE:
+            vectors = normalize_rows(vectors)
+        quantized, scales = self._quantize(vectors)
+
+        rows = []
+        for i, vector_id in enumerate(ids):
+            row = self.id_to_row.get(vector_id)
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.id_to_row[vector_id] = row
+                self.ids.append(vector_id)
+                self.documents.append(documents[i])
+                self.metadatas.append(metadatas[i])
+            else: # upsert
+                self.documents[row] = documents[i]
+                self.metadatas[row] = metadatas[i]
+            rows.append(row)
+
+        self._reserve(self.count, vectors.shape[1])
+        self.matrix[rows] = quantized
+        if self.scales is not None:
+            self.scales[rows] = scales
+
+    def query(self, query_embeddings: List[List[float]], results: int = 5, include: List[str] = None) -> dict:
+        if include is None:
+            include = ["documents"]
+        response = {"ids": []}
+        for field in include:
+            response[field] = []
+        if not query_embeddings:
+            return response
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.metric == METRIC_COSINE:
+            queries = normalize_rows(queries)
+        closest_rows, closest_distances = self.search(queries, results)
+
+        for rows, row_distances in zip(closest_rows, closest_distances):
+            response["ids"].append([self.ids[row] for row in rows])
+            if "documents" in include:
+                response["documents"].append([self.documents[row] for row in rows])
+            if "embeddings" in include:
+                response["embeddings"].append(self._dequantize(rows))
+            if "distances" in include:
+                response["distances"].append(row_distances.tolist())
+            if "metadatas" in include:
+                response["metadatas"].append([self.metadatas[row] for row in rows])
+        return response
+
+    # Returns the (rows, distances) of the closest vectors for each query, sorted by distance
+    def search(self, queries: np.ndarray, results: int):
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_distances = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, self.count, self.block_size):
+            end = min(start + self.block_size, self.count)
+            block_rows, block_distances = top_k(distances(self._dequantize(slice(start, end)), queries, self.metric), results)
+            # merge the top results of the block with the best results so far
+            candidate_rows = np.concatenate([best_rows, block_rows + start], axis=1)
+            candidate_distances = np.concatenate([best_distances, block_distances], axis=1)
+            indexes, best_distances = top_k(candidate_distances, results)
+            best_rows = np.take_along_axis(candidate_rows, indexes, axis=1)
+        return best_rows, best_distances
+
+    # Saves the collection to <uri>/<collection_name>.npz and .json
+    def flush(self):
+        if not self.uri or self.count == 0:
+            return
+        os.makedirs(self.uri, exist_ok=True)
+        arrays = {"matrix": self.matrix[:self.count]}
+        if self.scales is not None:
+            arrays["scales"] = self.scales[:self.count]
+        np.savez(self._file(".npz"), **arrays)
+        with open(self._file(".json"), "w", encoding="utf-8") as file:
+            json.dump({"dtype": self.dtype, "metric": self.metric, "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, file)
+
+    def _quantize(self, vectors: np.ndarray):
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(vectors / scales[:, np.newaxis]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(self.DTYPES[self.dtype]), None
+
+    def _dequantize(self, rows) -> np.ndarray:
+        if self.dtype == "float32":
+            return self.matrix[rows]
+        if self.dtype == "float16":
+            return self.matrix[rows].astype(np.float32)
+        return self.matrix[rows].astype(np.float32) * self.scales[rows][:, np.newaxis]
+
+    # Grows the matrix by doubling its capacity so it stays contiguous without copying on every write
+    def _reserve(self, count: int, dim: int):
+        if self.matrix is None:
+            self.matrix = np.zeros((max(count, 1024), dim), dtype=self.DTYPES[self.dtype])
+            if self.dtype == "int8":
+                self.scales = np.ones(max(count, 1024), dtype=np.float32)
+            return
+        if count > len(self.matrix):
+            capacity = max(count, 2 * len(self.matrix))
+            matrix = np.zeros((capacity, dim), dtype=self.matrix.dtype)
+            matrix[:len(self.matrix)] = self.matrix
+            self.matrix = matrix
+            if self.scales is not None:
+                scales = np.ones(capacity, dtype=np.float32)
+                scales[:len(self.scales)] = self.scales
+                self.scales = scales
+
+    def _file(self, extension: str) -> str:
+        return os.path.join(self.uri, self.collection_name + extension)
+
+    def _load(self):
+        if not self.uri or not os.path.exists(self._file(".json")):
+            return
+        with open(self._file(".json"), "r", encoding="utf-8") as file:
+            collection = json.load(file)
+        if collection["dtype"] != self.dtype or collection["metric"] != self.metric:
+            raise ValueError(f"Collection {self.collection_name} was saved with dtype {collection['dtype']} and metric {collection['metric']}")
+        arrays = np.load(self._file(".npz"))
+        self.matrix = np.ascontiguousarray(arrays["matrix"])
+        self.scales = arrays["scales"] if "scales" in arrays else None
+        self.ids = collection["ids"]
+        self.documents = collection["documents"]
+        self.metadatas = collection["metadatas"]
+        self.count = len(self.ids)
+        self.id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+def main():
+    documents = ["point1", "point2", "point3", "point4", "point5"]
+    embeddings = [[1,1], [2,2], [3,3], [4,4], [5,5]]
+    worker = NumpyVectorWorker(metric=METRIC_L2)
+    worker.add_vectors(documents, embeddings)
+
+    closest_embeddings, closest_texts = worker.find_closest_embeddings(query_embeddings=[[1,1]], results=2)
+    print("Closest embeddings:", closest_embeddings)
+    print("Closest texts:", closest_texts)
+
+if __name__ == "__main__":
+    main()
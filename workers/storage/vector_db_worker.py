@@ -0,0 +1,63 @@
+import hashlib
+from abc import ABC, abstractmethod
+from typing import List
+
+class VectorDbWorker(ABC):
+    """Base class for vector databases used by the VectorDbWriterNode and VectorDbReaderNode"""
+
+    @abstractmethod
+    def add_vectors(self, documents: List[str], embeddings: List[List[float]], metadatas: List[dict] = None, ids: List[str] = None):
+        """
+        Upsert the documents and their embeddings.
+
+        Args:
+            documents (List[str]): The text of each chunk
+            embeddings (List[List[float]]): The embeddings of each chunk
+            metadatas (List[dict]): Optional metadata of each chunk, ex. {"doc_location": "file1.txt", "text_location_in_doc": 0}
+            ids (List[str]): Optional ids, by default they are derived from the document and metadata with build_id
+        """
+        pass
+
+    @abstractmethod
+    def query(self, query_embeddings: List[List[float]], results: int = 5, include: List[str] = None) -> dict:
+        """
+        Find the closest chunks for each query embedding.
+
+        Args:
+            query_embeddings (List[List[float]]): The query embeddings
+            results (int): The number of results for each query
+            include (List[str]): Any of "documents", "embeddings", "distances", "metadatas", by default ["documents"]
+
+        Returns:
+            dict: {"ids": [[...] per query], "<field>": [[...] per query]} for each included field
+        """
+        pass
+
+    def find_closest_embeddings(self, query_embeddings: List[List[float]], results: int = 5):
+        """
+        Find the closest embeddings and documents for each query embedding.
+
+        Returns:
+            tuple: (embeddings per query, documents per query)
+        """
+        response = self.query(query_embeddings, results, include=["embeddings", "documents"])
+        return response["embeddings"], response["documents"]
+
+    def flush(self):
+        """
+        Persist the pending writes, called when the writer node stops. Workers that write on every call don't need it.
+        """
+        pass
+
+    @classmethod
+    def build_id(cls, document: str, metadata: dict = None) -> str:
+        """
+        Build a stable id so that re-indexing the same chunk overwrites it.
+
+        Returns:
+            str: sha256 of the document location, the location in the document and the text
+        """
+        key = document
+        if metadata:
+            key = f"{metadata.get('doc_location')}_{metadata.get('text_location_in_doc')}_{document}"
+        return hashlib.sha256(key.encode("UTF-8")).hexdigest()
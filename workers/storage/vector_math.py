@@ -0,0 +1,39 @@
+import numpy as np
+
+# Vector helpers shared by the in-process vector databases
+# Distances follow the Chroma conventions so the workers are interchangeable:
+# "cosine" is 1 - cosine similarity (rows and queries are expected to be normalised), "l2" is the squared euclidean distance
+METRIC_COSINE = "cosine"
+METRIC_L2 = "l2"
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def distances(matrix: np.ndarray, queries: np.ndarray, metric: str = METRIC_COSINE) -> np.ndarray:
+    """Returns the (queries x rows) distance matrix computed with one matrix multiply"""
+    scores = queries @ matrix.T
+    if metric == METRIC_COSINE:
+        return 1.0 - scores
+    if metric == METRIC_L2:
+        row_norms = np.einsum("ij,ij->i", matrix, matrix)
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        return np.maximum(row_norms[np.newaxis, :] - 2.0 * scores + query_norms[:, np.newaxis], 0.0)
+    raise ValueError(f"Unsupported metric: {metric}")
+
+def top_k(distance_matrix: np.ndarray, k: int):
+    """Returns the (indexes, distances) of the k smallest distances of each row, sorted ascending"""
+    k = min(k, distance_matrix.shape[1])
+    if k == 0:
+        empty = np.zeros((distance_matrix.shape[0], 0))
+        return empty.astype(np.int64), empty
+    if k < distance_matrix.shape[1]:
+        # argpartition is O(n), only the k selected values need to be sorted
+        indexes = np.argpartition(distance_matrix, k - 1, axis=1)[:, :k]
+    else:
+        indexes = np.tile(np.arange(distance_matrix.shape[1]), (distance_matrix.shape[0], 1))
+    selected = np.take_along_axis(distance_matrix, indexes, axis=1)
+    order = np.argsort(selected, axis=1, kind="stable")
+    return np.take_along_axis(indexes, order, axis=1), np.take_along_axis(selected, order, axis=1)
@@ -0,0 +1,144 @@
+import re
+from typing import Callable, List
+import numpy as np
+from workers.text.token_counter import count_tokens, DEFAULT_CHARS_PER_TOKEN
+
+# Reduces a text (ex. a web page) to a token budget before it is sent to an LLM
+# - "truncate": keeps the beginning of the text
+# - "select": splits the text in sections and keeps the sections most relevant to the query (the LLM instructions)
+#   in their original order. The relevance is the keyword overlap, or scorer(query, sections) -> scores (ex. embedding_scorer)
+# - split() returns sections that fit the budget for map-reduce (done by the TextGenNode, which owns the LLM worker)
+class InputReducer:
+    STRATEGIES = ("truncate", "select", "map_reduce")
+    WORD_PATTERN = re.compile(r"\w+")
+    STOP_WORDS = frozenset(["a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "if", "in", "is", "it", "of", "on", "or",
+                            "the", "this", "that", "to", "with", "return", "result", "following", "should", "based", "input_text"])
+
+    def __init__(self, max_tokens: int, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, strategy: str = "select",
+                 section_tokens: int = 256, scorer: Callable[[str, List[str]], List[float]] = None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unsupported input reduction strategy: {strategy}")
+        assert max_tokens > 0, "max_tokens must be positive"
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.strategy = strategy
+        self.section_tokens = min(section_tokens, max_tokens)
+        self.scorer = scorer
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text, self.chars_per_token)
+
+    def fits(self, text: str) -> bool:
+        return self.count_tokens(text) <= self.max_tokens
+
+    def reduce(self, text: str, query: str = "") -> str:
+        if self.fits(text):
+            return text
+        if self.strategy == "truncate":
+            return self.truncate(text)
+        return self.select(text, query)
+
+    def truncate(self, text: str) -> str:
+        end = int(self.max_tokens * self.chars_per_token)
+        while end > 0 and not self.fits(text[:end]):
+            end = int(end * 0.9)
+        return text[:end]
+
+    def select(self, text: str, query: str) -> str:
+        sections = self._split_sections(text, self.section_tokens)
+        scores = self.scorer(query, sections) if self.scorer else self.keyword_scores(query, sections)
+        budget = self.max_tokens
+        selected = set()
+        # stable sort, the first sections of the page win ties
+        for i in sorted(range(len(sections)), key=lambda i: scores[i], reverse=True):
+            tokens = self.count_tokens(sections[i]) + 1
+            if tokens <= budget:
+                selected.add(i)
+                budget -= tokens
+        return "\n".join(sections[i] for i in sorted(selected))
+
+    # Sections of at most max_tokens, for map-reduce
+    def split(self, text: str) -> List[str]:
+        return self._split_sections(text, self.max_tokens)
+
+    # Sum of the query keywords found in the section, rare keywords of the text weigh more
+    def keyword_scores(self, query: str, sections: List[str]) -> List[float]:
+        keywords = set(self._words(query)) - self.STOP_WORDS
+        section_words = [set(self._words(section)) for section in sections]
+        if not keywords:
+            return [0.0] * len(sections)
+        weights = {}
+        for keyword in keywords:
+            frequency = sum(1 for words in section_words if keyword in words)
+            weights[keyword] = 1.0 / (1 + frequency)
+        return [sum(weights[keyword] for keyword in keywords if keyword in words) for words in section_words]
+
+    # Lower case words without the plural "s" so that "museums" matches "museum"
+    def _words(self, text: str) -> List[str]:
+        return [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+                for word in self.WORD_PATTERN.findall(text.lower())]
+
+    # Groups the lines (paragraphs of the extracted page) into sections of at most max_section_tokens, long lines are cut
+    def _split_sections(self, text: str, max_section_tokens: int) -> List[str]:
+        sections = []
+        current = []
+        current_tokens = 0
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            line_tokens = self.count_tokens(line)
+            if line_tokens > max_section_tokens:
+                pieces = self._cut(line, max_section_tokens)
+            else:
+                pieces = [line]
+            for piece in pieces:
+                piece_tokens = self.count_tokens(piece)
+                if current and current_tokens + piece_tokens + 1 > max_section_tokens:
+                    sections.append("\n".join(current))
+                    current = []
+                    current_tokens = 0
+                current.append(piece)
+                current_tokens += piece_tokens + 1
+        if current:
+            sections.append("\n".join(current))
+        return sections
+
+    # Cuts at a space near the character estimate of max_tokens, the text extracted from a page can be one long line
+    def _cut(self, line: str, max_tokens: int) -> List[str]:
+        pieces = []
+        max_chars = max(1, int(max_tokens * self.chars_per_token))
+        while line:
+            end = min(len(line), max_chars)
+            while end > 1 and self.count_tokens(line[:end]) > max_tokens:
+                end = int(end * 0.9)
+            if end < len(line):
+                space = line.rfind(" ", 0, end)
+                if space > end // 2:
+                    end = space
+            pieces.append(line[:end].strip())
+            line = line[end:].strip()
+        return [piece for piece in pieces if piece]
+
+# Scorer for InputReducer.select from an embeddings function, ex. OllamaWorker.generate_embeddings
+def embedding_scorer(generate_embeddings: Callable[[str], List[float]]) -> Callable[[str, List[str]], List[float]]:
+    def score(query: str, sections: List[str]) -> List[float]:
+        query_embeddings = np.asarray(generate_embeddings(query), dtype=np.float32)
+        section_embeddings = np.asarray([generate_embeddings(section) for section in sections], dtype=np.float32)
+        norms = np.linalg.norm(section_embeddings, axis=1) * np.linalg.norm(query_embeddings)
+        norms[norms == 0] = 1.0
+        return (section_embeddings @ query_embeddings / norms).tolist()
+    return score
+
+def main():
+    page = "\n".join([
+        "Home | Tours | Hotels | Login",
+        "St Mark's Basilica is the most famous church of Venice, with golden mosaics.",
+        "Subscribe to our newsletter to get the best deals.",
+        "The Doge's Palace is a museum and one of the main attractions of Venice.",
+    ])
+    reducer = InputReducer(max_tokens=45, section_tokens=20)
+    print(reducer.reduce(page, "Extract the most popular tourist attractions in Venice: museum, church, landmark"))
+
+if __name__ == "__main__":
+    main()
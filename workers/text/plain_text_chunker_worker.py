@@ -0,0 +1,98 @@
+import re
+from typing import List, Tuple
+
+# Splits plain text and markdown files into overlapping token windows without loading docling layout models.
+# Tokens are approximated with words and punctuation marks, which is close to what a wordpiece tokenizer
+# produces for English text, so keep max_chunk_size below the embedding model context (as for docling).
+# Output has the same format as the DocumentChunkerNode: [{"text": "heading: text", "text_location_in_doc": 0, "doc_location": file_path}]
+class PlainTextChunkerWorker:
+    TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+    HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+    FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+    MARKDOWN_EXTENSIONS = (".md", ".markdown")
+
+    def __init__(self, worker_name: str, max_chunk_size: int = 512, min_chunk_size: int = 256, overlap: int = 50):
+        assert max_chunk_size > overlap, "max_chunk_size must be larger than overlap"
+        self.worker_name = worker_name
+        self.max_chunk_size = max_chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.overlap = overlap
+
+    def chunk_file(self, file_path: str) -> List[dict]:
+        print(f"Chunking file (fast path): {file_path}")
+        with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+            text = file.read()
+        markdown = file_path.lower().endswith(self.MARKDOWN_EXTENSIONS)
+        chunks = self.chunk_text(text, file_path, markdown)
+        print(f"Number of chunks: {len(chunks)}")
+        return chunks
+
+    # text_location_in_doc is the character offset of the chunk in the file
+    def chunk_text(self, text: str, doc_location: str, markdown: bool = False) -> List[dict]:
+        sections = self._split_markdown_sections(text) if markdown else [([], 0, text)]
+        chunks = []
+        for headings, section_offset, section_text in sections:
+            heading_text = ". ".join(headings)
+            for start, end in self._token_windows(section_text):
+                chunk_text = section_text[start:end].strip()
+                if not chunk_text:
+                    continue
+                chunks.append({
+                    "text": ": ".join([heading_text, chunk_text]),
+                    "text_location_in_doc": section_offset + start,
+                    "doc_location": doc_location,
+                })
+        return chunks
+
+    # Returns the (start, end) character spans of windows of max_chunk_size tokens overlapping by overlap tokens
+    def _token_windows(self, text: str) -> List[Tuple[int, int]]:
+        spans = [match.span() for match in self.TOKEN_PATTERN.finditer(text)]
+        if not spans:
+            return []
+        if len(spans) <= self.max_chunk_size:
+            return [(spans[0][0], spans[-1][1])]
+
+        windows = []
+        step = self.max_chunk_size - self.overlap
+        start_token = 0
+        while start_token < len(spans):
+            end_token = min(start_token + self.max_chunk_size, len(spans))
+            # Don't leave a tail smaller than min_chunk_size, move the last window back instead
+            if end_token == len(spans) and end_token - start_token < self.min_chunk_size:
+                start_token = max(0, end_token - self.max_chunk_size)
+            windows.append((spans[start_token][0], spans[end_token - 1][1]))
+            if end_token == len(spans):
+                break
+            start_token += step
+        return windows
+
+    # Splits markdown into sections, each with the list of parent headings, the character offset and the text
+    def _split_markdown_sections(self, text: str) -> List[Tuple[List[str], int, str]]:
+        sections = []
+        headings = [] # stack of (level, heading)
+        section_start = 0
+        offset = 0
+        in_fence = False
+        for line in text.splitlines(keepends=True):
+            if self.FENCE_PATTERN.match(line):
+                in_fence = not in_fence
+            match = None if in_fence else self.HEADING_PATTERN.match(line.rstrip("\r\n"))
+            if match:
+                sections.append(([heading for _, heading in headings], section_start, text[section_start:offset]))
+                level = len(match.group(1))
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, match.group(2)))
+                section_start = offset + len(line)
+            offset += len(line)
+        sections.append(([heading for _, heading in headings], section_start, text[section_start:]))
+        return [section for section in sections if section[2].strip()]
+
+def main():
+    worker = PlainTextChunkerWorker("plain_text_chunker_worker", max_chunk_size=8, min_chunk_size=4, overlap=2)
+    text = "# Pizza\nFlour, water, salt and yeast.\n## Dough\nMix everything and let it rest for 24 hours in the fridge.\n"
+    for chunk in worker.chunk_text(text, "pizza.md", markdown=True):
+        print(chunk)
+
+if __name__ == "__main__":
+    main()
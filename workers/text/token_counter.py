@@ -0,0 +1,62 @@
+import re
+from typing import List
+
+# Fast token estimation without downloading the model tokenizers.
+# The LLM tokenizers (BPE/sentencepiece) produce about 4 characters per token for English text,
+# words and punctuation marks give a second estimate which is better for short texts and code.
+# The estimate is used for budgets, so it is rounded up.
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Context window (tokens) of the models used in the workflows, matched by prefix of the model name
+CONTEXT_WINDOWS = {
+    "gemini-2.0": 1048576,
+    "gemini-1.5": 1048576,
+    "mistral-large": 131072,
+    "mistral-small": 32768,
+    "deepseek-chat": 65536,
+    "deepseek-reasoner": 65536,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "mxbai-embed-large": 512,
+}
+
+# Characters per token of the tokenizers of each model provider for English text (mistral tekken and deepseek are denser)
+CHARS_PER_TOKEN = {
+    "gemini": 4.0,
+    "ollama": 3.8,
+    "mistral": 3.5,
+    "deepseek": 3.6,
+}
+
+def get_chars_per_token(model_provider: str) -> float:
+    return CHARS_PER_TOKEN.get(model_provider, DEFAULT_CHARS_PER_TOKEN)
+
+def count_tokens(text: str, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> int:
+    if not text:
+        return 0
+    by_chars = len(text) / chars_per_token
+    by_words = len(WORD_PATTERN.findall(text))
+    return int(max(by_chars, by_words * 0.75)) + 1
+
+def count_tokens_list(texts: List[str], chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> List[int]:
+    return [count_tokens(text, chars_per_token) for text in texts]
+
+# The longest matching prefix wins, ex. "llama3.2:1b" -> "llama3.2"
+def get_context_window(model_name: str) -> int:
+    if not model_name:
+        return DEFAULT_CONTEXT_WINDOW
+    best_prefix = None
+    for prefix in CONTEXT_WINDOWS:
+        if model_name.startswith(prefix) and (best_prefix is None or len(prefix) > len(best_prefix)):
+            best_prefix = prefix
+    return CONTEXT_WINDOWS[best_prefix] if best_prefix else DEFAULT_CONTEXT_WINDOW
+
+def main():
+    text = "What recipes can I make with flour, salt and yeast?"
+    print(f"{count_tokens(text)} tokens, context window of llama3.2:1b: {get_context_window('llama3.2:1b')}")
+
+if __name__ == "__main__":
+    main()
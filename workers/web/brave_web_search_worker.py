@@ -1,14 +1,35 @@
+import copy
 import json
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 import requests
 #from typing import override
 from workers.web.web_search_worker import WebSearchWorker
 from workflows.api_keys import brave_search_api_key
+from workflows.metrics import MetricsRegistry
 
 # Uses Brave Search API to perform web searches
+# The results are cached for cache_ttl seconds by (result_type, query, count) in a cache shared by all the workers of the process,
+# so the WebSearchNode and WebImageSearchNode instances don't pay twice for the same query. A query already being sent by
+# another thread waits for its response instead of sending it again. The expired entries are dropped when a query is cached
+# and at most cache_max_entries queries are kept, the least recently used ones are evicted first. The rate limit headers of the responses are kept in quota.
 class BraveWebSearchWorker(WebSearchWorker):
-    def __init__(self, worker_name: str, result_type: str = WebSearchWorker.RESULT_TYPE_WEB, api_key: str = None):
+    _cache = OrderedDict() # (result_type, query, count) -> (expiry time, results), least recently used first
+    cache_max_entries = 1000
+    _in_flight = {} # (result_type, query, count) -> Future of the results
+    _lock = threading.Lock()
+    stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+    # Brave returns the per second and per month values, ex. X-RateLimit-Remaining: 1, 14999
+    quota = {"limit": None, "remaining": None, "reset": None}
+
+    def __init__(self, worker_name: str, result_type: str = WebSearchWorker.RESULT_TYPE_WEB, api_key: str = None, cache_ttl: float = 3600):
         super().__init__(worker_name)
+        self.logger = logging.getLogger(__name__)
+        self.cache_ttl = cache_ttl
         if not api_key:
             api_key = os.environ["BRAVE_SEARCH_API_KEY"]
         assert api_key, "Brave Search API key is required"
@@ -31,20 +52,110 @@ class BraveWebSearchWorker(WebSearchWorker):
 
     #@override
     def search(self, keywords: str, number_of_results: int = 10) -> str:
+        key = (self.result_type, " ".join(keywords.lower().split()), number_of_results)
+        with BraveWebSearchWorker._lock:
+            cached = BraveWebSearchWorker._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                BraveWebSearchWorker._cache.move_to_end(key)
+                BraveWebSearchWorker.stats["cache_hits"] += 1
+                self._record_metric("cache_hit")
+                return copy.deepcopy(cached[1])
+            future = BraveWebSearchWorker._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                BraveWebSearchWorker._in_flight[key] = future
+            else:
+                BraveWebSearchWorker.stats["coalesced"] += 1
+                self._record_metric("coalesced")
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            results = self._search_api(keywords, number_of_results)
+            with BraveWebSearchWorker._lock:
+                # the errors are returned as strings, they are not cached
+                if isinstance(results, list) and self.cache_ttl > 0:
+                    self._cache_results(key, results)
+            future.set_result(results)
+            return copy.deepcopy(results)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with BraveWebSearchWorker._lock:
+                BraveWebSearchWorker._in_flight.pop(key, None)
+
+    # Called with the lock held
+    def _cache_results(self, key: tuple, results: list):
+        cache = BraveWebSearchWorker._cache
+        now = time.monotonic()
+        # the workers can have different ttls, the expired entries are not necessarily the oldest ones
+        for expired_key in [cached_key for cached_key, (expiry, _) in cache.items() if expiry <= now]:
+            del cache[expired_key]
+        cache[key] = (now + self.cache_ttl, results)
+        cache.move_to_end(key)
+        while len(cache) > BraveWebSearchWorker.cache_max_entries:
+            cache.popitem(last=False)
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._lock:
+            return {**cls.stats, "quota": dict(cls.quota), "cached_queries": len(cls._cache)}
+
+    def _search_api(self, keywords: str, number_of_results: int):
         params = {
             "q": keywords,
             "count": number_of_results
         }
 
+        start = time.perf_counter()
         try:
+            with BraveWebSearchWorker._lock:
+                BraveWebSearchWorker.stats["requests"] += 1
             response = self.session.get(self.base_url, params=params)
+            self._record_metric("request", time.perf_counter() - start)
+            self._update_quota(response.headers)
             response.raise_for_status()
             response_text = response.text
             results = self.parse_results(response_text, number_of_results)
             #print(f"Search results: {results}")
             return results
         except requests.RequestException as e:
+            with BraveWebSearchWorker._lock:
+                BraveWebSearchWorker.stats["errors"] += 1
+            self._record_metric("error")
             return f"Error performing search: {str(e)}"
+
+    def _record_metric(self, result: str, seconds: float = None):
+        if not MetricsRegistry.enabled:
+            return
+        MetricsRegistry.counter("web_search_requests_total", "Web searches by result").inc(result=result, result_type=self.result_type)
+        if seconds is not None:
+            MetricsRegistry.histogram("web_search_request_seconds", "Search API request duration").observe(seconds, result_type=self.result_type)
+
+    def _update_quota(self, headers):
+        quota = {}
+        for name in ("limit", "remaining", "reset"):
+            value = headers.get(f"X-RateLimit-{name.capitalize()}")
+            if value:
+                try:
+                    quota[name] = [int(part) for part in value.split(",")]
+                except ValueError:
+                    continue
+        if not quota:
+            return
+        with BraveWebSearchWorker._lock:
+            BraveWebSearchWorker.quota.update(quota)
+        remaining = quota.get("remaining")
+        if remaining and remaining[-1] < 100:
+            self.logger.warning(f"Brave Search API quota almost used: {remaining[-1]} requests remaining")
         
     #@override
     def cleanup(self):
@@ -156,6 +267,9 @@ def main():
     number_of_results = 1
     result = worker.search("cute puppies", number_of_results)
     print(result)
+    # the second search is served from the cache
+    worker.search("Cute puppies", number_of_results)
+    print(BraveWebSearchWorker.get_stats())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
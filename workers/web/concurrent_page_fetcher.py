@@ -0,0 +1,155 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+import requests
+from workers.web.crawler_pool import CrawlerPool
+from workflows.metrics import MetricsRegistry
+
+# Fetches a list of urls concurrently and returns the html pages in the same order (None for the failed or disallowed ones)
+# - at most max_concurrency fetches at a time, and max_per_host for the same host
+# - robots.txt is read once per host, disallowed urls are skipped and the Crawl-delay is applied between requests to the host
+# - each page is first fetched with plain HTTP, the browser (crawl4ai) is only used when the page needs JavaScript rendering
+# http_fetch(url) -> html or None and browser_fetch(url) -> html or None can be replaced, ex. by the WebPageFetcherNode methods
+class ConcurrentPageFetcher:
+    JAVASCRIPT_MARKERS = ("enable javascript", "javascript is required", "javascript is disabled", "requires javascript")
+    SCRIPT_PATTERN = re.compile(r"<(script|style|noscript)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+    TAG_PATTERN = re.compile(r"<[^>]+>")
+
+    def __init__(self, max_concurrency: int = 8, max_per_host: int = 2, respect_robots: bool = True, user_agent: str = "*",
+                 min_text_length: int = 200, http_fetch: Callable[[str], str] = None, browser_fetch: Callable[[str], str] = None):
+        assert max_concurrency > 0 and max_per_host > 0, "Concurrency limits must be positive"
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.min_text_length = min_text_length # pages with less visible text are rendered in the browser
+        self.http_fetch = http_fetch if http_fetch is not None else self._http_get
+        self.browser_fetch = browser_fetch if browser_fetch is not None else self._browser_get
+
+        self.lock = threading.Lock()
+        self.host_semaphores = {}
+        self.robots = {} # host -> RobotFileParser, None when there is no robots.txt
+        self.robots_locks = {}
+        self.next_request_time = {} # host -> time.monotonic() of the next allowed request
+        self.stats = {"http": 0, "browser": 0, "disallowed": 0, "failed": 0}
+
+    def fetch_all(self, urls: List[str]) -> List[str]:
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(urls)), thread_name_prefix="page_fetcher") as executor:
+            return list(executor.map(self.fetch, urls))
+
+    def fetch(self, url: str) -> str:
+        start = time.perf_counter()
+        html = self._fetch(url)
+        if MetricsRegistry.enabled:
+            MetricsRegistry.histogram("web_page_fetch_seconds", "Page fetch duration").observe(time.perf_counter() - start)
+        return html
+
+    def _fetch(self, url: str) -> str:
+        host = urlsplit(url).netloc.lower()
+        try:
+            robots = self._get_robots(host, url)
+            if robots is not None and not robots.can_fetch(self.user_agent, url):
+                self.logger.info(f"Disallowed by robots.txt: {url}")
+                self._count("disallowed")
+                return None
+            crawl_delay = robots.crawl_delay(self.user_agent) if robots is not None else None
+
+            with self._get_host_semaphore(host):
+                self._wait_for_host(host, crawl_delay)
+                html = self.http_fetch(url)
+                if not self.needs_javascript(html):
+                    self._count("http")
+                    return html
+                self._wait_for_host(host, crawl_delay)
+                html = self.browser_fetch(url)
+                self._count("browser" if html else "failed")
+                return html
+        except Exception as e:
+            self.logger.error(f"Error fetching {url}: {str(e)}")
+            self._count("failed")
+            return None
+
+    # Client side rendered pages have almost no text without JavaScript
+    def needs_javascript(self, html: str) -> bool:
+        if not html:
+            return True
+        lower_html = html.lower()
+        if any(marker in lower_html for marker in self.JAVASCRIPT_MARKERS):
+            return True
+        text = self.TAG_PATTERN.sub(" ", self.SCRIPT_PATTERN.sub(" ", html))
+        return len(" ".join(text.split())) < self.min_text_length
+
+    def _count(self, stat: str):
+        with self.lock:
+            self.stats[stat] += 1
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("web_page_fetches_total", "Page fetches by result").inc(result=stat)
+
+    def _get_host_semaphore(self, host: str) -> threading.Semaphore:
+        with self.lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.Semaphore(self.max_per_host)
+            return self.host_semaphores[host]
+
+    # Reserves the next request slot of the host, requests are spaced by the crawl delay
+    def _wait_for_host(self, host: str, crawl_delay: float):
+        if not crawl_delay:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request_time.get(host, now))
+            self.next_request_time[host] = start + float(crawl_delay)
+        if start > now:
+            time.sleep(start - now)
+
+    # robots.txt is downloaded once per host, the other threads of the same host wait for it
+    def _get_robots(self, host: str, url: str) -> RobotFileParser:
+        if not self.respect_robots:
+            return None
+        with self.lock:
+            host_lock = self.robots_locks.setdefault(host, threading.Lock())
+        with host_lock:
+            if host not in self.robots:
+                parts = urlsplit(url)
+                robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+                robots_text = None
+                try:
+                    robots_text = self.http_fetch(robots_url)
+                except Exception as e:
+                    self.logger.info(f"No robots.txt for {host}: {str(e)}")
+                robots = None
+                if robots_text:
+                    robots = RobotFileParser(robots_url)
+                    robots.parse(robots_text.splitlines())
+                self.robots[host] = robots
+            return self.robots[host]
+
+    def _http_get(self, url: str) -> str:
+        try:
+            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException as e:
+            self.logger.info(f"HTTP fetch failed for {url}: {str(e)}")
+            return None
+
+    def _browser_get(self, url: str) -> str:
+        return CrawlerPool.get_instance(max_contexts=self.max_concurrency).fetch(url)
+
+def main():
+    fetcher = ConcurrentPageFetcher(max_concurrency=4, max_per_host=2)
+    html_pages = fetcher.fetch_all(["https://www.example.com", "https://www.python.org", "https://www.example.com/missing"])
+    for html in html_pages:
+        print(len(html) if html else html)
+    print(fetcher.stats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, List, Tuple
+
+# Long-lived crawl4ai browser shared by all the WebPageFetcherNode instances and workflow runs.
+# Launching a headless browser takes seconds, so the pool starts it once on a background event loop thread
+# and fetches the pages with up to max_contexts concurrent sessions. Each session keeps its browser page
+# (crawl4ai session_id) so the next fetch on the same session reuses the page instead of opening a new one.
+# The browser is closed after idle_timeout seconds without fetches and restarted on the next fetch.
+class CrawlerPool:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Shared pool, the arguments are only used when the pool is created
+    @classmethod
+    def get_instance(cls, max_contexts: int = 4, idle_timeout: float = 300.0) -> "CrawlerPool":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = CrawlerPool(max_contexts, idle_timeout)
+                atexit.register(cls.shutdown_instance)
+            return cls._instance
+
+    @classmethod
+    def shutdown_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.shutdown()
+                cls._instance = None
+
+    # crawler_factory creates the crawler (AsyncWebCrawler by default), the crawler needs start(), close() and arun(url, session_id)
+    def __init__(self, max_contexts: int = 4, idle_timeout: float = 300.0, crawler_factory: Callable = None):
+        assert max_contexts > 0, "max_contexts must be positive"
+        self.logger = logging.getLogger(__name__)
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self.crawler_factory = crawler_factory if crawler_factory is not None else self._create_crawl4ai_crawler
+        self.crawler = None
+        self.browser_starts = 0
+        self.active_fetches = 0
+        self.last_used = time.monotonic()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="crawler_pool", daemon=True)
+        self.thread.start()
+        # the asyncio objects must be created on the loop thread
+        self._run(self._init_loop_state())
+
+    async def _init_loop_state(self):
+        self.crawler_lock = asyncio.Lock()
+        # free session ids, waiting on the queue limits the concurrent fetches to max_contexts
+        self.sessions = asyncio.Queue()
+        for i in range(self.max_contexts):
+            self.sessions.put_nowait(f"crawler_pool_session_{i}")
+        self.idle_task = asyncio.ensure_future(self._close_when_idle())
+
+    def fetch(self, url: str, timeout: float = 120.0) -> str:
+        return self._run(self._fetch(url), timeout)[0]
+
+    # Returns (html, response headers), the headers have the ETag/Last-Modified validators to cache the rendered page
+    def fetch_with_headers(self, url: str, timeout: float = 120.0) -> Tuple[str, dict]:
+        return self._run(self._fetch(url), timeout)
+
+    # Fetches the urls concurrently (up to max_contexts at a time), returns the html in the same order, None for the failed ones
+    def fetch_many(self, urls: List[str], timeout: float = 600.0) -> List[str]:
+        return self._run(self._fetch_many(urls), timeout)
+
+    def shutdown(self):
+        if not self.loop.is_running():
+            return
+        self._run(self._shutdown(), 30.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5.0)
+
+    def _run(self, coroutine, timeout: float = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    async def _fetch_many(self, urls: List[str]) -> List[str]:
+        results = await asyncio.gather(*[self._fetch(url) for url in urls], return_exceptions=True)
+        html_pages = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error fetching {url}: {result}")
+                html_pages.append(None)
+            else:
+                html_pages.append(result[0])
+        return html_pages
+
+    async def _fetch(self, url: str) -> Tuple[str, dict]:
+        session_id = await self.sessions.get()
+        self.active_fetches += 1
+        try:
+            crawler = await self._get_crawler()
+            result = await crawler.arun(url=url, session_id=session_id)
+            return result.html, dict(getattr(result, "response_headers", None) or {})
+        finally:
+            self.active_fetches -= 1
+            self.last_used = time.monotonic()
+            self.sessions.put_nowait(session_id)
+
+    async def _get_crawler(self):
+        async with self.crawler_lock:
+            if self.crawler is None:
+                self.logger.info("Starting the crawler browser")
+                crawler = self.crawler_factory()
+                await crawler.start()
+                self.crawler = crawler
+                self.browser_starts += 1
+            return self.crawler
+
+    async def _close_crawler(self):
+        async with self.crawler_lock:
+            if self.crawler is not None:
+                self.logger.info("Closing the crawler browser")
+                crawler = self.crawler
+                self.crawler = None
+                await crawler.close()
+
+    async def _close_when_idle(self):
+        check_interval = max(0.01, min(self.idle_timeout / 4, 30.0))
+        while True:
+            await asyncio.sleep(check_interval)
+            idle = time.monotonic() - self.last_used
+            if self.crawler is not None and self.active_fetches == 0 and idle >= self.idle_timeout:
+                await self._close_crawler()
+
+    async def _shutdown(self):
+        self.idle_task.cancel()
+        await self._close_crawler()
+
+    @staticmethod
+    def _create_crawl4ai_crawler():
+        from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+
+        # Adapts the session_id argument to the crawl4ai run config
+        class Crawl4aiCrawler:
+            def __init__(self):
+                self.crawler = AsyncWebCrawler()
+
+            async def start(self):
+                await self.crawler.start()
+
+            async def close(self):
+                await self.crawler.close()
+
+            async def arun(self, url: str, session_id: str):
+                return await self.crawler.arun(url=url, config=CrawlerRunConfig(session_id=session_id))
+
+        return Crawl4aiCrawler()
+
+def main():
+    pool = CrawlerPool.get_instance(max_contexts=2)
+    html_pages = pool.fetch_many(["https://www.example.com", "https://www.python.org"])
+    for html in html_pages:
+        print(html[:200] if html else html)
+    print(f"Browser starts: {pool.browser_starts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List
+
+try:
+    from lxml import etree
+except ImportError: # lxml is optional, the pure-Python parser is used without it
+    etree = None
+
+# Extracts the readable text of a web page in one streaming pass, without building a tree.
+# The parser (lxml when it is installed, html.parser otherwise) calls start/end/data for each element:
+# - script, style, svg... are skipped
+# - the text is grouped by block (p, li, h1, div...) with its number of characters inside links
+# - the blocks of boilerplate elements (nav, header, footer, aside, forms, menus, cookie banners) are dropped, a <main>/<article>
+#   inside a boilerplate element (ex. <div class="modal">) is not. html, body, main and article are never boilerplate
+# - when the page has a <main>/<article> with enough text only its blocks are kept, otherwise the blocks
+#   that are mostly links (menus, tag clouds) or very short are dropped
+# - the items of a list (li, dt, dd) are short by nature (ex. names of attractions), they are not filtered by length and
+#   the link density is computed over the whole list, so a menu is dropped but not a list of places. The same goes for
+#   the blocks with several lines (<br>)
+# - when nothing is left, the text of all the blocks is returned, a page is never empty because of a wrong guess
+# Output: one block per line, a <br> starts a new line in its block
+class HtmlTextExtractor:
+    SKIPPED_TAGS = frozenset(["script", "style", "noscript", "template", "svg", "canvas", "iframe", "head", "title", "meta", "link"])
+    BOILERPLATE_TAGS = frozenset(["nav", "header", "footer", "aside", "form", "button", "select", "option", "menu", "dialog"])
+    BOILERPLATE_ROLES = frozenset(["navigation", "banner", "contentinfo", "complementary", "search", "menu", "menubar", "dialog"])
+    # Whole class/id tokens: "sidebar", "cookie-banner", "nav_main" but not "has-sidebar" or "no-ads" (state classes of the page)
+    BOILERPLATE_PATTERN = re.compile(r"(site[_-]|main[_-]|top[_-])?(nav|navbar|navigation|menu|footer|sidebar|breadcrumbs?|cookies?|consent|banner|"
+                                     r"social|share|advert|ads?|promo|newsletter|popup|modal|related|comments?|signup|login|subscribe)"
+                                     r"([_-][\w-]*)?", re.IGNORECASE)
+    NEVER_BOILERPLATE_TAGS = frozenset(["html", "body", "main", "article"])
+    MAIN_TAGS = frozenset(["main", "article"])
+    BLOCK_TAGS = frozenset(["p", "div", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th", "section", "article", "main",
+                            "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "figcaption", "body"])
+    LIST_TAGS = frozenset(["ul", "ol", "dl", "menu"])
+    LIST_ITEM_TAGS = frozenset(["li", "dt", "dd"])
+    HEADING_TAGS = frozenset(["h1", "h2", "h3", "h4", "h5", "h6"])
+    VOID_TAGS = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"])
+
+    def __init__(self, remove_boilerplate: bool = True, main_content: bool = True, min_block_length: int = 40,
+                 max_link_density: float = 0.5, min_main_length: int = 200, use_lxml: bool = True):
+        self.remove_boilerplate = remove_boilerplate
+        self.main_content = main_content
+        self.min_block_length = min_block_length # shorter blocks are dropped outside the main content, except headings
+        self.max_link_density = max_link_density
+        self.min_main_length = min_main_length # <main>/<article> text needed to only keep the main content
+        self.use_lxml = use_lxml and etree is not None
+
+    def extract(self, html: str) -> str:
+        return self.extract_from_chunks([html])
+
+    # The html can be fed as it is downloaded, ex. response.iter_content(decode_unicode=True)
+    def extract_from_chunks(self, html_chunks: Iterable[str]) -> str:
+        collector = _BlockCollector(self)
+        if self.use_lxml:
+            parser = etree.HTMLParser(target=collector, remove_comments=True, no_network=True)
+            fed = False
+            for html_chunk in html_chunks:
+                if html_chunk:
+                    parser.feed(html_chunk)
+                    fed = True
+            if fed: # lxml raises on close() when nothing was fed
+                parser.close()
+        else:
+            parser = _StdlibParser(collector)
+            for html_chunk in html_chunks:
+                if html_chunk:
+                    parser.feed(html_chunk)
+            parser.close()
+        return "\n".join(self._select_blocks(collector.close()))
+
+    # The header and footer of an article (title, author) are not boilerplate
+    def is_boilerplate(self, tag: str, attributes: dict, in_main: bool = False) -> bool:
+        if tag in self.NEVER_BOILERPLATE_TAGS:
+            return False
+        if tag in self.BOILERPLATE_TAGS:
+            return not (in_main and tag in ("header", "footer"))
+        if attributes.get("role", "").lower() in self.BOILERPLATE_ROLES:
+            return True
+        if attributes.get("aria-hidden") == "true" or "hidden" in attributes:
+            return True
+        tokens = (attributes.get("class", "") + " " + attributes.get("id", "")).split()
+        return any(self.BOILERPLATE_PATTERN.fullmatch(token) for token in tokens)
+
+    def _select_blocks(self, blocks: List[dict]) -> List[str]:
+        selected = self._filter_blocks(blocks)
+        if not selected:
+            return [block["text"] for block in blocks]
+        return selected
+
+    def _filter_blocks(self, blocks: List[dict]) -> List[str]:
+        blocks = [block for block in blocks if not block["boilerplate"]]
+        if not self.main_content:
+            return [block["text"] for block in blocks]
+        main_blocks = [block for block in blocks if block["in_main"]]
+        if sum(len(block["text"]) for block in main_blocks) >= self.min_main_length:
+            blocks = main_blocks
+        lists = {} # list id -> [characters, characters inside links] of its items
+        for block in blocks:
+            if block["list"] is not None:
+                totals = lists.setdefault(block["list"], [0, 0])
+                totals[0] += len(block["text"])
+                totals[1] += block["link_chars"]
+        selected = []
+        for block in blocks:
+            text = block["text"]
+            if block["heading"]:
+                selected.append(text)
+            elif block["list"] is not None:
+                length, link_chars = lists[block["list"]]
+                if link_chars / length <= self.max_link_density:
+                    selected.append(text)
+            elif block["link_chars"] / len(text) <= self.max_link_density:
+                if block["in_main"] or len(text) >= self.min_block_length or LINE_BREAK in text:
+                    selected.append(text)
+        return selected
+
+LINE_BREAK = "\n"
+
+# Parser target (lxml interface: start, end, data, close) that groups the text by block
+class _BlockCollector:
+    def __init__(self, extractor: HtmlTextExtractor):
+        self.extractor = extractor
+        # (tag, skipped, boilerplate, main, link, heading, item, boilerplate depth outside the main, list id) of the open elements
+        self.stack = []
+        self.skip_depth = 0
+        self.boilerplate_depth = 0 # boilerplate elements open since the innermost main element
+        self.main_depth = 0
+        self.link_depth = 0
+        self.heading_depth = 0
+        self.item_depth = 0
+        self.list_id = 0 # innermost open list, 0 for the items without list
+        self.list_count = 0
+        self.parts = []
+        self.link_chars = 0
+        self.block_in_main = False
+        self.block_heading = False
+        self.block_boilerplate = False
+        self.block_list = None
+        self.blocks = []
+
+    def start(self, tag, attributes):
+        if not isinstance(tag, str): # lxml processing instructions
+            return
+        tag = tag.lower()
+        if tag in HtmlTextExtractor.BLOCK_TAGS:
+            self._flush_block()
+        if tag == "br" and self.parts:
+            self.parts.append(LINE_BREAK)
+        if tag in HtmlTextExtractor.VOID_TAGS:
+            return
+        attributes = dict(attributes)
+        skipped = tag in HtmlTextExtractor.SKIPPED_TAGS
+        boilerplate = self.extractor.remove_boilerplate and self.extractor.is_boilerplate(tag, attributes, self.main_depth > 0)
+        main = tag in HtmlTextExtractor.MAIN_TAGS or attributes.get("role") == "main"
+        link = tag == "a"
+        heading = tag in HtmlTextExtractor.HEADING_TAGS
+        item = tag in HtmlTextExtractor.LIST_ITEM_TAGS
+        self.stack.append((tag, skipped, boilerplate, main, link, heading, item, self.boilerplate_depth, self.list_id))
+        self.skip_depth += skipped
+        # the main content is kept even when a wrapper looks like boilerplate
+        self.boilerplate_depth = 0 if main else self.boilerplate_depth + boilerplate
+        self.main_depth += main
+        self.link_depth += link
+        self.heading_depth += heading
+        self.item_depth += item
+        if tag in HtmlTextExtractor.LIST_TAGS:
+            self.list_count += 1
+            self.list_id = self.list_count
+
+    def end(self, tag):
+        if not isinstance(tag, str):
+            return
+        tag = tag.lower()
+        if tag in HtmlTextExtractor.VOID_TAGS:
+            return
+        # close the elements left open (ex. <p> without </p>), ignore the end tags without start tag
+        if not any(entry[0] == tag for entry in self.stack):
+            return
+        while self.stack:
+            open_tag, skipped, boilerplate, main, link, heading, item, boilerplate_depth, list_id = self.stack.pop()
+            self.skip_depth -= skipped
+            self.boilerplate_depth = boilerplate_depth
+            self.list_id = list_id
+            self.item_depth -= item
+            self.main_depth -= main
+            self.link_depth -= link
+            self.heading_depth -= heading
+            if open_tag == tag:
+                break
+        if tag in HtmlTextExtractor.BLOCK_TAGS:
+            self._flush_block()
+
+    def data(self, data):
+        if self.skip_depth:
+            return
+        if not data.strip(): # keeps the space between inline elements
+            if self.parts:
+                self.parts.append(" ")
+            return
+        # inline boilerplate (ex. <span class="share">) is a block of its own so that it can be dropped
+        if self.parts and self.block_boilerplate != (self.boilerplate_depth > 0):
+            self._flush_block()
+        if not self.parts:
+            self.block_in_main = self.main_depth > 0
+            self.block_heading = self.heading_depth > 0
+            self.block_boilerplate = self.boilerplate_depth > 0
+            self.block_list = self.list_id if self.item_depth else None
+        # the new lines of the source are spaces, only <br> breaks the lines
+        self.parts.append(data.replace(LINE_BREAK, " "))
+        if self.link_depth:
+            self.link_chars += len(data.strip())
+
+    def comment(self, text):
+        pass
+
+    def close(self) -> List[dict]:
+        self._flush_block()
+        return self.blocks
+
+    def _flush_block(self):
+        if not self.parts:
+            return
+        lines = (" ".join(line.split()) for line in "".join(self.parts).split(LINE_BREAK))
+        text = LINE_BREAK.join(line for line in lines if line)
+        if text:
+            self.blocks.append({"text": text, "link_chars": min(self.link_chars, len(text)), "in_main": self.block_in_main,
+                                "heading": self.block_heading, "boilerplate": self.block_boilerplate, "list": self.block_list})
+        self.parts = []
+        self.link_chars = 0
+
+# Pure-Python event parser with the same interface as the lxml target parser
+class _StdlibParser(HTMLParser):
+    def __init__(self, target: _BlockCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+        if tag not in HtmlTextExtractor.VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+def main():
+    html = """
+    <html><head><title>Venice</title><script>var tracking = 1;</script></head>
+    <body>
+        <nav><a href="/">Home</a> <a href="/tours">Tours</a></nav>
+        <div class="cookie-banner">We use cookies</div>
+        <main>
+            <h1>Top things to do in Venice</h1>
+            <p>St Mark's Basilica is the cathedral church of the city, famous for its golden mosaics and its Byzantine architecture.</p>
+            <p>The Grand Canal is the main waterway of Venice, best seen from a vaporetto or a gondola at sunset.</p>
+        </main>
+        <footer>Copyright 2025</footer>
+    </body></html>
+    """
+    print(HtmlTextExtractor().extract(html))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from workers.storage.bm25_index_worker import BM25IndexWorker
+from workers.web.html_text_extractor import HtmlTextExtractor
+from workers.web.web_search_worker import WebSearchWorker
+
+# Web search over a recorded corpus, to run the web workflows without a Brave API key or internet
+# The corpus folder has the archived pages (served by the LocalPageServer at base_url) and a corpus.json file:
+# {"pages": [{"path": "venice/1.html", "title": "...", "description": "...", "image_url": "optional"}],
+#  "queries": {"things to do in venice italy": ["venice/1.html", "venice/2.html"]}}
+# A recorded query returns its recorded results, other queries are ranked with BM25 over the title, description and page text.
+# The results have the same format as the BraveWebSearchWorker. latency_ms simulates the search API round trip.
+class LocalCorpusSearchWorker(WebSearchWorker):
+    def __init__(self, worker_name: str, corpus_folder: str, base_url: str, result_type: str = WebSearchWorker.RESULT_TYPE_WEB, latency_ms: float = 0.0):
+        super().__init__(worker_name, result_type)
+        if result_type not in (WebSearchWorker.RESULT_TYPE_WEB, WebSearchWorker.RESULT_TYPE_IMAGE):
+            raise ValueError(f"Invalid result type: {result_type}")
+        self.result_type = result_type
+        self.base_url = base_url.rstrip("/")
+        self.latency_ms = latency_ms
+        with open(os.path.join(corpus_folder, "corpus.json"), "r", encoding="utf-8") as file:
+            corpus = json.load(file)
+        self.pages = {page["path"]: page for page in corpus["pages"]}
+        self.queries = {self._normalize(query): paths for query, paths in corpus.get("queries", {}).items()}
+
+        extractor = HtmlTextExtractor()
+        self.index = BM25IndexWorker()
+        documents = []
+        for page in corpus["pages"]:
+            with open(os.path.join(corpus_folder, page["path"]), "r", encoding="utf-8", errors="replace") as file:
+                page_text = extractor.extract(file.read())
+            documents.append(" ".join([page.get("title", ""), page.get("description", ""), page_text]))
+        self.index.add_documents(documents, ids=list(self.pages.keys()))
+
+    #@override
+    def search(self, keywords: str, number_of_results: int = 10) -> list:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        paths = self.queries.get(self._normalize(keywords))
+        if paths is None:
+            paths = self.index.search([keywords], number_of_results)["ids"][0]
+        results = []
+        for rank, path in enumerate(paths[:number_of_results]):
+            page = self.pages[path]
+            result = {
+                "rank": rank,
+                "url": self.base_url + "/" + path,
+                "title": page.get("title", ""),
+                "description": page.get("description", ""),
+                "type": self.result_type,
+            }
+            if self.result_type == WebSearchWorker.RESULT_TYPE_IMAGE:
+                result["description"] = page.get("title", "")
+                result["image_url"] = page.get("image_url", "")
+                del result["title"]
+            results.append(result)
+        return results
+
+    #@override
+    def cleanup(self):
+        pass
+
+    def _normalize(self, query: str) -> str:
+        return " ".join(query.lower().split())
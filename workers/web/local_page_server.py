@@ -0,0 +1,107 @@
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+# In-process HTTP server that serves archived web pages from a folder, to test and benchmark the web workflows without internet
+# Each response is delayed by latency_ms +/- jitter_ms (seeded, so a run can be repeated), the pages have an ETag
+# and answer 304 to If-None-Match like a real site, and /robots.txt allows everything unless the folder has one
+class LocalPageServer:
+    def __init__(self, pages_folder: str, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 42):
+        self.pages_folder = os.path.abspath(pages_folder)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._create_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPageServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, name="local_page_server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread:
+            self.thread.join(timeout=5.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _delay(self) -> float:
+        with self.random_lock:
+            self.requests += 1
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    # Returns the file of the url path, None when it is outside of the pages folder or doesn't exist
+    def _resolve(self, url_path: str) -> str:
+        relative_path = url_path.split("?", 1)[0].lstrip("/") or "index.html"
+        file_path = os.path.abspath(os.path.join(self.pages_folder, relative_path))
+        if not file_path.startswith(self.pages_folder + os.sep) or not os.path.isfile(file_path):
+            return None
+        return file_path
+
+    def _create_handler(self):
+        page_server = self
+
+        class PageHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(page_server._delay())
+                file_path = page_server._resolve(self.path)
+                if file_path is None:
+                    if self.path == "/robots.txt":
+                        self._send(200, b"User-agent: *\nAllow: /\n", "text/plain")
+                    else:
+                        self._send(404, b"Not found", "text/plain")
+                    return
+                with open(file_path, "rb") as file:
+                    body = file.read()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                content_type = "text/plain" if file_path.endswith(".txt") else "text/html; charset=utf-8"
+                self._send(200, body, content_type, {"ETag": etag, "Cache-Control": "no-cache"})
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return PageHandler
+
+def main():
+    folder = tempfile.mkdtemp(prefix="local_page_server_")
+    with open(os.path.join(folder, "venice.html"), "w", encoding="utf-8") as file:
+        file.write("<html><body><p>Venice</p></body></html>")
+    with LocalPageServer(folder, latency_ms=50, jitter_ms=20) as server:
+        print(requests.get(server.base_url + "/venice.html").text)
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,18 @@ class RagIndexerWorkflowBuilder:
 
     # Creates a workflow to index all the files in a specified folder into a vector database to be used for RAG searches
     # FileListerNode->DocumentChunkerNode->GenerateEmbeddingsNode->VectorDBWriterNode
-    def build(self, db_location: str) -> Workflow:
+    # lexical_index also builds a BM25 index next to the vector database for the lexical and hybrid retrieval modes
+    # embedding_model_properties replaces the default ollama embedding model, it must be the same as the retriever's
+    def build(self, db_location: str, lexical_index: bool = False, embedding_model_properties: dict = None) -> Workflow:
         workflow = Workflow()
 
         # Start with a web search
         workflow.add_node("file_lister", FileListerNode("file lister node"))
         max_chunk_size = 400 # leaving some space to 512
         workflow.add_node("document_chunker", DocumentChunkerNode("document chunker node", max_chunk_size))
-        model_properties = {"model_provider": "ollama", "model_name": "mxbai-embed-large"}
+        model_properties = embedding_model_properties or {"model_provider": "ollama", "model_name": "mxbai-embed-large"}
         workflow.add_node("embeddings_generator", EmbeddingsGeneratorNode("file lister node", model_properties))
-        workflow.add_node("vector_db_writer", VectorDbWriterNode("vector db writer node", db_location, "chroma"))
+        workflow.add_node("vector_db_writer", VectorDbWriterNode("vector db writer node", db_location, "chroma", lexical_index=lexical_index))
 
         workflow.connect("file_lister", "document_chunker")
         workflow.connect("document_chunker", "embeddings_generator")
@@ -13,24 +13,38 @@ class RagRetrieverWorkflowBuilder:
 
     # Creates a workflow to respond to a prompt using a RAG technique pointing to a vector database
     # EmbeddingsGeneratorNode->VectorDbReaderNode->RagContextPrepareNode->TextGenNode
-    def build(self, db_location: str) -> Workflow:
+    # With retrieval_mode "lexical" or "hybrid" the database must be indexed with lexical_index=True, the EmbeddingsGeneratorNode
+    # is skipped and the reader embeds the prompts only when the lexical search is not decisive
+    # embedding_model_properties and gen_model_properties replace the default ollama embedding model and gemini answering model
+    def build(self, db_location: str, retrieval_mode: str = "vector", embedding_model_properties: dict = None,
+              gen_model_properties: dict = None) -> Workflow:
         workflow = Workflow()
 
         # The passthrough node is used to duplicate the outputs
-        emb_model_properties = {"model_provider": "ollama", "model_name": "mxbai-embed-large"}
-        workflow.add_node("embeddings_generator", EmbeddingsGeneratorNode("embeddings generator node", emb_model_properties))
-        workflow.add_node("vector_db_reader", VectorDbReaderNode("vector db reader node", db_location, "chroma"))
-        workflow.add_node("rag_context", RagContextPreparerNode("rag context preparer node"))
-        
-        gen_model_properties = {
+        emb_model_properties = embedding_model_properties or {"model_provider": "ollama", "model_name": "mxbai-embed-large"}
+        if retrieval_mode == "vector":
+            workflow.add_node("embeddings_generator", EmbeddingsGeneratorNode("embeddings generator node", emb_model_properties))
+            # Only the texts are used to build the context, don't return the stored embeddings
+            vector_db_reader = VectorDbReaderNode("vector db reader node", db_location, "chroma", result_fields=["closest_texts", "closest_distances"])
+        else:
+            vector_db_reader = VectorDbReaderNode("vector db reader node", db_location, "chroma", result_fields=["closest_texts"],
+                                                  retrieval_mode=retrieval_mode, embedding_model_properties=emb_model_properties)
+        workflow.add_node("vector_db_reader", vector_db_reader)
+        gen_model_properties = gen_model_properties or {
                 "model_provider": "gemini",
                 "model_name": "gemini-2.0-flash",
                 "api_key": gemini_api_key,
             }
+        # The context is packed to the token budget of the answering model
+        # One prompt per run: there is one answering node, the other prompts would be dropped
+        workflow.add_node("rag_context", RagContextPreparerNode("rag context preparer node", model_name=gen_model_properties["model_name"],
+                                                                single_prompt=True))
+
         prompt_properties = {}
         workflow.add_node("llm_answerer", TextGenNode("llm answerer node", gen_model_properties, prompt_properties))
 
-        workflow.connect("embeddings_generator", "vector_db_reader")
+        if retrieval_mode == "vector":
+            workflow.connect("embeddings_generator", "vector_db_reader")
         workflow.connect("vector_db_reader", "rag_context")
         workflow.connect("rag_context", "llm_answerer")
 
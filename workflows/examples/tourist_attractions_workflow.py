@@ -9,6 +9,7 @@ from workflows.nodes.text_gen_node import TextGenNode
 from workflows.nodes.collate_node import CollateNode
 from workflows.nodes.writer_node import WriterNode
 from workflows.workflow_validator import WorkflowValidator
+from workers.web.web_search_worker import WebSearchWorker
 
 
 class AttractionCategory(str, Enum):
@@ -114,11 +115,19 @@ class TouristAttractionsWorkflow:
     # extract top attractions from each website and collate the results.
     # WebSearchNode --> WebPageFetcherNode --> TextGenNode --> CollateNode --> SummarizeNode
     #                 \-> WebPageFetcherNode --> TextGenNode --/
-    def build(self, city: str, number_of_results: int = 1) -> Workflow:
+    # With batch_fetch one WebPageFetcherNode fetches all the pages concurrently and passes one page to each TextGenNode
+    # WebSearchNode --> WebPageFetcherNode --> TextGenNode --> CollateNode --> SummarizeNode
+    #                                     \-> TextGenNode --/
+    # search_worker replaces the Brave search, ex. LocalCorpusSearchWorker to load-test the workflow without internet
+    def build(self, city: str, number_of_results: int = 1, batch_fetch: bool = False, search_worker: WebSearchWorker = None) -> Workflow:
         workflow = Workflow()
 
         # Start with a web search
-        workflow.add_node("search", WebSearchNode("web search node", brave_search_api_key, number_of_results, True))
+        workflow.add_node("search", WebSearchNode("web search node", brave_search_api_key, number_of_results, True, fan_out=not batch_fetch,
+                                                  worker=search_worker))
+        if batch_fetch:
+            workflow.add_node("web page fetcher", WebPageFetcherNode("web page fetcher", True, batch_mode=True))
+            workflow.connect("search", "web page fetcher")
 
         # Create the branches with web fetcher and llm text gen
         llm_prompt = self.LLM_PROMPT.replace("{city}", city)
@@ -127,11 +136,17 @@ class TouristAttractionsWorkflow:
         prompt_properties = {
             "output_format": "json",
             "response_model": TouristAttractions,
+            # the attractions are in a small part of the page, keep the most relevant sections
+            "max_input_tokens": 8000,
+            "input_reduction": "select",
         }
         for i in range(number_of_results):
             web_fetcher_node_id = f"web page fetcher node{i+2}"
-            workflow.add_node(web_fetcher_node_id, WebPageFetcherNode(web_fetcher_node_id, True))
-            workflow.connect("search", web_fetcher_node_id)
+            if batch_fetch:
+                web_fetcher_node_id = "web page fetcher"
+            else:
+                workflow.add_node(web_fetcher_node_id, WebPageFetcherNode(web_fetcher_node_id, True))
+                workflow.connect("search", web_fetcher_node_id)
 
             llm_node_id = f"llm node{i+2}"
             model_properties["worker_name"] = f"llm worker{i+2}"
@@ -147,7 +162,11 @@ class TouristAttractionsWorkflow:
 
         # Create an LLM node to deduplicate and sort the results
         summarize_prompt = self.SUMMARIZE_LLM_PROMPT_WITH_FORMAT.replace("{city}", city)
-        summarize_node = TextGenNode("summarize", self._build_model_properties(model_provider, summarize_prompt), prompt_properties, True)
+        summarize_prompt_properties = {
+            "output_format": "json",
+            "response_model": TouristAttractions,
+        }
+        summarize_node = TextGenNode("summarize", self._build_model_properties(model_provider, summarize_prompt), summarize_prompt_properties, True)
         workflow.add_node("summarize", summarize_node)
         workflow.connect("collator", "summarize")
 
@@ -177,7 +196,7 @@ def main():
     #city = "Seattle"
     workflow_builder = TouristAttractionsWorkflow()
     number_of_results = 6
-    workflow = workflow_builder.build(city, number_of_results)
+    workflow = workflow_builder.build(city, number_of_results, batch_fetch=True)
     result = workflow.run(f"things to do in {city}")
     workflow.save_trace_report("workflow_report.html")
     print(result)
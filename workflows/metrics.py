@@ -0,0 +1,220 @@
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+# In-process runtime metrics (counters, gauges and histograms with fixed buckets) in the Prometheus text format
+# The registry is disabled by default, the instrumented code checks MetricsRegistry.enabled first so that
+# the cost is one attribute lookup when it is off:
+#   if MetricsRegistry.enabled:
+#       MetricsRegistry.counter("nodes_cache_requests_total", "Nodes cache lookups").inc(result="hit")
+# MetricsRegistry.start_http_server(9464) serves the metrics on http://127.0.0.1:9464/metrics
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0) # seconds
+
+class Metric:
+    metric_type = None
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple, float] = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    # Labels are keyword arguments, ex. counter.inc(worker="ollama_llama3.2"), the key is sorted by label name
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(sorted(labels.items()))
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (not cumulative) + the +Inf bucket, sum]
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self.values[key] = state
+            state[0][index] += 1
+            state[1] += value
+
+    def get_count(self, **labels) -> int:
+        state = self.values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def get_sum(self, **labels) -> float:
+        state = self.values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    #@override
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            for labels, (bucket_counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + [math.inf], bucket_counts):
+                    cumulative += count
+                    bucket_labels = labels + (("le", "+Inf" if bound == math.inf else _format_value(bound)),)
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    enabled = False
+    metrics: Dict[str, Metric] = {}
+    lock = threading.Lock()
+    server = None
+    server_thread = None
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    # Removes all the metrics, for tests
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.metrics = {}
+
+    @classmethod
+    def counter(cls, name: str, help_text: str = "") -> Counter:
+        return cls._get_or_create(Counter, name, help_text)
+
+    @classmethod
+    def gauge(cls, name: str, help_text: str = "") -> Gauge:
+        return cls._get_or_create(Gauge, name, help_text)
+
+    @classmethod
+    def histogram(cls, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return cls._get_or_create(Histogram, name, help_text, buckets)
+
+    @classmethod
+    def render(cls) -> str:
+        with cls.lock:
+            metrics = sorted(cls.metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    # Serves the metrics in the Prometheus text format on http://host:port/metrics, port 0 picks a free port
+    @classmethod
+    def start_http_server(cls, port: int = 9464, host: str = "127.0.0.1") -> str:
+        if cls.server is None:
+            cls.server = ThreadingHTTPServer((host, port), MetricsHandler)
+            cls.server.daemon_threads = True
+            cls.server_thread = threading.Thread(target=cls.server.serve_forever, name="metrics_server", daemon=True)
+            cls.server_thread.start()
+        host, port = cls.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    @classmethod
+    def stop_http_server(cls):
+        if cls.server is not None:
+            cls.server.shutdown()
+            cls.server.server_close()
+            cls.server_thread.join(timeout=5.0)
+            cls.server = None
+            cls.server_thread = None
+
+    @classmethod
+    def _get_or_create(cls, metric_class, name: str, help_text: str, *args) -> Metric:
+        metric = cls.metrics.get(name)
+        if metric is None:
+            with cls.lock:
+                metric = cls.metrics.get(name)
+                if metric is None:
+                    metric = metric_class(name, help_text, *args)
+                    cls.metrics[name] = metric
+        if not isinstance(metric, metric_class):
+            raise ValueError(f"Metric {name} is a {metric.metric_type}")
+        return metric
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = MetricsRegistry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def main():
+    MetricsRegistry.enable()
+    MetricsRegistry.counter("example_requests_total", "Example requests").inc(worker="ollama")
+    MetricsRegistry.histogram("example_request_seconds", "Example latency").observe(0.2, worker="ollama")
+    print(MetricsRegistry.render())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Opt-in profiler of the nodes, it wraps each run_impl call and attributes the samples to the node id:
+# - "sampling": a background thread samples the stack of the thread running the node every interval_ms, the cost is
+#   low and independent of the number of function calls, the values are numbers of samples
+# - "cprofile": deterministic cProfile session per node, exact call counts but slow for code with many small calls,
+#   the stacks are rebuilt from the caller/callee times and the values are microseconds
+# The stacks start at run_impl, code run by other threads (ex. the page fetcher pool) is not profiled
+# write_collapsed() writes the collapsed stack format of flamegraph.pl and speedscope, one file per node
+# Example usage: Workflow(profile="sampling"), the files are written next to the trace report
+PROFILE_SAMPLING = "sampling"
+PROFILE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_SAMPLING, PROFILE_CPROFILE)
+
+class NodeProfiler:
+    def __init__(self, mode: str = PROFILE_SAMPLING, interval_ms: float = 5.0):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.lock = threading.Lock()
+        self.samples: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int)) # node_id -> stack -> samples
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.active: Dict[int, Tuple[str, object]] = {} # thread id -> (node_id, frame calling run_impl)
+        self.sampler_thread = None
+
+    @property
+    def unit(self) -> str:
+        return "samples" if self.mode == PROFILE_SAMPLING else "us"
+
+    # Context manager around the run_impl call of a node
+    def profile(self, node_id: str) -> "ProfileSession":
+        return ProfileSession(self, node_id)
+
+    def get_node_ids(self) -> List[str]:
+        return list(self.profiles) if self.mode == PROFILE_CPROFILE else list(self.samples)
+
+    # stack ("frame;frame;frame") -> value, the first frame is run_impl
+    def get_collapsed_stacks(self, node_id: str) -> Dict[str, int]:
+        if self.mode == PROFILE_SAMPLING:
+            with self.lock:
+                return dict(self.samples.get(node_id, {}))
+        profile = self.profiles.get(node_id)
+        return _collapse_cprofile(profile) if profile else {}
+
+    # Functions with the most self time (last frame of the stacks) of a node
+    def get_top_functions(self, node_id: str, limit: int = 10) -> List[Tuple[str, int]]:
+        totals = defaultdict(int)
+        for stack, value in self.get_collapsed_stacks(node_id).items():
+            totals[stack.rsplit(";", 1)[-1]] += value
+        return sorted(totals.items(), key=lambda item: -item[1])[:limit]
+
+    # Writes <prefix>.<node_id>.collapsed for each node and <prefix>.collapsed with the node ids as root frames
+    # In cprofile mode the pstats file <prefix>.<node_id>.prof is written too (snakeviz, pstats)
+    # Returns node_id -> collapsed filename
+    def write_collapsed(self, prefix: str) -> Dict[str, str]:
+        filenames = {}
+        with open(prefix + ".collapsed", "w", encoding="utf-8") as all_out:
+            for node_id in self.get_node_ids():
+                stacks = self.get_collapsed_stacks(node_id)
+                filename = f"{prefix}.{_safe_filename(node_id)}.collapsed"
+                with open(filename, "w", encoding="utf-8") as out:
+                    for stack, value in sorted(stacks.items()):
+                        out.write(f"{stack} {value}\n")
+                        all_out.write(f"{_frame_name(node_id)};{stack} {value}\n")
+                if self.mode == PROFILE_CPROFILE:
+                    self.profiles[node_id].dump_stats(f"{prefix}.{_safe_filename(node_id)}.prof")
+                filenames[node_id] = filename
+        return filenames
+
+    def _enter(self, node_id: str, entry_frame) -> None:
+        if self.mode == PROFILE_CPROFILE:
+            profile = self.profiles.get(node_id)
+            if profile is None:
+                profile = self.profiles[node_id] = cProfile.Profile()
+            profile.enable()
+            return
+        with self.lock:
+            self.active[threading.get_ident()] = (node_id, entry_frame)
+            if self.sampler_thread is None:
+                self.sampler_thread = threading.Thread(target=self._sample_loop, name="node_profiler", daemon=True)
+                self.sampler_thread.start()
+
+    def _exit(self, node_id: str) -> None:
+        if self.mode == PROFILE_CPROFILE:
+            self.profiles[node_id].disable()
+            return
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+
+    # Runs while nodes are being profiled
+    def _sample_loop(self) -> None:
+        interval = self.interval_ms / 1000.0
+        while True:
+            time.sleep(interval)
+            frames = sys._current_frames()
+            with self.lock:
+                if not self.active:
+                    self.sampler_thread = None
+                    return
+                for thread_id, (node_id, entry_frame) in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self.samples[node_id][_collapse_frames(frame, entry_frame)] += 1
+
+class ProfileSession:
+    def __init__(self, profiler: NodeProfiler, node_id: str):
+        self.profiler = profiler
+        self.node_id = node_id
+
+    def __enter__(self):
+        # the stacks are cut at the caller of the session (AbstractNode.run)
+        self.profiler._enter(self.node_id, sys._getframe(1))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._exit(self.node_id)
+
+def _frame_name(name: str) -> str:
+    # ';' separates the frames and the last ' ' the value
+    return name.replace(";", ":").replace(" ", "_")
+
+def _safe_filename(node_id: str) -> str:
+    return re.sub(r"[^\w.-]", "_", node_id)
+
+def _code_name(code) -> str:
+    return _frame_name(f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}")
+
+def _collapse_frames(frame, entry_frame) -> str:
+    names = []
+    while frame is not None and frame is not entry_frame:
+        names.append(_code_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def _pstats_name(function: tuple) -> str:
+    filename, _, name = function
+    return _frame_name(name if filename == "~" else f"{os.path.basename(filename)}:{name}")
+
+# cProfile only records the caller -> callee edges, the stacks are rebuilt from the roots (run_impl) by splitting
+# the self time of each function between its callers in proportion of the time spent under each caller
+def _collapse_cprofile(profile: cProfile.Profile) -> Dict[str, int]:
+    stats = pstats.Stats(profile).stats
+    callees = defaultdict(dict)
+    roots = []
+    for function, (_, _, _, _, callers) in stats.items():
+        if _is_profiler_function(function):
+            continue
+        for caller, caller_stats in callers.items():
+            callees[caller][function] = caller_stats[3]
+        if not any(caller in stats for caller in callers):
+            roots.append(function)
+
+    stacks = defaultdict(int)
+
+    def visit(function: tuple, path: List[str], visited: set, cumulative: float):
+        _, _, self_time, function_cumulative, _ = stats[function]
+        share = min(1.0, cumulative / function_cumulative) if function_cumulative > 0 else 0.0
+        path = path + [_pstats_name(function)]
+        value = int(round(self_time * share * 1e6))
+        if value > 0:
+            stacks[";".join(path)] += value
+        for callee, callee_cumulative in callees.get(function, {}).items():
+            if callee not in visited and callee in stats and not _is_profiler_function(callee):
+                visit(callee, path, visited | {callee}, callee_cumulative * share)
+
+    for root in roots:
+        visit(root, [], {root}, stats[root][3])
+    return dict(stacks)
+
+# The end of the session (ProfileSession.__exit__ until Profile.disable) is recorded too
+def _is_profiler_function(function: tuple) -> bool:
+    filename, _, name = function
+    return "_lsprof.Profiler" in name or (filename == __file__ and name in ("__exit__", "_exit"))
+
+def main():
+    def busy(iterations: int) -> int:
+        return sum(i * i for i in range(iterations))
+
+    for mode in PROFILE_MODES:
+        profiler = NodeProfiler(mode, interval_ms=1.0)
+        with profiler.profile("example node"):
+            busy(2_000_000)
+        print(mode, profiler.get_top_functions("example node", 3))
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,46 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Optional
 from state.nodes_cache import NodesCache
+from workflows.metrics import MetricsRegistry
 from workflows.workflow_tracer import WorkflowTracer
 
 # Silent tracer class
 class SilentTracer:
+    def start_run(self, name: str = "workflow", attributes: dict = None) -> None:
+        pass
+
+    def stop_run(self, error: str = None) -> None:
+        pass
+
     def start_trace(self, node_id: str) -> None:
         pass
 
     def stop_trace(self, node_id: str) -> None:
         pass
 
+    def add_self_time(self, node_id: str, start_ns: int) -> None:
+        pass
+
+    def start_memory(self, node_id: str):
+        return None
+
+    def stop_memory(self, node_id: str, memory_state) -> None:
+        pass
+
     def record_input(self, node_id: str, input_text: str) -> None:
         pass
 
     def record_output(self, node_id: str, output_text: str, cache_hit: bool = False) -> None:
         pass
 
-    def log_worker(self, node_id: str, worker_name: str, worker_input, worker_output, prompt: str = None, system_prompt: str = None) -> None:
+    def log_worker(self, node_id: str, worker_name: str, worker_input, worker_output, prompt: str = None, system_prompt: str = None,
+                   start_ns: int = None, usage: dict = None) -> None:
         pass
 
+    def get_token_usage(self, prices: dict = None) -> dict:
+        return {"nodes": {}, "total": {}}
+
     def log_error(self, node_id: str, error: str) -> None:
         pass
 
@@ -49,18 +70,23 @@ class AbstractNode(ABC):
         self.cache_hit = False
         self.result = None # The result of the node to be filled by the run() method
         self.tracer = None
+        self.profiler = None
 
-    def start(self, tracer: WorkflowTracer = None):
+    # profiler: optional NodeProfiler that profiles the run_impl calls
+    def start(self, tracer: WorkflowTracer = None, profiler=None):
         self.tracer = tracer if tracer is not None else SilentTracer()
+        self.profiler = profiler
         self.tracer.start_trace(self.node_id)
+        start_ns = time.perf_counter_ns()
         self.start_impl()
-        pass
+        self.tracer.add_self_time(self.node_id, start_ns)
 
     @abstractmethod
     def start_impl(self):
         pass
 
     def run(self, input_text: str) -> str:
+        start_ns = time.perf_counter_ns()
         self.tracer.record_input(self.node_id, input_text)
         if self.cache_enabled:
             cache_key = self.get_cache_key()
@@ -69,23 +95,45 @@ class AbstractNode(ABC):
                 self.cache_hit =True
                 # Store the result in the node so that the stop_impl method can return it
                 self.result = cached_result
+                self._record_run(start_ns)
                 return cached_result
 
-        node_output = self.run_impl(input_text)
+        memory_state = self.tracer.start_memory(self.node_id)
+        try:
+            if self.profiler is not None:
+                with self.profiler.profile(self.node_id):
+                    node_output = self.run_impl(input_text)
+            else:
+                node_output = self.run_impl(input_text)
+        except Exception:
+            if MetricsRegistry.enabled:
+                MetricsRegistry.counter("workflow_node_errors_total", "Node runs that raised an exception").inc(node=self.node_id)
+            raise
+        finally:
+            self.tracer.stop_memory(self.node_id, memory_state)
 
         if self.cache_enabled:
             cache_key = self.get_cache_key()
             NodesCache.set_output(cache_key, input_text, node_output)
 
+        self._record_run(start_ns)
         return node_output
 
     @abstractmethod
     def run_impl(self, input_text: str) -> str:
         pass
 
+    def _record_run(self, start_ns: int):
+        self.tracer.add_self_time(self.node_id, start_ns)
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("workflow_node_runs_total", "Node runs").inc(node=self.node_id)
+            MetricsRegistry.histogram("workflow_node_run_seconds", "Node run duration").observe((time.perf_counter_ns() - start_ns) / 1e9, node=self.node_id)
+
     # Use this to clean up the node
     def stop(self):
+        start_ns = time.perf_counter_ns()
         output = self.stop_impl()
+        self.tracer.add_self_time(self.node_id, start_ns)
         self.tracer.record_output(self.node_id, output, self.cache_hit)
         self.tracer.stop_trace(self.node_id)
 
@@ -1,30 +1,68 @@
-from typing import List
+from typing import Iterator, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from docling.document_converter import DocumentConverter
 from docling.chunking import HybridChunker
 import sys
 import json
 from workflows.nodes.abstract_node import AbstractNode
+from workers.text.plain_text_chunker_worker import PlainTextChunkerWorker
+
+# Per process state used in parallel mode. Each pool process keeps a warm converter and chunker
+# so the layout models and the tokenizer are loaded only once per process.
+_process_converter = None
+_process_chunker = None
+
+def _init_chunker_process(tokenizer: str, max_chunk_size: int, min_chunk_size: int, overlap: int):
+    global _process_converter, _process_chunker
+    _process_converter = DocumentConverter()
+    _process_chunker = HybridChunker(
+        tokenizer=tokenizer,
+        max_chunk_size=max_chunk_size,
+        min_chunk_size=min_chunk_size,
+        overlap=overlap)
+
+def _chunk_file_in_process(file_path: str) -> List[dict]:
+    print(f"Chunking file: {file_path}")
+    doc = _process_converter.convert(file_path).document
+    return DocumentChunkerNode._convert_chunks(_process_chunker.chunk(doc), file_path)
 
 # See how it is used for RAG:
 # https://ds4sd.github.io/docling/examples/rag_langchain/#document-loading
+# Plain text and markdown files are chunked with the PlainTextChunkerWorker (fast path), other files (PDF, DOCX, HTML) with docling
 class DocumentChunkerNode(AbstractNode):
+    FAST_PATH_EXTENSIONS = (".txt", ".md", ".markdown")
+
     def __init__(self, node_id: str, 
                  max_chunk_size: int = 512,
                  min_chunk_size: int = 256,
                  overlap: int = 50,
                  tokenizer="BAAI/bge-small-en-v1.5",
-                 cache_enabled: bool = False):
+                 cache_enabled: bool = False,
+                 num_workers: int = 1,
+                 fast_path: bool = True):
         super().__init__(node_id, cache_enabled)
         self.tokenizer = tokenizer
         self.max_chunk_size = max_chunk_size
         self.min_chunk_size = min_chunk_size
         self.overlap = overlap
+        self.num_workers = num_workers # number of processes used to convert files, 1 means no process pool
+        self.fast_path = fast_path # chunk plain text and markdown files without docling
         self.converter = None
+        self.chunker = None
+        self.text_chunker = None
+        self.pool = None
         self.result = None
 
     def start_impl(self):
-        self.converter = DocumentConverter()
+        # converter and chunkers are created on first use and reused for all the files
+        self.converter = None
+        self.chunker = None
+        self.text_chunker = None
         self.result = []
+        # the pool processes are spawned on the first docling file and stay warm for all the runs until stop
+        if self.num_workers > 1 and self.pool is None:
+            init_args = (self.tokenizer, self.max_chunk_size, self.min_chunk_size, self.overlap)
+            self.pool = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_chunker_process, initargs=init_args)
 
     def run_impl(self, input_text):
         # Input: {"files": ["path1", "path2"]}
@@ -34,28 +72,82 @@ class DocumentChunkerNode(AbstractNode):
             print(f"Invalid input: {input_text} - expected 'files' key")
             raise ValueError("Invalid input")
         file_paths = json_obj["files"]
+        # Files can finish in any order in parallel mode, keep the output in the input order
+        chunks_by_file = {}
+        for file_path, chunks in self.iter_chunks(file_paths):
+            chunks_by_file[file_path] = chunks
         text_segments = []
         for file_path in file_paths:
-            text_segments.extend(self.chunk_file(file_path))
+            text_segments.extend(chunks_by_file.get(file_path, []))
         self.result = json.dumps(text_segments)
         return self.result
 
+    # Yields (file_path, chunks) as soon as each file is chunked
+    # With num_workers > 1 the files are converted in the process pool of the node and yielded in completion order
+    # Fast path files are always chunked in this process, they are cheaper than sending them to the pool
+    def iter_chunks(self, file_paths: List[str]) -> Iterator[Tuple[str, List[dict]]]:
+        docling_file_paths = []
+        for file_path in file_paths:
+            if self._use_fast_path(file_path):
+                yield file_path, self._get_text_chunker().chunk_file(file_path)
+            else:
+                docling_file_paths.append(file_path)
+
+        if self.pool is None or len(docling_file_paths) <= 1:
+            for file_path in docling_file_paths:
+                yield file_path, self.chunk_file(file_path)
+            return
+
+        futures = {self.pool.submit(_chunk_file_in_process, file_path): file_path for file_path in docling_file_paths}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # the files not chunked yet when the caller stops or fails are not converted
+            for future in futures:
+                future.cancel()
+
     def chunk_file(self, file_path: str) -> List[dict]:
+        if self._use_fast_path(file_path):
+            return self._get_text_chunker().chunk_file(file_path)
+
         print(f"Chunking file: {file_path}")
-        conv_res = self.converter.convert(file_path)
+        conv_res = self._get_converter().convert(file_path)
         doc = conv_res.document
-        
-        chunker = HybridChunker(
-            tokenizer=self.tokenizer,
-            max_chunk_size=self.max_chunk_size,
-            min_chunk_size=self.min_chunk_size,
-            overlap=self.overlap)
 
-        chunks_iterator = chunker.chunk(doc)
+        chunks_iterator = self._get_chunker().chunk(doc)
         text_chunks = self._convert_chunks(chunks_iterator, file_path)
         return text_chunks
 
-    def _convert_chunks(self, chunks_iterator, file_path: str) -> dict:
+    def _use_fast_path(self, file_path: str) -> bool:
+        return self.fast_path and file_path.lower().endswith(self.FAST_PATH_EXTENSIONS)
+
+    def _get_converter(self) -> DocumentConverter:
+        if self.converter is None:
+            self.converter = DocumentConverter()
+        return self.converter
+
+    def _get_text_chunker(self) -> PlainTextChunkerWorker:
+        if self.text_chunker is None:
+            self.text_chunker = PlainTextChunkerWorker(
+                f"plain_text_chunker_worker_{self.node_id}",
+                max_chunk_size=self.max_chunk_size,
+                min_chunk_size=self.min_chunk_size,
+                overlap=self.overlap)
+        return self.text_chunker
+
+    # Creating the chunker loads the tokenizer so it is done only once per node
+    def _get_chunker(self) -> HybridChunker:
+        if self.chunker is None:
+            self.chunker = HybridChunker(
+                tokenizer=self.tokenizer,
+                max_chunk_size=self.max_chunk_size,
+                min_chunk_size=self.min_chunk_size,
+                overlap=self.overlap)
+        return self.chunker
+
+    @staticmethod
+    def _convert_chunks(chunks_iterator, file_path: str) -> List[dict]:
         chunks = []
         for docling_chunk in chunks_iterator:
             #print(docling_chunk)
@@ -73,6 +165,9 @@ class DocumentChunkerNode(AbstractNode):
         return chunks
     
     def stop_impl(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
         return self.result
 
 def main(file_path):
@@ -1,5 +1,6 @@
 import logging
 import json
+import time
 from workers.llm.ollama_worker import OllamaWorker
 from workflows.nodes.abstract_node import AbstractNode
 
@@ -18,8 +19,10 @@ class EmbeddingsGeneratorNode(AbstractNode):
         self.worker_name = self.model_provider + "_" + self.model_name
 
         if self.model_provider == "ollama":
-            use_lib = True
-            return OllamaWorker(self.worker_name, None, self.model_name, use_lib) # 512 context, 1024 enbedding size
+            # base_url with use_lib False points to another server, ex. the OllamaStubServer of the benchmarks
+            use_lib = model_properties.get("use_lib", True)
+            base_url = model_properties.get("base_url", "http://localhost:11434")
+            return OllamaWorker(self.worker_name, None, self.model_name, use_lib, base_url) # 512 context, 1024 enbedding size
         
         raise ValueError(f"Invalid model provider: {self.model_provider}")
 
@@ -31,6 +34,7 @@ class EmbeddingsGeneratorNode(AbstractNode):
         #Input [{"text": "hello", "text_location_in_doc": None, "doc_location": file_path}]
         #Output [{"text": "hello", "embeddings": [1,2], "text_location_in_doc": None, "doc_location": file_path}]
         text_segments = json.loads(input_text)
+        start_ns = time.perf_counter_ns()
 
         for text_segment in text_segments:
             text = text_segment["text"]
@@ -41,7 +45,7 @@ class EmbeddingsGeneratorNode(AbstractNode):
         # Log the generation of embeddings without including the actual vectors
         self.tracer.log_worker(self.node_id, self.worker_name, input_text, 
                              f"Generated embeddings of dimension {len(embeddings)}", 
-                             "generate_embeddings", None)
+                             "generate_embeddings", None, start_ns)
         return self.result
 
     def stop_impl(self) -> str:
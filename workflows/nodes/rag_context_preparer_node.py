@@ -1,13 +1,36 @@
 import logging
 import json
-from typing import List
+import re
+import numpy as np
+from typing import Callable, List, Union
 from workflows.nodes.abstract_node import AbstractNode
+from workers.text.token_counter import count_tokens, get_context_window
 
+# Builds the RAG prompts from the VectorDbReaderNode output
+# For each prompt the retrieved chunks are:
+# - de-duplicated: exact copies and chunks mostly contained in a better ranked one (chunker overlap, same text indexed twice)
+# - optionally reranked: "similarity" (prompt embeddings vs closest_embeddings, or closest_distances), "cross_encoder"
+#   (stub scoring the prompt/chunk token overlap) or any callable(prompt, texts) -> scores, higher is better
+# - packed in rank order into the token budget: max_context_tokens, or half of the context window of model_name
+# One prompt returns a string, several prompts return a list of strings (one for each connected node, the prompts without
+# a connected node are dropped by the workflow). single_prompt raises on several prompts, for workflows with one answering node
 class RagContextPreparerNode(AbstractNode):
-    def __init__(self, node_id: str):
+    RERANKERS = ("similarity", "cross_encoder")
+    WORD_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, node_id: str, max_context_tokens: int = None, model_name: str = None,
+                 rerank: Union[str, Callable[[str, List[str]], List[float]]] = None, duplicate_threshold: float = 0.8,
+                 single_prompt: bool = False):
         super().__init__(node_id)
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
+        if isinstance(rerank, str) and rerank not in self.RERANKERS:
+            raise ValueError(f"Unsupported rerank: {rerank}")
+        self.max_context_tokens = max_context_tokens
+        self.model_name = model_name
+        self.rerank = rerank
+        self.duplicate_threshold = duplicate_threshold
+        self.single_prompt = single_prompt
         self.context_segments = None
         self.input = None
         self.result = None
@@ -18,43 +41,140 @@ class RagContextPreparerNode(AbstractNode):
         self.input = None
         self.result = None
 
-    def run_impl(self, input_text: str) -> str:
-        # First call - store context segments
+    def run_impl(self, input_text: str) -> Union[str, List[str]]:
         # Input: [{"text": "What is the capital of France?", "embeddings": [1,2], "closest_embeddings": [[1,2], [3,4]], "closest_texts": ["Paris", "Nice"]}]
-        # Output: combined prompt (text with relevant context)
+        # Output: combined prompt (text with relevant context), or a list of combined prompts
         self.input = json.loads(input_text)
-        first_prompt = self.input[0]
+        if self.single_prompt and len(self.input) > 1:
+            raise ValueError(f"Node {self.node_id} supports one prompt per run, got {len(self.input)}")
 
-        self.context_segments = self._get_context(first_prompt)
-        self.prompt = first_prompt.get("text", None)
+        prompts = []
+        self.context_segments = []
+        tokens_before = 0
+        tokens_after = 0
+        for prompt_obj in self.input:
+            prompt = prompt_obj.get("text", None)
+            segments = self._get_context(prompt_obj)
+            tokens_before += sum(count_tokens(segment) for segment in segments)
 
-        # Combine context and prompt in RAG format
-        combined_text = "Relevant information:\n"
-        for i, segment in enumerate(self.context_segments, 1):
-            combined_text += f"[{i}] {segment}\n"
-        
-        combined_text += "\nUse the provided relevant information to respond to this prompt:\n" + self.prompt
-        
-        self.result = combined_text
+            ranked_segments = self._rerank(prompt_obj, self._deduplicate(segments))
+            packed_segments = self._pack(prompt, ranked_segments)
+            tokens_after += sum(count_tokens(segment) for segment in packed_segments)
+            self.context_segments.append(packed_segments)
+            prompts.append(self._combine(prompt, packed_segments))
+
+        self.logger.info(f"Context tokens: {tokens_before} -> {tokens_after} (saved {tokens_before - tokens_after}) for {len(prompts)} prompts")
+        self.result = prompts[0] if len(prompts) == 1 else prompts
         return self.result
-        
-    def stop_impl(self) -> str:
+
+    def stop_impl(self) -> Union[str, List[str]]:
         self.logger.info(f"Stopping RAG context preparer node {self.node_id}")
         return self.result
-    
-    def _get_context(self, prompt_obj) -> List[str]:
+
+    def _get_context(self, prompt_obj: dict) -> List[str]:
         # parse the input string to extract context closest_texts
         # ex {"prompt": "What is the capital of France?", "embeddings": [1,2], "closest_embeddings": [[1,2], [3,4]], "closest_texts": ["Paris", "Nice"]}
         closest_texts = prompt_obj.get("closest_texts", [])
         if isinstance(closest_texts, str):
             closest_texts = [closest_texts]
         return closest_texts
-        
+
+    # Keeps the first (best ranked) copy of overlapping chunks, the chunks without words (ex. "---") are dropped
+    def _deduplicate(self, segments: List[str]) -> List[int]:
+        kept = []
+        kept_words = []
+        for i, segment in enumerate(segments):
+            words = set(self.WORD_PATTERN.findall(segment.lower()))
+            if not words:
+                continue
+            duplicate = False
+            for other_words in kept_words:
+                if len(words & other_words) / min(len(words), len(other_words)) >= self.duplicate_threshold:
+                    duplicate = True
+                    break
+            if not duplicate:
+                kept.append(i)
+                kept_words.append(words)
+        return kept
+
+    # Returns the segments sorted by relevance, the input is the list of indexes kept by _deduplicate
+    def _rerank(self, prompt_obj: dict, indexes: List[int]) -> List[str]:
+        segments = self._get_context(prompt_obj)
+        if self.rerank is None or len(indexes) < 2:
+            return [segments[i] for i in indexes]
+
+        prompt = prompt_obj.get("text", "")
+        texts = [segments[i] for i in indexes]
+        if callable(self.rerank):
+            scores = self.rerank(prompt, texts)
+        elif self.rerank == "cross_encoder":
+            scores = self._cross_encoder_scores(prompt, texts)
+        else:
+            scores = self._similarity_scores(prompt_obj, indexes)
+            if scores is None:
+                return texts
+        order = sorted(range(len(texts)), key=lambda i: scores[i], reverse=True) # stable, ties keep the retrieval order
+        return [texts[i] for i in order]
+
+    def _similarity_scores(self, prompt_obj: dict, indexes: List[int]) -> List[float]:
+        embeddings = prompt_obj.get("embeddings")
+        closest_embeddings = prompt_obj.get("closest_embeddings")
+        if embeddings and closest_embeddings:
+            query = np.asarray(embeddings, dtype=np.float32)
+            matrix = np.asarray([closest_embeddings[i] for i in indexes], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+            norms[norms == 0] = 1.0
+            return (matrix @ query / norms).tolist()
+        closest_distances = prompt_obj.get("closest_distances")
+        if closest_distances:
+            return [-closest_distances[i] for i in indexes]
+        return None
+
+    # Stand-in for a cross-encoder model: fraction of the prompt words found in the chunk,
+    # weighted by the inverse of the chunk length so that short focused chunks come first on ties
+    def _cross_encoder_scores(self, prompt: str, texts: List[str]) -> List[float]:
+        prompt_words = set(self.WORD_PATTERN.findall(prompt.lower()))
+        scores = []
+        for text in texts:
+            words = self.WORD_PATTERN.findall(text.lower())
+            if not prompt_words or not words:
+                scores.append(0.0)
+                continue
+            matches = len(prompt_words & set(words))
+            scores.append(matches / len(prompt_words) + matches / (len(words) + 1) * 0.1)
+        return scores
+
+    def _get_token_budget(self, prompt: str) -> int:
+        if self.max_context_tokens is not None:
+            return self.max_context_tokens
+        # leave the other half of the context window for the prompt and the answer
+        return get_context_window(self.model_name) // 2 - count_tokens(prompt)
+
+    # Adds the segments in rank order while they fit, a long segment doesn't prevent smaller ones after it
+    def _pack(self, prompt: str, segments: List[str]) -> List[str]:
+        budget = self._get_token_budget(prompt or "")
+        packed = []
+        for segment in segments:
+            tokens = count_tokens(segment)
+            if tokens <= budget:
+                packed.append(segment)
+                budget -= tokens
+        return packed
+
+    def _combine(self, prompt: str, segments: List[str]) -> str:
+        # Combine context and prompt in RAG format
+        lines = ["Relevant information:"]
+        for i, segment in enumerate(segments, 1):
+            lines.append(f"[{i}] {segment}")
+        lines.append("")
+        lines.append("Use the provided relevant information to respond to this prompt:")
+        return "\n".join(lines) + "\n" + prompt
+
     def get_cache_key(self) -> str:
-        return self.node_id + str(self.input)
-    
+        return self.node_id + str(self.input) + str(self.max_context_tokens) + str(self.model_name) + str(self.rerank)
+
 def main(input_text):
-    node = RagContextPreparerNode("rag_context_preparer_node")
+    node = RagContextPreparerNode("rag_context_preparer_node", max_context_tokens=100, rerank="cross_encoder")
     node.start()
     result = node.run(input_text)
     node.stop()
@@ -64,4 +184,4 @@ if __name__ == "__main__":
     input_text = json.dumps([
         {"text": "What is the capital of France?", "embeddings": [1,2], "closest_embeddings": [[1,2], [3,4]], "closest_texts": ["Paris", "Nice"]}
     ])
-    main(input_text)
\ No newline at end of file
+    main(input_text)
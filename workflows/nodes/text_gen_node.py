@@ -1,21 +1,35 @@
 import json
 import logging
+import time
 #from typing import override
 
 from workers.llm.ollama_worker import OllamaWorker
 from workers.llm.mistral_worker import MistralWorker
 from workers.llm.deepseek_worker import DeepSeekWorker
 from workers.llm.gemini_worker import GeminiWorker
+from workers.text.input_reducer import InputReducer, embedding_scorer
+from workers.text.token_counter import count_tokens, get_chars_per_token, get_context_window
 from workflows.nodes.abstract_node import AbstractNode
 
 # Node for text generation using an LLM
+# Inputs larger than the token budget of the model are reduced before they are inserted in the instructions.
+# prompt_properties:
+# - "max_input_tokens": budget of the input, by default the model context window minus the instructions and "reserved_output_tokens"
+# - "input_reduction": "select" (default, keeps the sections most relevant to the instructions), "truncate" or "map_reduce"
+#   (the model is called on each part of the input and then on the combined partial responses)
+# - "embedding_model_properties": rank the sections by embedding similarity instead of keywords, ex. {"model_provider": "ollama", "model_name": "mxbai-embed-large"}
 class TextGenNode(AbstractNode):
+    DEFAULT_RESERVED_OUTPUT_TOKENS = 2048
+
     def __init__(self, node_id: str, model_properties: dict, prompt_properties: dict = {}, cache_enabled: bool = False):
         super().__init__(node_id, cache_enabled)
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         self.model_properties = model_properties
         self.prompt_properties = prompt_properties
+        self.input_reducer = None
+        self.input_tokens_before = 0
+        self.input_tokens_after = 0
 
     def _create_worker(self, model_properties: dict):
         """
@@ -82,9 +96,31 @@ class TextGenNode(AbstractNode):
         print(f"No HTML content found in response: {llm_response}")
         return "<html></html>" # Return empty HTML if no HTML content is found
 
+    def _create_input_reducer(self) -> InputReducer:
+        instructions = self.model_properties.get("instructions", None) or ""
+        chars_per_token = get_chars_per_token(self.model_provider)
+        max_input_tokens = self.prompt_properties.get("max_input_tokens", None)
+        if max_input_tokens is None:
+            reserved_output_tokens = self.prompt_properties.get("reserved_output_tokens", self.DEFAULT_RESERVED_OUTPUT_TOKENS)
+            instructions_tokens = count_tokens(instructions, chars_per_token)
+            max_input_tokens = max(1, get_context_window(self.model_name) - instructions_tokens - reserved_output_tokens)
+
+        scorer = None
+        embedding_model_properties = self.prompt_properties.get("embedding_model_properties", None)
+        if embedding_model_properties:
+            model_name = embedding_model_properties.get("model_name")
+            use_lib = embedding_model_properties.get("use_lib", True)
+            base_url = embedding_model_properties.get("base_url", "http://localhost:11434")
+            embeddings_worker = OllamaWorker("ollama_" + model_name, None, model_name, use_lib, base_url)
+            scorer = embedding_scorer(embeddings_worker.generate_embeddings)
+
+        strategy = self.prompt_properties.get("input_reduction", "select")
+        return InputReducer(max_input_tokens, chars_per_token, strategy, scorer=scorer)
+
     #@override
     def start_impl(self):
         self.worker = self._create_worker(self.model_properties)
+        self.input_reducer = self._create_input_reducer()
         self.logger.info(f"Starting node {self.node_id}")
 
     #@override
@@ -93,9 +129,30 @@ class TextGenNode(AbstractNode):
         Process the input text and generate output text.
         This method should be implemented based on specific text generation requirements.
         """
+        self.input_tokens_before = self.input_reducer.count_tokens(input_text) if isinstance(input_text, str) else 0
+        self.input_tokens_after = 0
+        if not isinstance(input_text, str) or self.input_reducer.fits(input_text):
+            llm_response = self._generate_response(input_text)
+        elif self.input_reducer.strategy == "map_reduce":
+            parts = self.input_reducer.split(input_text)
+            print(f"Input of {self.input_tokens_before} tokens split in {len(parts)} parts")
+            partial_responses = [self._generate_response(part) for part in parts]
+            combined_responses = self.input_reducer.reduce("\n".join(partial_responses), self.model_properties.get("instructions", None) or "")
+            llm_response = self._generate_response(combined_responses)
+        else:
+            input_text = self.input_reducer.reduce(input_text, self.model_properties.get("instructions", None) or "")
+            llm_response = self._generate_response(input_text)
+        print(f"Input tokens: {self.input_tokens_before} -> {self.input_tokens_after}")
+        self.result = llm_response
+        return llm_response
+
+    def _generate_response(self, input_text: str) -> str:
+        # for map-reduce this is the total of the inputs of all the calls
+        self.input_tokens_after += self.input_reducer.count_tokens(input_text) if isinstance(input_text, str) else 0
         system_prompt = self.prompt_properties.get("system_prompt", None)
         output_format = self.prompt_properties.get("output_format", None)
         response_model = self.prompt_properties.get("response_model", None)
+        start_ns = time.perf_counter_ns()
         llm_response = self.worker.generate_response(input_text, system_prompt, output_format, response_model)
         worker_prompts = self.worker.get_worker_prompts()
         # TODO: some llms can return objects instead of json strings, support that too
@@ -103,8 +160,8 @@ class TextGenNode(AbstractNode):
             llm_response = self._extract_json(llm_response)
         elif output_format == "html":
             llm_response = self._extract_html(llm_response)
-        self.tracer.log_worker(self.node_id, self.worker_name, input_text, llm_response, worker_prompts.get("prompt"), worker_prompts.get("system_prompt"))
-        self.result = llm_response
+        self.tracer.log_worker(self.node_id, self.worker_name, input_text, llm_response, worker_prompts.get("prompt"), worker_prompts.get("system_prompt"), start_ns,
+                               self.worker.get_usage())
         return llm_response
 
     #@override
@@ -113,5 +170,9 @@ class TextGenNode(AbstractNode):
         return self.result
     
     def get_cache_key(self) -> str:
-        return self.node_id + "_" + self.model_provider + "_" + self.model_name
+        cache_key = self.node_id + "_" + self.model_provider + "_" + self.model_name
+        # the reduced input depends on the budget and strategy
+        if "max_input_tokens" in self.prompt_properties or "input_reduction" in self.prompt_properties:
+            cache_key += "_" + str(self.input_reducer.max_tokens) + "_" + self.input_reducer.strategy
+        return cache_key
     
@@ -4,17 +4,62 @@ from abc import ABC, abstractmethod
 from workflows.nodes.abstract_node import AbstractNode
 from workers.storage.chromadb_worker import ChromaDbWorker
 from workers.storage.milvus_db_worker import MilvusDbWorker
+from workers.storage.local_vector_index_worker import LocalVectorIndexWorker
+from workers.storage.numpy_vector_worker import NumpyVectorWorker
+from workers.storage.bm25_index_worker import BM25IndexWorker
+from workers.llm.ollama_worker import OllamaWorker
 import json
 
 # Finds the closest embeddings in a vector database
-# Supported databases: Chroma, Milvus(not tested)
+# Supported databases: Chroma, local IVF index (local_index), exact in-memory search (numpy), Milvus(not tested)
+# All the inputs of a call are sent to the database in one batched query
+# retrieval_mode:
+# - "vector": closest embeddings only
+# - "lexical": BM25 index written by the VectorDbWriterNode with lexical_index=True, the input embeddings are not needed
+# - "hybrid": BM25 first, when the best lexical score is not lexical_decisive_ratio times the second one the vector search
+#   is also done and the two rankings are fused with reciprocal rank fusion (https://dl.acm.org/doi/10.1145/1571941.1572114)
+#   Inputs without "embeddings" are embedded only when the vector search is needed, with embedding_model_properties
+#   (ex. {"model_provider": "ollama", "model_name": "mxbai-embed-large"}), so the EmbeddingsGeneratorNode can be skipped
 class VectorDbReaderNode(AbstractNode):
-    def __init__(self, node_id: str, db_location: str, db_type: str = "chroma", num_results = 10, cache_enabled: bool = False):
+    RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+    # The distances and embeddings are not comparable between lexical and vector results
+    VECTOR_ONLY_FIELDS = ("closest_embeddings", "closest_distances")
+
+    # Maps the output fields to the fields returned by the database worker
+    RESULT_FIELDS = {
+        "closest_embeddings": "embeddings",
+        "closest_texts": "documents",
+        "closest_distances": "distances",
+        "closest_metadatas": "metadatas",
+        "closest_ids": "ids",
+    }
+
+    # result_fields: the fields added to each input, by default "closest_embeddings" and "closest_texts", leave out
+    # "closest_embeddings" to avoid returning the stored vectors
+    def __init__(self, node_id: str, db_location: str, db_type: str = "chroma", num_results = 10, cache_enabled: bool = False,
+                 result_fields: List[str] = None, retrieval_mode: str = "vector",
+                 embedding_model_properties: dict = None, lexical_decisive_ratio: float = 2.0, rrf_k: int = 60):
         super().__init__(node_id, cache_enabled)
         self.db_location = db_location
         self.db_type = db_type.lower()
         self.num_results = num_results
+        if retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {retrieval_mode}")
+        if result_fields is None:
+            result_fields = ["closest_embeddings", "closest_texts"]
+        for result_field in result_fields:
+            if result_field not in self.RESULT_FIELDS:
+                raise ValueError(f"Unsupported result field: {result_field}")
+            if retrieval_mode != "vector" and result_field in self.VECTOR_ONLY_FIELDS:
+                raise ValueError(f"Result field {result_field} is only supported in vector retrieval mode")
+        self.result_fields = list(result_fields)
+        self.retrieval_mode = retrieval_mode
+        self.embedding_model_properties = embedding_model_properties
+        self.lexical_decisive_ratio = lexical_decisive_ratio
+        self.rrf_k = rrf_k
         self.worker = None
+        self.lexical_worker = None
+        self.embeddings_worker = None
         self.chunks = []
         self.embeddings = []
 
@@ -30,9 +75,16 @@ class VectorDbReaderNode(AbstractNode):
             self.worker.connect()
         elif self.db_type == "chroma": # this is tested
             self.worker = ChromaDbWorker(uri=self.db_location, collection_name="test_collection")
+        elif self.db_type == "local_index": # in-process IVF index, no database server
+            self.worker = LocalVectorIndexWorker(uri=self.db_location, collection_name="test_collection")
+        elif self.db_type == "numpy": # exact search in memory, for small corpora
+            self.worker = NumpyVectorWorker(uri=self.db_location, collection_name="test_collection")
         else:
             raise ValueError(f"Unsupported database type: {self.db_type}")
 
+        if self.retrieval_mode != "vector":
+            self.lexical_worker = BM25IndexWorker(uri=self.db_location, collection_name="test_collection")
+
     # Finds the closest embeddings in the vector database
     # Input: [{"text": "What is the capital of France?", "embeddings": [1,2]}]
     # Output: [{"text": "What is the capital of France?", "embeddings": [1,2], "closest_embeddings": [[1,2], [3,4]], "closest_texts": ["Paris", "Nice"]}]
@@ -40,24 +92,103 @@ class VectorDbReaderNode(AbstractNode):
         try:
             print(f"Processing input text: {input_text[:500]}")
             text_embeddings = json.loads(input_text)
-            for text_embedding in text_embeddings:
-                text = text_embedding.get("text")
-                embeddings = text_embedding.get("embeddings")
-
-                if not text or not embeddings:
-                    raise ValueError("Invalid input: 'text' and 'embeddings' are required")
-                
-                closest_embeddings, closest_texts = self.worker.find_closest_embeddings(
-                    query_embeddings=[embeddings], results=self.num_results
-                )
-                text_embedding["closest_embeddings"] = closest_embeddings[0].tolist()
-                text_embedding["closest_texts"] = closest_texts[0]
-                self.result.append(text_embedding)
-
-            return json.dumps(self.result)
         except json.JSONDecodeError:
             raise ValueError(f"Invalid JSON input text: {input_text}")
 
+        for text_embedding in text_embeddings:
+            text = text_embedding.get("text")
+            embeddings = text_embedding.get("embeddings")
+            if not text or (self.retrieval_mode == "vector" and not embeddings):
+                raise ValueError("Invalid input: 'text' and 'embeddings' are required")
+
+        if text_embeddings:
+            if self.retrieval_mode == "vector":
+                self._vector_search(text_embeddings)
+            else:
+                self._lexical_search(text_embeddings)
+        self.result.extend(text_embeddings)
+
+        return json.dumps(self.result)
+
+    def _vector_search(self, text_embeddings: List[dict]):
+        query_embeddings = [text_embedding["embeddings"] for text_embedding in text_embeddings]
+        include = [self.RESULT_FIELDS[field] for field in self.result_fields if field != "closest_ids"]
+        response = self.worker.query(query_embeddings=query_embeddings, results=self.num_results, include=include)
+        for i, text_embedding in enumerate(text_embeddings):
+            for result_field in self.result_fields:
+                value = response[self.RESULT_FIELDS[result_field]][i]
+                # Chroma returns the embeddings as numpy arrays
+                text_embedding[result_field] = value.tolist() if hasattr(value, "tolist") else value
+
+    def _lexical_search(self, text_embeddings: List[dict]):
+        lexical_response = self.lexical_worker.search([text_embedding["text"] for text_embedding in text_embeddings], self.num_results)
+        lexical_results = []
+        vector_indexes = [] # inputs that also need the vector search
+        for i in range(len(text_embeddings)):
+            lexical_results.append(list(zip(lexical_response["ids"][i], lexical_response["documents"][i], lexical_response["metadatas"][i])))
+            if self.retrieval_mode == "hybrid" and not self._is_lexical_decisive(lexical_response["scores"][i]):
+                vector_indexes.append(i)
+        print(f"Lexical search was decisive for {len(text_embeddings) - len(vector_indexes)} of {len(text_embeddings)} inputs")
+
+        vector_results = {}
+        if vector_indexes:
+            query_embeddings = [self._get_embeddings(text_embeddings[i]) for i in vector_indexes]
+            include = ["documents", "metadatas"] if "closest_metadatas" in self.result_fields else ["documents"]
+            response = self.worker.query(query_embeddings=query_embeddings, results=self.num_results, include=include)
+            for j, i in enumerate(vector_indexes):
+                metadatas = response["metadatas"][j] if "metadatas" in response else [None] * len(response["ids"][j])
+                vector_results[i] = list(zip(response["ids"][j], response["documents"][j], metadatas))
+
+        for i, text_embedding in enumerate(text_embeddings):
+            if i in vector_results:
+                ranked_results = self._fuse_rankings([lexical_results[i], vector_results[i]])
+                text_embedding["retrieval"] = "hybrid"
+            else:
+                ranked_results = lexical_results[i]
+                text_embedding["retrieval"] = "lexical"
+            values = {
+                "closest_ids": [result[0] for result in ranked_results],
+                "closest_texts": [result[1] for result in ranked_results],
+                "closest_metadatas": [result[2] for result in ranked_results],
+            }
+            for result_field in self.result_fields:
+                text_embedding[result_field] = values[result_field]
+
+    # The lexical results are enough when the best match clearly stands out
+    def _is_lexical_decisive(self, scores: List[float]) -> bool:
+        if not scores:
+            return False
+        if len(scores) == 1:
+            return True
+        return scores[0] >= self.lexical_decisive_ratio * scores[1]
+
+    # Reciprocal rank fusion of lists of (id, document, metadata) ordered by relevance
+    def _fuse_rankings(self, rankings: List[List[tuple]]) -> List[tuple]:
+        scores = {}
+        results = {}
+        for ranking in rankings:
+            for rank, result in enumerate(ranking):
+                scores[result[0]] = scores.get(result[0], 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                results.setdefault(result[0], result)
+        best_ids = sorted(scores, key=lambda result_id: scores[result_id], reverse=True)[:self.num_results]
+        return [results[result_id] for result_id in best_ids]
+
+    def _get_embeddings(self, text_embedding: dict) -> List[float]:
+        if text_embedding.get("embeddings"):
+            return text_embedding["embeddings"]
+        if not self.embedding_model_properties:
+            raise ValueError("Invalid input: 'embeddings' are required when the lexical search is not decisive")
+        if self.embeddings_worker is None:
+            model_provider = self.embedding_model_properties.get("model_provider")
+            if model_provider != "ollama":
+                raise ValueError(f"Invalid model provider: {model_provider}")
+            model_name = self.embedding_model_properties.get("model_name")
+            use_lib = self.embedding_model_properties.get("use_lib", True)
+            base_url = self.embedding_model_properties.get("base_url", "http://localhost:11434")
+            self.embeddings_worker = OllamaWorker(model_provider + "_" + model_name, None, model_name, use_lib, base_url)
+        text_embedding["embeddings"] = self.embeddings_worker.generate_embeddings(text_embedding["text"])
+        return text_embedding["embeddings"]
+
     def stop_impl(self) -> str:
         return self.result
 
@@ -4,20 +4,32 @@ from abc import ABC, abstractmethod
 from workflows.nodes.abstract_node import AbstractNode
 from workers.storage.chromadb_worker import ChromaDbWorker
 from workers.storage.milvus_db_worker import MilvusDbWorker
+from workers.storage.local_vector_index_worker import LocalVectorIndexWorker
+from workers.storage.numpy_vector_worker import NumpyVectorWorker
+from workers.storage.bm25_index_worker import BM25IndexWorker
+from workers.storage.vector_db_worker import VectorDbWorker
 import json
 
 # Writes text embeddings to a vector database
-# Supported databases: Chroma, Milvus(not tested)
+# Supported databases: Chroma, local IVF index (local_index), exact in-memory search (numpy), Milvus(not tested)
+# The chunks are upserted in batches of batch_size as they are read, only the counters are kept between calls
+# With lexical_index the chunks are also added to a BM25 index stored next to the database (used by the hybrid VectorDbReaderNode)
 class VectorDbWriterNode(AbstractNode):
-    def __init__(self, node_id: str, db_location: str, db_type: str = "chroma", cache_enabled: bool = False):
+    def __init__(self, node_id: str, db_location: str, db_type: str = "chroma", cache_enabled: bool = False, batch_size: int = 1000,
+                 lexical_index: bool = False):
         super().__init__(node_id, cache_enabled)
         self.db_location = db_location
         self.db_type = db_type.lower()
+        self.batch_size = batch_size
+        self.lexical_index = lexical_index
         self.worker = None
-        self.segments = []
-        self.embeddings = []
+        self.lexical_worker = None
+        self.number_of_segments = 0
+        self.documents = set()
 
     def start_impl(self):
+        self.number_of_segments = 0
+        self.documents = set()
         if self.db_type == "milvus": # this is not tested
             connection_params = {
                 "host": "localhost",
@@ -27,44 +39,74 @@ class VectorDbWriterNode(AbstractNode):
             self.worker = MilvusDbWorker(connection_params)
             self.worker.connect()
         elif self.db_type == "chroma": # this is tested
-            self.worker = ChromaDbWorker(uri=self.db_location, collection_name="test_collection")
+            self.worker = ChromaDbWorker(uri=self.db_location, collection_name="test_collection", batch_size=self.batch_size)
+        elif self.db_type == "local_index": # in-process IVF index, no database server
+            self.worker = LocalVectorIndexWorker(uri=self.db_location, collection_name="test_collection")
+        elif self.db_type == "numpy": # exact search in memory, for small corpora
+            self.worker = NumpyVectorWorker(uri=self.db_location, collection_name="test_collection")
         else:
             raise ValueError(f"Unsupported database type: {self.db_type}")
 
+        if self.lexical_index:
+            self.lexical_worker = BM25IndexWorker(uri=self.db_location, collection_name="test_collection")
+
     # Writes the embeddings to the database
     # Old Input: [{"segments": [{"text": "hello", "embeddings": [1,2], "location": None}],"doc_location": file_path}]
     # New input: [{"text": "hello", "embeddings": [1,2], "text_location_in_doc": None, "doc_location": file_path}]
-    # Output: {"number_of_segments": 4, "number_of_documents": 2}
+    # Output: {"number_of_segments": 4, "number_of_documents": 2} (totals over all the calls)
     def run_impl(self, input_text: str) -> str:
-        documents = set()
         try:
             print(f"Processing input text: {input_text[:500]}")
             chunks = json.loads(input_text)
-            
-            for chunk in chunks:
-                text = chunk.get("text", "")
-                embeddings_list = chunk.get("embeddings", [])
-                if not text or not embeddings_list or len(embeddings_list) < 1:
-                    raise ValueError("Invalid input format or missing text/embeddings")
-                doc_location = chunk.get("doc_location", None)
-                if doc_location:
-                    documents.add(doc_location)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON input text: {input_text}")
 
-                self.segments.append(text)
-                self.embeddings.append(embeddings_list)
+        # all the chunks are checked before the first batch is written, an invalid input doesn't leave a partial collection
+        for chunk in chunks:
+            if not chunk.get("text", "") or not chunk.get("embeddings", []):
+                raise ValueError("Invalid input format or missing text/embeddings")
 
-            self.worker.add_vectors(self.segments, self.embeddings)
-            self.result = {
-                "number_of_segments": len(self.segments),
-                "number_of_documents": len(documents),
-            }
+        texts, embeddings, metadatas = [], [], []
+        for chunk in chunks:
+            text = chunk["text"]
+            embeddings_list = chunk["embeddings"]
+            doc_location = chunk.get("doc_location", None)
+            if doc_location:
+                self.documents.add(doc_location)
 
-            print(f"Successfully processed {len(self.segments)} chunks for vector database")
-            return json.dumps(self.result)
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON input text: {input_text}")
+            texts.append(text)
+            embeddings.append(embeddings_list)
+            metadatas.append({"doc_location": doc_location, "text_location_in_doc": chunk.get("text_location_in_doc", None)})
+            if len(texts) >= self.batch_size:
+                self._write_batch(texts, embeddings, metadatas)
+                texts, embeddings, metadatas = [], [], []
+
+        if texts:
+            self._write_batch(texts, embeddings, metadatas)
+
+        self.result = {
+            "number_of_segments": self.number_of_segments,
+            "number_of_documents": len(self.documents),
+        }
+        print(f"Successfully processed {len(chunks)} chunks for vector database")
+        return json.dumps(self.result)
+
+    def _write_batch(self, texts: List[str], embeddings: List[List[float]], metadatas: List[dict]):
+        # the ids are built once from the raw metadata and shared by the vector and lexical indexes, so the results can
+        # be fused. The workers clean the metadata (ex. Chroma drops the None values) and would derive different ids
+        ids = None
+        if self.db_type != "milvus": # milvus uses integer ids
+            ids = [VectorDbWorker.build_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+        self.worker.add_vectors(texts, embeddings, metadatas, ids=ids)
+        if self.lexical_worker:
+            self.lexical_worker.add_documents(texts, metadatas, ids=ids)
+        self.number_of_segments += len(texts)
 
     def stop_impl(self) -> str:
+        if self.worker and hasattr(self.worker, "flush"):
+            self.worker.flush()
+        if self.lexical_worker:
+            self.lexical_worker.flush()
         return self.result
 
     def get_cache_key(self) -> str:
@@ -8,15 +8,20 @@ from workers.web.brave_web_search_worker import BraveWebSearchWorker
 from workers.web.web_search_worker import WebSearchWorker
 
 # Does a web image search (using the Brave Search API)
+# worker replaces the Brave search, ex. a LocalCorpusSearchWorker for tests and benchmarks without internet
 class WebImageSearchNode(AbstractNode):
-    def __init__(self, node_id: str, api_key: str, number_of_results = 10, cache_enabled: bool = False):
+    def __init__(self, node_id: str, api_key: str, number_of_results = 10, cache_enabled: bool = False, worker: WebSearchWorker = None):
         super().__init__(node_id, cache_enabled)
         self.api_key = api_key
         self.number_of_results = number_of_results
+        self.custom_worker = worker
         self.worker = None # web search worker
 
     #@override
     def start_impl(self):
+        if self.custom_worker is not None:
+            self.worker = self.custom_worker
+            return
         worker_name = f"brave_image_search_worker{self.node_id}"
         self.worker = BraveWebSearchWorker(worker_name, WebSearchWorker.RESULT_TYPE_IMAGE, self.api_key)
 
@@ -26,7 +31,9 @@ class WebImageSearchNode(AbstractNode):
 
     #@override
     def stop_impl(self) -> str:
-        self.worker.cleanup()
+        # the caller owns the custom worker
+        if self.custom_worker is None:
+            self.worker.cleanup()
     
     #@override
     def get_cache_key(self) -> str:
@@ -1,60 +1,97 @@
+import json
 import logging
 from workflows.nodes.abstract_node import AbstractNode
 #from typing import override
 import requests
 from bs4 import BeautifulSoup
-import asyncio
-from crawl4ai import *
+from state.http_cache import HttpCache
+from workers.web.crawler_pool import CrawlerPool
+from workers.web.concurrent_page_fetcher import ConcurrentPageFetcher
+from workers.web.html_text_extractor import HtmlTextExtractor
+from workflows.metrics import MetricsRegistry
 
 # Node that receives a url and returns the content of the web page
+# The pages are fetched with the browser of the shared CrawlerPool, which stays open between urls, nodes and workflow runs
+# With batch_mode the node receives the whole list of search results (WebSearchNode with fan_out=False), fetches all the urls
+# concurrently with the ConcurrentPageFetcher (plain HTTP first, browser only when needed) and returns the texts in rank order
+# With http_cache the pages are stored in the HttpCache and revalidated with ETag/Last-Modified, unchanged pages are not downloaded again
+# (for the browser path the rendered page is stored with the validators of the browser response, and reused when the server
+# answers 304 to a plain HTTP revalidation; the pages without validators are rendered without any other request)
+# With main_content the text is extracted with the streaming HtmlTextExtractor, which drops the navigation, menus and footers
+# of the page, otherwise all the text of the body is returned (extract_text_v2)
 class WebPageFetcherNode(AbstractNode):
-    def __init__(self, node_id: str, cache_enabled: bool = False):
+    HTTP_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Referer': 'https://www.google.com/',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'cross-site',
+        'Pragma': 'no-cache',
+        'Cache-Control': 'no-cache'
+    }
+
+    def __init__(self, node_id: str, cache_enabled: bool = False, batch_mode: bool = False, max_concurrency: int = 8, max_per_host: int = 2,
+                 http_cache: bool = True, main_content: bool = True):
         super().__init__(node_id, cache_enabled)
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         self.text_tags = set(["a", "img", "div", "span", "li", "p", "h1", "h2", "h3", "h4", "h5", "h6"])
+        self.batch_mode = batch_mode
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.page_fetcher = None
+        self.http_cache = http_cache
+        self.text_extractor = HtmlTextExtractor() if main_content else None
 
     #@override
     def start_impl(self):
         self.logger.info(f"Starting node {self.node_id}")
+        if self.http_cache:
+            HttpCache.init_database("database.db")
+        if self.batch_mode:
+            self.page_fetcher = ConcurrentPageFetcher(self.max_concurrency, self.max_per_host,
+                                                      http_fetch=self.get_web_page, browser_fetch=self.get_web_page_with_crawl4ai)
 
     #@override
     def run_impl(self, input_text: str) -> str:
         print(f"Input text: {input_text}")
+        if self.batch_mode:
+            return self.run_batch(input_text)
         url = input_text['url']
         print(f"Fetching web page: {url}")
         #web_page_html = self.get_web_page(url)
         
-        web_page_html = asyncio.run(self.get_web_page_with_crawl4ai(url))
-        web_page_text = self.extract_text_v2(web_page_html)
+        web_page_html = self.get_web_page_with_crawl4ai(url)
+        if MetricsRegistry.enabled:
+            MetricsRegistry.counter("web_page_fetches_total", "Page fetches by result").inc(result="browser" if web_page_html else "failed")
+        web_page_text = self.extract_page_text(web_page_html)
 
         self.result = web_page_text
         return web_page_text
     
+    # Input: [{"rank": 0, "url": "https://...", ...}] (list or json string)
+    # Output: list of page texts sorted by rank, "" for the pages that could not be fetched
+    def run_batch(self, input_text) -> list:
+        search_results = json.loads(input_text) if isinstance(input_text, str) else input_text
+        search_results = sorted(search_results, key=lambda result: result.get("rank", 0))
+        html_pages = self.page_fetcher.fetch_all([result["url"] for result in search_results])
+        web_page_texts = [self.extract_page_text(html) if html else "" for html in html_pages]
+        print(f"Fetched {len(web_page_texts)} pages: {self.page_fetcher.stats}")
+
+        self.result = web_page_texts
+        return web_page_texts
+
     def get_web_page(self, url: str) -> str:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Referer': 'https://www.google.com/',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'cross-site',
-            'Pragma': 'no-cache',
-            'Cache-Control': 'no-cache'
-        }
         try:
+            if self.http_cache:
+                return HttpCache.get(url, self.HTTP_HEADERS, timeout=10)
             response = requests.get(
                 url, 
-                headers=headers,
+                headers=self.HTTP_HEADERS,
                 timeout=10,
                 verify=True
             )
@@ -64,13 +101,25 @@ class WebPageFetcherNode(AbstractNode):
             self.logger.error(f"Error fetching {url}: {str(e)}")
             return None
     
-    async def get_web_page_with_crawl4ai(self, url: str) -> str:
-        async with AsyncWebCrawler() as crawler:
-            result = await crawler.arun(
-                url=url,
-            )
-            #return result.markdown
-            return result.html
+    def get_web_page_with_crawl4ai(self, url: str) -> str:
+        if not self.http_cache:
+            return CrawlerPool.get_instance().fetch(url)
+        key = "rendered:" + url
+        try:
+            # the browser is only started when the page is not stored or changed
+            web_page_html = HttpCache.revalidate(url, self.HTTP_HEADERS, timeout=10, key=key)
+            if web_page_html is not None:
+                return web_page_html
+        except requests.RequestException as e:
+            self.logger.info(f"Can't revalidate {url} ({str(e)}), fetching it with the browser")
+        web_page_html, response_headers = CrawlerPool.get_instance().fetch_with_headers(url)
+        HttpCache.store(key, web_page_html, response_headers)
+        return web_page_html
+
+    def extract_page_text(self, web_page_html: str) -> str:
+        if self.text_extractor:
+            return self.text_extractor.extract(web_page_html)
+        return self.extract_text_v2(web_page_html)
 
     def extract_text(self, web_page_html: str) -> str:
         soup = BeautifulSoup(web_page_html, features="html.parser")
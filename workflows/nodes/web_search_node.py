@@ -8,29 +8,42 @@ from workers.web.brave_web_search_worker import BraveWebSearchWorker
 from workers.web.web_search_worker import WebSearchWorker
 
 # Does a Web search (using the Brave Search API)
+# By default each result is passed to one of the connected nodes, with fan_out=False the whole list is passed as a json string
+# worker replaces the Brave search, ex. a LocalCorpusSearchWorker for tests and benchmarks without internet
 class WebSearchNode(AbstractNode):
-    def __init__(self, node_id: str, api_key: str, number_of_results = 10, cache_enabled: bool = False):
+    def __init__(self, node_id: str, api_key: str, number_of_results = 10, cache_enabled: bool = False, fan_out: bool = True,
+                 worker: WebSearchWorker = None):
         super().__init__(node_id, cache_enabled)
         self.api_key = api_key
         self.number_of_results = number_of_results
+        self.fan_out = fan_out
+        self.custom_worker = worker
         self.worker = None # web search worker
 
     #@override
     def start_impl(self):
+        if self.custom_worker is not None:
+            self.worker = self.custom_worker
+            return
         worker_name = f"brave_image_search_worker{self.node_id}"
         self.worker = BraveWebSearchWorker(worker_name, WebSearchWorker.RESULT_TYPE_WEB, self.api_key)
 
     #@override
     def run_impl(self, input_text: str) -> str:
-        return self.worker.search(input_text, self.number_of_results)        
+        results = self.worker.search(input_text, self.number_of_results)
+        if not self.fan_out and isinstance(results, list):
+            return json.dumps(results)
+        return results
 
     #@override
     def stop_impl(self) -> str:
-        self.worker.cleanup()
+        # the caller owns the custom worker
+        if self.custom_worker is None:
+            self.worker.cleanup()
     
     #@override
     def get_cache_key(self) -> str:
-        return self.node_id + "_" + str(self.number_of_results)
+        return self.node_id + "_" + str(self.number_of_results) + ("" if self.fan_out else "_list")
     
 def main():
     node = WebSearchNode("brave image search node", brave_search_api_key, 1, False)
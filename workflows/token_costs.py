@@ -0,0 +1,44 @@
+import json
+from typing import Dict
+
+# Price in USD per million tokens (input, output) of the models used in the workflows, matched by prefix of the model name
+# like the context windows of token_counter.py. Local models (ollama) cost nothing.
+# The prices change, override them with load_prices(filename) or pass a prices dict to the functions
+PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "mistral-large": (2.00, 6.00),
+    "mistral-small": (0.10, 0.30),
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+}
+
+# The longest matching prefix wins, ex. "gemini-2.0-flash-lite" -> "gemini-2.0-flash-lite", unknown models cost nothing
+def get_price(model_name: str, prices: Dict[str, tuple] = None) -> tuple:
+    prices = prices if prices is not None else PRICES
+    if not model_name:
+        return (0.0, 0.0)
+    best_prefix = None
+    for prefix in prices:
+        if model_name.startswith(prefix) and (best_prefix is None or len(prefix) > len(best_prefix)):
+            best_prefix = prefix
+    return tuple(prices[best_prefix]) if best_prefix else (0.0, 0.0)
+
+def compute_cost(model_name: str, prompt_tokens: int, completion_tokens: int, prices: Dict[str, tuple] = None) -> float:
+    input_price, output_price = get_price(model_name, prices)
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+# Replaces the prices of the models in the json file: {"gemini-2.0-flash": [0.10, 0.40]}
+def load_prices(filename: str) -> Dict[str, tuple]:
+    with open(filename, "r", encoding="utf-8") as file:
+        prices = {model: tuple(price) for model, price in json.load(file).items()}
+    PRICES.update(prices)
+    return PRICES
+
+def main():
+    print(f"1000 input and 500 output tokens with gemini-2.0-flash: ${compute_cost('gemini-2.0-flash', 1000, 500):.6f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from workflows.trace_sinks import Span, read_jsonl_spans
+from workflows.workflow_tracer import NodeTrace, WorkflowTracer
+
+# Analysis of the traces of workflow runs: which chain of nodes bounds the latency, and where the time goes
+# - self time: time spent in the node's start, run and stop methods, the rest of its duration is waiting for other nodes
+# - worker time: time of the worker calls (LLM, HTTP...) logged by the node, the rest of the self time is python overhead
+# - cache savings: self time that the cache hits saved, compared to the mean self time of the node without cache hit
+# Example usage: python -m workflows.trace_analysis traces/spans.jsonl
+
+@dataclass
+class NodeTiming:
+    node_id: str
+    start_ns: int
+    end_ns: int
+    self_ns: int
+    worker_ns: int = 0
+    cache_hit: bool = False
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    @property
+    def wait_ns(self) -> int:
+        return max(0, self.duration_ns - self.self_ns)
+
+    @property
+    def overhead_ns(self) -> int:
+        return max(0, self.self_ns - self.worker_ns)
+
+# Timings of the completed nodes of a tracer
+def timings_from_traces(traces: Dict[str, NodeTrace]) -> Dict[str, NodeTiming]:
+    timings = {}
+    for node_id, trace in traces.items():
+        if trace.end_ns is None:
+            continue
+        # traces recorded without the node methods have only the duration
+        self_ns = trace.self_ns or trace.duration_ns
+        timings[node_id] = NodeTiming(node_id, trace.start_ns, trace.end_ns, self_ns, trace.worker_ns, trace.cache_hit)
+    return timings
+
+# Groups the spans of a JsonlTraceSink by workflow run: [(connections, {node_id: NodeTiming})]
+def timings_from_spans(spans: List[Span]) -> List[tuple]:
+    worker_ns = defaultdict(int)
+    for span in spans:
+        if span.kind == "worker" and span.end_time_ns is not None:
+            worker_ns[span.parent_span_id] += span.duration_ns
+    runs = {}
+    for span in spans:
+        if span.trace_id not in runs:
+            runs[span.trace_id] = ({}, {})
+        connections, timings = runs[span.trace_id]
+        if span.kind == "run":
+            connections.update(json.loads(span.attributes.get("workflow.connections", "{}")))
+        elif span.kind == "node" and span.end_time_ns is not None:
+            self_ns = span.attributes.get("node.self_ns") or span.duration_ns
+            timings[span.name] = NodeTiming(span.name, span.start_time_ns, span.end_time_ns, self_ns,
+                                            worker_ns[span.span_id], bool(span.attributes.get("node.cache_hit", False)))
+    return [run for run in runs.values() if run[1]]
+
+# Orders the traced nodes so that each node comes after its inputs, the nodes of a cycle are left out
+def topological_order(traces: Dict[str, NodeTrace], connections: Dict[str, List[str]]) -> List[str]:
+    in_degree = {node_id: 0 for node_id in traces}
+    for source, targets in connections.items():
+        for target in targets:
+            if source in traces and target in in_degree:
+                in_degree[target] += 1
+    ready = [node_id for node_id, degree in in_degree.items() if degree == 0]
+    order = []
+    while ready:
+        node_id = ready.pop(0)
+        order.append(node_id)
+        for target in connections.get(node_id, []):
+            if target in in_degree:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    ready.append(target)
+    return order
+
+# The chain of connected nodes with the longest total self time (duration when it isn't known), which bounds
+# the latency of the run if the independent branches ran in parallel. Works with NodeTrace and NodeTiming
+def critical_path(traces: Dict[str, NodeTrace], connections: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    connections = connections or {}
+    best_duration = {}
+    previous = {}
+    for node_id in topological_order(traces, connections):
+        trace = traces[node_id]
+        duration = trace.self_ns or trace.duration_ns or 0
+        best_duration[node_id] = best_duration.get(node_id, 0) + duration
+        for target in connections.get(node_id, []):
+            if target in traces and best_duration[node_id] > best_duration.get(target, 0):
+                best_duration[target] = best_duration[node_id]
+                previous[target] = node_id
+    if not best_duration:
+        return []
+    node_id = max(best_duration, key=best_duration.get)
+    path = [node_id]
+    while node_id in previous:
+        node_id = previous[node_id]
+        path.append(node_id)
+    return list(reversed(path))
+
+# Summary of one run. cache_baseline: node_id -> self time without cache hit, to estimate the cache savings
+def analyze_run(timings: Dict[str, NodeTiming], connections: Optional[Dict[str, List[str]]] = None,
+                cache_baseline: Optional[Dict[str, float]] = None) -> dict:
+    cache_baseline = cache_baseline or {}
+    if not timings:
+        return {"run_ms": 0.0, "critical_path": [], "critical_path_ms": 0.0, "nodes": {}}
+    path = critical_path(timings, connections)
+    nodes = {}
+    for node_id, timing in timings.items():
+        savings_ns = max(0.0, cache_baseline.get(node_id, 0) - timing.self_ns) if timing.cache_hit else 0.0
+        nodes[node_id] = {
+            "duration_ms": _ms(timing.duration_ns),
+            "self_ms": _ms(timing.self_ns),
+            "wait_ms": _ms(timing.wait_ns),
+            "worker_ms": _ms(timing.worker_ns),
+            "overhead_ms": _ms(timing.overhead_ns),
+            "cache_hit": timing.cache_hit,
+            "cache_savings_ms": _ms(savings_ns),
+            "critical": node_id in path,
+        }
+    run_start_ns = min(timing.start_ns for timing in timings.values())
+    run_end_ns = max(timing.end_ns for timing in timings.values())
+    return {
+        "run_ms": _ms(run_end_ns - run_start_ns),
+        "critical_path": path,
+        "critical_path_ms": _ms(sum(timings[node_id].self_ns for node_id in path)),
+        "self_ms": _ms(sum(timing.self_ns for timing in timings.values())),
+        "worker_ms": _ms(sum(timing.worker_ns for timing in timings.values())),
+        "overhead_ms": _ms(sum(timing.overhead_ns for timing in timings.values())),
+        "cache_savings_ms": round(sum(node["cache_savings_ms"] for node in nodes.values()), 3),
+        "nodes": nodes,
+    }
+
+def analyze_tracer(tracer: WorkflowTracer, connections: Optional[Dict[str, List[str]]] = None,
+                   cache_baseline: Optional[Dict[str, float]] = None) -> dict:
+    return analyze_run(timings_from_traces(tracer.get_all_traces()), connections, cache_baseline)
+
+# Summary of many runs (ex. a JsonlTraceSink file), the cache baseline is the mean self time of the nodes without cache hit
+def analyze_spans(spans: List[Span]) -> dict:
+    runs = timings_from_spans(spans)
+    self_without_hit = defaultdict(list)
+    for _, timings in runs:
+        for node_id, timing in timings.items():
+            if not timing.cache_hit:
+                self_without_hit[node_id].append(timing.self_ns)
+    cache_baseline = {node_id: float(np.mean(values)) for node_id, values in self_without_hit.items()}
+    summaries = [analyze_run(timings, connections, cache_baseline) for connections, timings in runs]
+    if not summaries:
+        return {"runs": 0, "nodes": {}}
+
+    node_summaries = defaultdict(list)
+    for summary in summaries:
+        for node_id, node in summary["nodes"].items():
+            node_summaries[node_id].append(node)
+    nodes = {}
+    for node_id, node_runs in node_summaries.items():
+        durations = [node["duration_ms"] for node in node_runs]
+        nodes[node_id] = {
+            "runs": len(node_runs),
+            "duration_p50_ms": _percentile(durations, 50),
+            "duration_p99_ms": _percentile(durations, 99),
+            "self_mean_ms": _mean(node["self_ms"] for node in node_runs),
+            "wait_mean_ms": _mean(node["wait_ms"] for node in node_runs),
+            "worker_mean_ms": _mean(node["worker_ms"] for node in node_runs),
+            "overhead_mean_ms": _mean(node["overhead_ms"] for node in node_runs),
+            "cache_hit_rate": round(sum(1 for node in node_runs if node["cache_hit"]) / len(node_runs), 3),
+            "cache_savings_ms": round(sum(node["cache_savings_ms"] for node in node_runs), 3),
+            "critical_rate": round(sum(1 for node in node_runs if node["critical"]) / len(node_runs), 3),
+        }
+    run_durations = [summary["run_ms"] for summary in summaries]
+    return {
+        "runs": len(summaries),
+        "run_p50_ms": _percentile(run_durations, 50),
+        "run_p99_ms": _percentile(run_durations, 99),
+        "worker_ms": round(sum(summary["worker_ms"] for summary in summaries), 3),
+        "overhead_ms": round(sum(summary["overhead_ms"] for summary in summaries), 3),
+        "cache_savings_ms": round(sum(summary["cache_savings_ms"] for summary in summaries), 3),
+        "nodes": nodes,
+    }
+
+def format_summary(summary: dict) -> str:
+    lines = [f"Runs: {summary['runs']}, p50 {summary.get('run_p50_ms')} ms, p99 {summary.get('run_p99_ms')} ms",
+             f"Worker time: {summary.get('worker_ms')} ms, python overhead: {summary.get('overhead_ms')} ms, "
+             f"cache savings: {summary.get('cache_savings_ms')} ms",
+             f"{'node':<30}{'p50 ms':>10}{'p99 ms':>10}{'self ms':>10}{'wait ms':>10}{'worker ms':>11}{'overhead':>10}{'hit rate':>10}{'critical':>10}"]
+    # the nodes that bound the latency most often first
+    for node_id, node in sorted(summary["nodes"].items(), key=lambda item: (-item[1]["critical_rate"], -item[1]["self_mean_ms"])):
+        lines.append(f"{node_id[:29]:<30}{node['duration_p50_ms']:>10}{node['duration_p99_ms']:>10}{node['self_mean_ms']:>10}"
+                     f"{node['wait_mean_ms']:>10}{node['worker_mean_ms']:>11}{node['overhead_mean_ms']:>10}"
+                     f"{node['cache_hit_rate']:>10}{node['critical_rate']:>10}")
+    return "\n".join(lines)
+
+def _ms(nanoseconds: float) -> float:
+    return round(nanoseconds / 1e6, 3)
+
+def _mean(values) -> float:
+    values = list(values)
+    return round(float(np.mean(values)), 3) if values else 0.0
+
+def _percentile(values: list, percentile: float) -> float:
+    return round(float(np.percentile(values, percentile)), 3) if values else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical path and bottleneck analysis of workflow runs traced with a JsonlTraceSink")
+    parser.add_argument("files", nargs="+", help="JSONL span files")
+    parser.add_argument("--json", action="store_true", help="Print the summary as json")
+    args = parser.parse_args()
+
+    spans = []
+    for filename in args.files:
+        spans.extend(read_jsonl_spans(filename))
+    summary = analyze_spans(spans)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+if __name__ == "__main__":
+    main()
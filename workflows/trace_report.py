@@ -0,0 +1,225 @@
+import html
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional, TextIO
+from workflows.node_profiler import NodeProfiler
+from workflows.trace_analysis import critical_path
+from workflows.workflow_tracer import WorkflowTracer, NodeTrace
+
+# Writes the HTML report of a workflow run, streamed to the file so that the time and memory are linear in the trace size
+# - the content is HTML escaped
+# - payloads longer than inline_size are shown truncated, the full text is written once (payloads shared by nodes too)
+#   in a side file <report>.payloads.js which the browser loads when "Show More" is clicked
+# - a Gantt timeline of the nodes and their workers, with the critical path highlighted
+# - with the memory profile of the tracer, the memory peak, RSS change and top allocation sites of each node
+# - with a NodeProfiler, the top functions of each node and links to the collapsed stack files written next to the report
+class TraceReportWriter:
+    CSS = """
+        <style>
+            body { font-family: sans-serif; }
+            pre { white-space: pre-wrap; background: #f6f6f6; padding: 4px; }
+            .show-more { color: blue; cursor: pointer; text-decoration: underline; }
+            .timeline-row { display: flex; align-items: center; height: 18px; }
+            .timeline-label { width: 220px; overflow: hidden; white-space: nowrap; font-size: 12px; }
+            .timeline-lane { position: relative; flex: 1; height: 14px; background: #f0f0f0; }
+            .bar { position: absolute; top: 0; height: 14px; min-width: 1px; background: #6b9bd1; }
+            .bar.critical { background: #d9534f; }
+            .bar.worker { top: 4px; height: 6px; background: #333; }
+            .error { color: #d9534f; }
+        </style>
+        """
+
+    JAVASCRIPT = """
+        <script>
+            function showPayload(payloadId, elementId, link) {
+                function show() {
+                    document.getElementById(elementId).textContent = window.TRACE_PAYLOADS[payloadId];
+                    link.remove();
+                }
+                if (window.TRACE_PAYLOADS) {
+                    show();
+                    return;
+                }
+                const script = document.createElement('script');
+                script.src = document.body.dataset.payloads;
+                script.onload = show;
+                document.head.appendChild(script);
+            }
+        </script>
+        """
+
+    def __init__(self, tracer: WorkflowTracer, connections: Optional[Dict[str, List[str]]] = None, inline_size: int = 2000,
+                 profiler: Optional[NodeProfiler] = None):
+        self.tracer = tracer
+        self.connections = connections or {}
+        self.inline_size = inline_size
+        self.profiler = profiler
+        self.profile_files = {}
+
+    # Writes the report, its payloads file and the collapsed stacks of the profiled nodes
+    def write(self, filename: str) -> None:
+        payloads_filename = filename + ".payloads.js"
+        if self.profiler:
+            self.profile_files = self.profiler.write_collapsed(filename)
+        with open(filename, "w", encoding="utf-8") as out, open(payloads_filename, "w", encoding="utf-8") as payloads_out:
+            self._write_report(out, payloads_out, os.path.basename(payloads_filename))
+
+    # Returns the report as one document, the payloads are embedded once at the end
+    def to_html(self) -> str:
+        out = io.StringIO()
+        payloads_out = io.StringIO()
+        self._write_report(out, payloads_out, None)
+        report = out.getvalue()
+        end_tag = "</body></html>"
+        return report[:-len(end_tag)] + f"<script>{payloads_out.getvalue()}</script>" + end_tag
+
+    def _write_report(self, out: TextIO, payloads_out: TextIO, payloads_src: Optional[str]) -> None:
+        self.payload_ids = {} # id() of the full payloads already written -> payload id
+        self.payloads_out = payloads_out
+        self.payload_count = 0
+        self.element_count = 0
+        payloads_out.write("window.TRACE_PAYLOADS = {\n")
+
+        traces = self.tracer.get_all_traces()
+        path = critical_path(traces, self.connections)
+        body_attributes = f' data-payloads="{html.escape(payloads_src)}"' if payloads_src else ""
+        out.write(f"<html><head><meta charset=\"utf-8\"><title>Workflow Execution Report</title>{self.CSS}{self.JAVASCRIPT}</head><body{body_attributes}>")
+        out.write("<h1>Workflow Execution Report</h1>")
+        self._write_timeline(out, traces, set(path))
+        if path:
+            path_ns = [traces[node_id].self_ns or traces[node_id].duration_ns or 0 for node_id in path]
+            out.write(f"<h2>Critical Path ({sum(path_ns) / 1e6:.1f} ms)</h2><ol>")
+            for node_id, node_ns in zip(path, path_ns):
+                out.write(f"<li>{self._escape(node_id)}: {node_ns / 1e6:.1f} ms</li>")
+            out.write("</ol>")
+        self._write_token_usage(out)
+        self._write_memory(out, traces)
+        self._write_profile(out)
+        for node_id, trace in traces.items():
+            self._write_node(out, node_id, trace)
+        out.write("</body></html>")
+        payloads_out.write("};\n")
+
+    def _write_timeline(self, out: TextIO, traces: Dict[str, NodeTrace], critical_nodes: set) -> None:
+        if not traces:
+            return
+        run_start_ns = min(trace.start_ns for trace in traces.values())
+        run_end_ns = max(trace.end_ns if trace.end_ns is not None else trace.start_ns for trace in traces.values())
+        total_ns = max(1, run_end_ns - run_start_ns)
+
+        def position(start_ns: int, end_ns: int) -> str:
+            left = (start_ns - run_start_ns) * 100.0 / total_ns
+            width = (end_ns - start_ns) * 100.0 / total_ns
+            return f"left: {left:.3f}%; width: {width:.3f}%"
+
+        out.write(f"<h2>Timeline ({total_ns / 1e6:.1f} ms)</h2>")
+        for node_id, trace in traces.items():
+            end_ns = trace.end_ns if trace.end_ns is not None else run_end_ns
+            bar_class = "bar critical" if node_id in critical_nodes else "bar"
+            title = self._escape(f"{node_id}: {(end_ns - trace.start_ns) / 1e6:.1f} ms")
+            out.write(f"<div class=\"timeline-row\"><div class=\"timeline-label\">{self._escape(node_id)}</div><div class=\"timeline-lane\">")
+            out.write(f"<div class=\"{bar_class}\" style=\"{position(trace.start_ns, end_ns)}\" title=\"{title}\"></div>")
+            for worker_execution in trace.worker_executions:
+                worker_start_ns = worker_execution.start_ns if worker_execution.start_ns is not None else worker_execution.end_ns
+                worker_title = self._escape(f"{worker_execution.worker_name}: {(worker_execution.end_ns - worker_start_ns) / 1e6:.1f} ms")
+                out.write(f"<div class=\"bar worker\" style=\"{position(worker_start_ns, worker_execution.end_ns)}\" title=\"{worker_title}\"></div>")
+            out.write("</div></div>")
+
+    def _write_token_usage(self, out: TextIO) -> None:
+        token_usage = self.tracer.get_token_usage()
+        if not token_usage["nodes"]:
+            return
+        out.write("<h2>Token Usage</h2><table><tr><th>Node</th><th>Requests</th><th>Prompt tokens</th><th>Completion tokens</th>"
+                  "<th>Tokens/sec</th><th>Cost (USD)</th></tr>")
+        for node_id, usage in list(token_usage["nodes"].items()) + [("Total", token_usage["total"])]:
+            out.write(f"<tr><td>{self._escape(node_id)}</td><td>{usage['requests']}</td><td>{usage['prompt_tokens']}</td>"
+                      f"<td>{usage['completion_tokens']}</td><td>{usage['tokens_per_sec']}</td><td>{usage['cost']:.6f}</td></tr>")
+        out.write("</table>")
+
+    def _write_memory(self, out: TextIO, traces: Dict[str, NodeTrace]) -> None:
+        traces = {node_id: trace for node_id, trace in traces.items() if trace.memory}
+        if not traces:
+            return
+        out.write("<h2>Memory</h2><table><tr><th>Node</th><th>Runs</th><th>Peak (MB)</th><th>RSS change (MB)</th>"
+                  "<th>Process peak RSS (MB)</th><th>Top allocation sites of the largest run</th></tr>")
+        for node_id, trace in traces.items():
+            largest_run = max(trace.memory, key=lambda memory: memory.peak_bytes)
+            rss_deltas = [memory.rss_delta_bytes for memory in trace.memory if memory.rss_delta_bytes is not None]
+            max_rss = trace.memory[-1].max_rss_bytes
+            # the node raised the peak of the process
+            max_rss_class = ' class="error"' if any(memory.max_rss_increase_bytes > 0 for memory in trace.memory) else ""
+            sites = "<br>".join(f"{self._escape(site.location)}: {site.size_bytes / 1e6:.2f} MB in {site.count} blocks"
+                                for site in largest_run.allocation_sites)
+            out.write(f"<tr><td>{self._escape(node_id)}</td><td>{len(trace.memory)}</td><td>{largest_run.peak_bytes / 1e6:.2f}</td>"
+                      f"<td>{f'{sum(rss_deltas) / 1e6:.2f}' if rss_deltas else '-'}</td><td{max_rss_class}>{(max_rss or 0) / 1e6:.1f}</td><td>{sites}</td></tr>")
+        out.write("</table>")
+
+    def _write_profile(self, out: TextIO) -> None:
+        if not self.profiler or not self.profiler.get_node_ids():
+            return
+        out.write(f"<h2>Profile ({self._escape(self.profiler.mode)}, {self._escape(self.profiler.unit)})</h2>")
+        for node_id in self.profiler.get_node_ids():
+            out.write(f"<h3>{self._escape(node_id)}</h3>")
+            if node_id in self.profile_files:
+                collapsed_file = os.path.basename(self.profile_files[node_id])
+                out.write(f"<p><a href=\"{html.escape(collapsed_file)}\">{self._escape(collapsed_file)}</a></p>")
+            out.write("<table><tr><th>Function</th><th>Self</th></tr>")
+            for function, value in self.profiler.get_top_functions(node_id):
+                out.write(f"<tr><td>{self._escape(function)}</td><td>{value}</td></tr>")
+            out.write("</table>")
+
+    def _write_node(self, out: TextIO, node_id: str, trace: NodeTrace) -> None:
+        out.write(f"<h2>Node: {self._escape(node_id)}</h2>")
+        out.write(f"<p>Start Time: {trace.start_time}</p>")
+        if trace.end_time:
+            out.write(f"<p>End Time: {trace.end_time}</p>")
+            out.write(f"<p>Execution Time: {self.tracer.get_execution_time(node_id)} seconds</p>")
+            out.write(f"<p>Self Time: {trace.self_ns / 1e6:.1f} ms, Worker Time: {trace.worker_ns / 1e6:.1f} ms</p>")
+        if trace.input_data:
+            out.write("<h3>Input Data:</h3>")
+            for i, input_data in enumerate(trace.input_data):
+                out.write(f"<p>Input {i + 1}:</p>")
+                self._write_payload(out, input_data)
+        if trace.output_data:
+            out.write(f"<h3>Output Data: (cache hit={trace.cache_hit}) </h3>")
+            self._write_payload(out, trace.output_data)
+        if trace.worker_executions:
+            out.write("<h3>Worker Executions:</h3>")
+            for i, worker_execution in enumerate(trace.worker_executions):
+                out.write(f"<p>Worker {i + 1}: {self._escape(worker_execution.worker_name)}</p>")
+                for label, payload in (("Input", worker_execution.worker_input), ("Output", worker_execution.worker_output),
+                                       ("Prompt", worker_execution.worker_prompt), ("System Prompt", worker_execution.worker_system_prompt)):
+                    if payload:
+                        out.write(f"<p>{label}:</p>")
+                        self._write_payload(out, payload)
+                out.write(f"<p>Execution Time: {worker_execution.execution_time}</p>")
+                if worker_execution.duration_ns is not None:
+                    out.write(f"<p>Duration: {worker_execution.duration_ns / 1e6:.1f} ms</p>")
+                if worker_execution.usage:
+                    usage = worker_execution.usage
+                    out.write(f"<p>Tokens: {usage.get('prompt_tokens', 0)} prompt, {usage.get('completion_tokens', 0)} completion "
+                              f"({self._escape(usage.get('model'))})</p>")
+        if trace.error:
+            out.write(f"<h3>Error:</h3><p class=\"error\">{self._escape(trace.error)}</p>")
+
+    # Short payloads are inline, long ones are truncated and written once to the payloads file
+    def _write_payload(self, out: TextIO, payload: Any) -> None:
+        text = payload if isinstance(payload, str) else str(payload)
+        if len(text) <= self.inline_size:
+            out.write(f"<pre>{self._escape(text)}</pre>")
+            return
+        payload_id = self.payload_ids.get(id(payload))
+        if payload_id is None:
+            self.payload_count += 1
+            payload_id = self.payload_count
+            self.payload_ids[id(payload)] = payload_id
+            # "</" would end the script tag when the payloads are embedded in the report
+            self.payloads_out.write(f"\"{payload_id}\": {json.dumps(text)},\n".replace("</", "<\\/"))
+        self.element_count += 1
+        element_id = f"payload-{self.element_count}"
+        out.write(f"<pre id=\"{element_id}\">{self._escape(text[:self.inline_size])}...</pre>")
+        out.write(f"<span class=\"show-more\" onclick=\"showPayload('{payload_id}', '{element_id}', this)\">Show More (total {len(text)} chars)</span>")
+
+    def _escape(self, text: Any) -> str:
+        return html.escape(str(text))
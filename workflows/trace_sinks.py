@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+import requests
+
+# A span of a workflow run: the run itself, a node execution (child of the run) or a worker execution (child of its node)
+# The times are nanoseconds since the epoch, measured with the monotonic clock of the tracer
+@dataclass
+class Span:
+    trace_id: str # 32 hex chars, one per workflow run
+    span_id: str # 16 hex chars
+    parent_span_id: Optional[str]
+    name: str
+    kind: str # "run", "node" or "worker"
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ns(self) -> Optional[int]:
+        return None if self.end_time_ns is None else self.end_time_ns - self.start_time_ns
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+# Receives the spans of the WorkflowTracer while the workflow runs. A sink can be shared by many workflows (and threads)
+class TraceSink(ABC):
+    # Called when a node starts, so that a workflow which crashes or hangs still leaves a record
+    def on_span_start(self, span: Span) -> None:
+        pass
+
+    @abstractmethod
+    def on_span_end(self, span: Span) -> None:
+        pass
+
+    # Called at the end of each workflow run
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+# Appends one json line per span event to a file: {"event": "start" or "end", ...span fields}
+# The file is flushed after each line, "end" lines have the complete span
+class JsonlTraceSink(TraceSink):
+    def __init__(self, filename: str, record_starts: bool = True):
+        folder = os.path.dirname(filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.filename = filename
+        self.record_starts = record_starts
+        self.file = open(filename, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    #@override
+    def on_span_start(self, span: Span) -> None:
+        if self.record_starts:
+            self._write("start", span)
+
+    #@override
+    def on_span_end(self, span: Span) -> None:
+        self._write("end", span)
+
+    #@override
+    def flush(self) -> None:
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    #@override
+    def close(self) -> None:
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def _write(self, event: str, span: Span) -> None:
+        line = json.dumps({"event": event, **span.to_dict()}, default=str)
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line + "\n")
+            self.file.flush()
+
+# Reads the complete spans of a JsonlTraceSink file
+def read_jsonl_spans(filename: str) -> List[Span]:
+    spans = []
+    with open(filename, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.pop("event", "end") == "end":
+                spans.append(Span(**record))
+    return spans
+
+# Exports the spans to an OpenTelemetry collector with OTLP/HTTP json (ex. Jaeger, Tempo, otel-collector)
+# The spans are batched and sent by a background thread, export errors are logged and the spans dropped
+# so that tracing never fails the workflow
+class OtlpSpanExporter(TraceSink):
+    DEFAULT_ENDPOINT = "http://localhost:4318/v1/traces"
+    # OTLP span kinds
+    SPAN_KIND_INTERNAL = 1
+    SPAN_KIND_CLIENT = 3
+    STATUS_CODE_ERROR = 2
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, service_name: str = "workflows", batch_size: int = 512,
+                 timeout: float = 10.0, headers: dict = None):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.batch: List[Span] = []
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.exported_spans = 0
+        self.dropped_spans = 0
+        self.thread = threading.Thread(target=self._export_loop, name="otlp_span_exporter", daemon=True)
+        self.thread.start()
+
+    #@override
+    def on_span_end(self, span: Span) -> None:
+        with self.lock:
+            self.batch.append(span)
+            if len(self.batch) < self.batch_size:
+                return
+            batch, self.batch = self.batch, []
+        self.queue.put(batch)
+
+    # Sends the pending spans and waits until they are exported
+    #@override
+    def flush(self) -> None:
+        with self.lock:
+            batch, self.batch = self.batch, []
+        if batch:
+            self.queue.put(batch)
+        self.queue.join()
+
+    #@override
+    def close(self) -> None:
+        self.flush()
+        self.queue.put(None)
+        self.thread.join(timeout=self.timeout)
+
+    def to_otlp(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "workflows.workflow_tracer"},
+                    "spans": [self._otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+
+    def _otlp_span(self, span: Span) -> dict:
+        end_time_ns = span.end_time_ns if span.end_time_ns is not None else span.start_time_ns
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.SPAN_KIND_CLIENT if span.kind == "worker" else self.SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(end_time_ns),
+            "attributes": self._attributes({"workflow.span_kind": span.kind, **span.attributes}),
+        }
+        if span.parent_span_id:
+            otlp_span["parentSpanId"] = span.parent_span_id
+        if span.error:
+            otlp_span["status"] = {"code": self.STATUS_CODE_ERROR, "message": span.error}
+        return otlp_span
+
+    def _attributes(self, attributes: dict) -> list:
+        otlp_attributes = []
+        for key, value in attributes.items():
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                otlp_value = {"boolValue": value}
+            elif isinstance(value, int):
+                otlp_value = {"intValue": str(value)}
+            elif isinstance(value, float):
+                otlp_value = {"doubleValue": value}
+            else:
+                otlp_value = {"stringValue": str(value)}
+            otlp_attributes.append({"key": key, "value": otlp_value})
+        return otlp_attributes
+
+    def _export_loop(self):
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is None:
+                    return
+                self._export(batch)
+            finally:
+                self.queue.task_done()
+
+    def _export(self, spans: List[Span]):
+        try:
+            response = requests.post(self.endpoint, data=json.dumps(self.to_otlp(spans)), headers=self.headers, timeout=self.timeout)
+            response.raise_for_status()
+            self.exported_spans += len(spans)
+        except Exception as e:
+            self.dropped_spans += len(spans)
+            self.logger.warning(f"Failed to export {len(spans)} spans to {self.endpoint}: {e}")
+
+def main():
+    sink = JsonlTraceSink("traces/example_spans.jsonl")
+    sink.on_span_end(Span("0" * 32, "1" * 16, None, "example", "run", 0, 1000))
+    sink.close()
+    print(read_jsonl_spans("traces/example_spans.jsonl")[-1])
+
+if __name__ == "__main__":
+    main()
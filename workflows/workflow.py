@@ -1,13 +1,22 @@
 from typing import Dict, List, Any
+import json
 import logging
 from workflows.nodes.abstract_node import AbstractNode
-from workflows.workflow_tracer import WorkflowTracer
+from workflows.workflow_tracer import WorkflowTracer, TRACE_FULL
+from workflows.node_profiler import NodeProfiler
+from workflows.trace_report import TraceReportWriter
 
 # Execution DAG for an AI workflow
 class Workflow:
     """Class that manages execution flow between connected nodes"""
     
-    def __init__(self):
+    # trace_level: "off", "timings", "sampled" or "full" (see WorkflowTracer), use "timings" or "sampled" for batch runs
+    # trace_sinks: receive the spans while the workflow runs, ex. JsonlTraceSink or OtlpSpanExporter
+    # profile: "sampling" or "cprofile" profiles the run_impl of each node (see NodeProfiler), the collapsed stacks
+    # are written next to the trace report
+    # trace_memory: records the tracemalloc peak, RSS change and top allocation sites of each node run (see MemoryUsage)
+    def __init__(self, trace_level: str = TRACE_FULL, trace_sample_rate: float = 0.1, trace_sinks: list = None,
+                 profile: str = None, profile_interval_ms: float = 5.0, trace_memory: bool = False):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         
@@ -17,7 +26,8 @@ class Workflow:
         self.connections: Dict[str, List[str]] = {}
         # Maps target node_id to list of input node_id
         self.input_connections: Dict[str, List[str]] = {}
-        self.tracer = WorkflowTracer()
+        self.tracer = WorkflowTracer(trace_level, trace_sample_rate, sinks=trace_sinks, memory_profile=trace_memory)
+        self.profiler = NodeProfiler(profile, profile_interval_ms) if profile else None
     
     def add_node(self, node_id: str, node: AbstractNode) -> None:
         """Add a node to the workflow"""
@@ -44,7 +54,7 @@ class Workflow:
         def run_node(node_id: str, node_input: str) -> Any:
             node = self.nodes[node_id]
             if node_id not in call_counter:
-                node.start(self.tracer)
+                node.start(self.tracer, self.profiler)
                 call_counter[node_id] = 1
             else:
                 call_counter[node_id] += 1
@@ -82,17 +92,22 @@ class Workflow:
 
         node_ids = list(self.nodes.keys())
         start_node_id = node_ids[0]
-        run_node(start_node_id, input)
+        self.tracer.start_run(attributes={"workflow.connections": json.dumps(self.connections)})
+        try:
+            run_node(start_node_id, input)
+        except Exception as e:
+            self.tracer.stop_run(str(e))
+            raise
+        self.tracer.stop_run()
         end_node_id = node_ids[-1]
 
         last_node = self.nodes[end_node_id]
         return last_node.result
     
     def save_trace_report(self, filename: str) -> None:
-        """Save the trace report to a file"""
-        report_html = self.tracer.generate_report_as_html()
-        with open(filename, "w", encoding='utf-8') as file:
-            file.write(report_html)
+        """Save the trace report to a file, the long payloads are saved in filename.payloads.js"""
+        # with profiling the collapsed stacks are saved in filename.<node_id>.collapsed
+        TraceReportWriter(self.tracer, self.connections, profiler=self.profiler).write(filename)
 
 # Example usage
 def main():
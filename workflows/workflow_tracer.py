@@ -1,8 +1,46 @@
 from typing import Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
 import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
 from dataclasses import dataclass, field
 from typing import Optional
+from workflows.metrics import MetricsRegistry
+from workflows.token_costs import compute_cost
+from workflows.trace_sinks import Span, TraceSink
+
+# Tracing levels, from the cheapest to the most detailed
+# - "off": nothing is recorded
+# - "timings": node and worker start/end times only, no payloads
+# - "sampled": timings of everything, and digests of the payloads (length, hash, preview) of a sample of the nodes
+# - "full": timings and references to the full payloads (inputs, outputs, prompts), this is the default for the HTML report
+TRACE_OFF = "off"
+TRACE_TIMINGS = "timings"
+TRACE_SAMPLED = "sampled"
+TRACE_FULL = "full"
+TRACE_LEVELS = (TRACE_OFF, TRACE_TIMINGS, TRACE_SAMPLED, TRACE_FULL)
+
+MEMORY_BUCKETS = tuple(float(2 ** power) for power in range(20, 34, 2)) # 1 MB to 8 GB, bytes
+
+# Truncated digest of a payload, so that a long run doesn't retain every page and prompt it has processed
+@dataclass
+class PayloadDigest:
+    length: int
+    sha256: str
+    preview: str
+
+    @classmethod
+    def from_payload(cls, payload: Any, preview_size: int) -> "PayloadDigest":
+        text = payload if isinstance(payload, str) else str(payload)
+        return cls(len(text), hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest(), text[:preview_size])
+
+    def __str__(self) -> str:
+        suffix = "..." if self.length > len(self.preview) else ""
+        return f"{self.preview}{suffix} [{self.length} chars, sha256 {self.sha256[:12]}]"
 
 @dataclass
 class WorkerExecution:
@@ -11,81 +49,299 @@ class WorkerExecution:
     worker_output: Any
     worker_prompt: str
     worker_system_prompt: str
-    execution_time: datetime
+    execution_time: datetime # wall clock time at the end of the execution, for display
+    start_ns: Optional[int] = None # perf_counter_ns() at the start of the execution, when the node gave it
+    end_ns: Optional[int] = None
+    usage: Optional[dict] = None # token usage of the LLM workers, see AIWorker.get_usage()
+
+    @property
+    def duration_ns(self) -> Optional[int]:
+        if self.start_ns is None or self.end_ns is None:
+            return None
+        return self.end_ns - self.start_ns
+
+@dataclass
+class AllocationSite:
+    location: str # file:line
+    size_bytes: int
+    count: int
+
+# Memory used by one run_impl call of a node, recorded when the tracer has memory_profile on
+# - peak_bytes: tracemalloc peak during the run above the memory traced at its start (python allocations only)
+# - rss_delta_bytes: resident memory of the process after the run minus before (numpy, native libraries...), can be negative
+# - max_rss_bytes: peak resident memory of the process after the run, max_rss_increase_bytes > 0 when the node raised it
+# - allocation_sites: lines that allocated the most memory still in use at the end of the run (ex. the output JSON)
+@dataclass
+class MemoryUsage:
+    peak_bytes: int
+    rss_delta_bytes: Optional[int] = None
+    max_rss_bytes: Optional[int] = None
+    max_rss_increase_bytes: int = 0
+    allocation_sites: List[AllocationSite] = field(default_factory=list)
 
 @dataclass
 class NodeTrace:
     node_id: str
-    start_time: datetime
+    start_time: datetime # wall clock, for display. The durations are measured with start_ns/end_ns
     end_time: Optional[datetime] = None
     input_data: List[Any] = field(default_factory=list) # a node can have multiple inputs and be called multiple times
     output_data: Optional[Any] = None
     worker_executions: List[WorkerExecution] = None
     error: Optional[str] = None
+    cache_hit: bool = False
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    capture_payloads: bool = True
+    run_count: int = 0
+    self_ns: int = 0 # time spent in the node's own start, run and stop methods, the rest of the duration is waiting for other nodes
+    span: Optional[Span] = None # only when the tracer has sinks
+    memory: List[MemoryUsage] = field(default_factory=list) # one per run, only with memory_profile
 
     def __post_init__(self):
         if self.worker_executions is None:
             self.worker_executions = []
 
+    @property
+    def memory_peak_bytes(self) -> Optional[int]:
+        return max(memory.peak_bytes for memory in self.memory) if self.memory else None
+
+    @property
+    def duration_ns(self) -> Optional[int]:
+        return None if self.end_ns is None else self.end_ns - self.start_ns
+
+    @property
+    def worker_ns(self) -> int:
+        return sum(worker_execution.duration_ns or 0 for worker_execution in self.worker_executions)
+
 class WorkflowTracer:
     """Traces execution details for workflow nodes"""
     
-    def __init__(self):
+    # The spans of the run, nodes and workers are sent to the sinks as they happen (see trace_sinks.py)
+    # memory_profile records the memory of each node run (see MemoryUsage) with tracemalloc, which makes the python
+    # allocations about 2x slower. memory_top_sites allocation sites are kept per run, 0 skips the tracemalloc snapshots
+    # The nodes must run one at a time, the tracemalloc peak and the RSS are for the whole process
+    def __init__(self, level: str = TRACE_FULL, sample_rate: float = 0.1, preview_size: int = 200, seed: int = None,
+                 sinks: List[TraceSink] = None, memory_profile: bool = False, memory_top_sites: int = 5):
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"Invalid trace level: {level}")
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
+        self.level = level
+        self.sample_rate = sample_rate
+        self.preview_size = preview_size
+        self.random = random.Random(seed)
         self.traces: Dict[str, NodeTrace] = {}
+        self.sinks: List[TraceSink] = list(sinks or [])
+        self.trace_id = None
+        self.run_span = None
+        self.memory_profile = memory_profile
+        self.memory_top_sites = memory_top_sites
+        self.started_tracemalloc = False
+        # converts perf_counter_ns() to epoch nanoseconds for the spans
+        self.epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def add_sink(self, sink: TraceSink) -> None:
+        self.sinks.append(sink)
+
+    # A run groups the spans of the nodes of one workflow execution in one trace
+    # attributes: ex. the connections of the workflow, to analyse the spans later
+    def start_run(self, name: str = "workflow", attributes: dict = None) -> None:
+        if not self.enabled or not self.sinks:
+            return
+        self.trace_id = os.urandom(16).hex()
+        self.run_span = self._create_span(name, "run", None, time.perf_counter_ns(), attributes)
+        self._emit_start(self.run_span)
+
+    def stop_run(self, error: str = None) -> None:
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        if self.run_span is None:
+            return
+        end_time_ns = self._to_epoch_ns(time.perf_counter_ns())
+        # nodes interrupted by the error of the run
+        for trace in self.traces.values():
+            if trace.span and trace.span.trace_id == self.trace_id and trace.span.end_time_ns is None:
+                trace.span.end_time_ns = end_time_ns
+                trace.span.error = trace.error or error or "Node was not stopped"
+                self._emit_end(trace.span)
+        self.run_span.end_time_ns = end_time_ns
+        self.run_span.error = error
+        self._emit_end(self.run_span)
+        self.run_span = None
+        for sink in self.sinks:
+            sink.flush()
+
+    @property
+    def enabled(self) -> bool:
+        return self.level != TRACE_OFF
 
     def start_trace(self, node_id: str) -> None:
         """Start tracing a node's execution"""
+        if not self.enabled:
+            return
+        if self.level == TRACE_SAMPLED:
+            capture_payloads = self.random.random() < self.sample_rate
+        else:
+            capture_payloads = self.level == TRACE_FULL
         self.traces[node_id] = NodeTrace(
             node_id=node_id,
-            start_time=datetime.now()
+            start_time=datetime.now(),
+            start_ns=time.perf_counter_ns(),
+            capture_payloads=capture_payloads
         )
+        if self.sinks:
+            trace = self.traces[node_id]
+            parent_span_id = self.run_span.span_id if self.run_span else None
+            trace.span = self._create_span(node_id, "node", parent_span_id, trace.start_ns, {"node.id": node_id})
+            self._emit_start(trace.span)
         self.logger.debug(f"Started tracing node {node_id}")
 
     def stop_trace(self, node_id: str) -> None:
         """Record the node's output and end time"""
+        if not self.enabled:
+            return
         if node_id in self.traces:
-            self.traces[node_id].end_time = datetime.now()
+            trace = self.traces[node_id]
+            trace.end_ns = time.perf_counter_ns()
+            # derived from the monotonic clock so that a wall clock change doesn't give negative durations
+            trace.end_time = trace.start_time + timedelta(microseconds=trace.duration_ns / 1000)
+            if trace.span:
+                trace.span.end_time_ns = self._to_epoch_ns(trace.end_ns)
+                trace.span.attributes["node.cache_hit"] = trace.cache_hit
+                trace.span.attributes["node.runs"] = trace.run_count
+                trace.span.attributes["node.self_ns"] = trace.self_ns
+                if trace.memory:
+                    trace.span.attributes["node.memory_peak_bytes"] = trace.memory_peak_bytes
+                    trace.span.attributes["node.rss_delta_bytes"] = sum(memory.rss_delta_bytes or 0 for memory in trace.memory)
+                trace.span.error = trace.error
+                self._emit_end(trace.span)
             self.logger.debug(f"Completed tracing node {node_id}")
         else:
             self.logger.warning(f"Tried to end trace for unknown node {node_id}")
 
+    # start_ns is time.perf_counter_ns() when the node method (start, run or stop) was called
+    def add_self_time(self, node_id: str, start_ns: int) -> None:
+        """Add the time spent in a method of the node"""
+        if not self.enabled:
+            return
+        if node_id in self.traces:
+            self.traces[node_id].self_ns += time.perf_counter_ns() - start_ns
+
+    # Called before the run_impl of a node, returns the state to give to stop_memory (None when memory_profile is off)
+    def start_memory(self, node_id: str) -> Optional[tuple]:
+        if not self.memory_profile or not self.enabled or node_id not in self.traces:
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        snapshot = self._take_snapshot() if self.memory_top_sites > 0 else None
+        tracemalloc.reset_peak()
+        return (tracemalloc.get_traced_memory()[0], _current_rss_bytes(), _max_rss_bytes(), snapshot)
+
+    def stop_memory(self, node_id: str, memory_state: Optional[tuple]) -> None:
+        if memory_state is None or node_id not in self.traces or not tracemalloc.is_tracing():
+            return
+        start_traced, start_rss, start_max_rss, start_snapshot = memory_state
+        _, peak_traced = tracemalloc.get_traced_memory()
+        rss = _current_rss_bytes()
+        max_rss = _max_rss_bytes()
+        memory = MemoryUsage(
+            peak_bytes=max(0, peak_traced - start_traced),
+            rss_delta_bytes=rss - start_rss if rss is not None and start_rss is not None else None,
+            max_rss_bytes=max_rss,
+            max_rss_increase_bytes=max_rss - start_max_rss if max_rss is not None and start_max_rss is not None else 0)
+        if start_snapshot is not None:
+            statistics = self._take_snapshot().compare_to(start_snapshot, "lineno")
+            for statistic in statistics[:self.memory_top_sites]:
+                if statistic.size_diff <= 0:
+                    break
+                frame = statistic.traceback[0]
+                memory.allocation_sites.append(AllocationSite(f"{frame.filename}:{frame.lineno}", statistic.size_diff, statistic.count_diff))
+        self.traces[node_id].memory.append(memory)
+        if MetricsRegistry.enabled:
+            MetricsRegistry.histogram("workflow_node_memory_peak_bytes", "Python memory peak of the node runs (tracemalloc)",
+                                      MEMORY_BUCKETS).observe(memory.peak_bytes, node=node_id)
+            if memory.rss_delta_bytes is not None:
+                MetricsRegistry.gauge("workflow_node_rss_delta_bytes", "Resident memory change of the last node run").set(memory.rss_delta_bytes, node=node_id)
+            if max_rss is not None:
+                MetricsRegistry.gauge("process_max_rss_bytes", "Peak resident memory of the process").set(max_rss)
+
+    # The allocations of tracemalloc itself are left out
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
     def record_input(self, node_id: str, input_text: str) -> None:
         """Record the input data for a node"""
+        if not self.enabled:
+            return
         if node_id in self.traces:
-            self.traces[node_id].input_data.append(input_text)
+            trace = self.traces[node_id]
+            trace.run_count += 1
+            if trace.capture_payloads:
+                trace.input_data.append(self._capture(input_text))
             self.logger.debug(f"Recorded input for node {node_id}")
         else:
             self.logger.warning(f"Tried to record input for unknown node {node_id}")
 
     def record_output(self, node_id: str, output_text: str, cache_hit: bool = False) -> None:
         """Record the output data for a node"""
+        if not self.enabled:
+            return
         if node_id in self.traces:
-            self.traces[node_id].output_data = output_text
-            self.traces[node_id].cache_hit = cache_hit
+            trace = self.traces[node_id]
+            if trace.capture_payloads:
+                trace.output_data = self._capture(output_text)
+            trace.cache_hit = cache_hit
             self.logger.debug(f"Recorded output for node {node_id}")
         else:
             self.logger.warning(f"Tried to record output for unknown node {node_id}")
 
-    def log_worker(self, node_id: str, worker_name: str, worker_input: Any, worker_output: Any, prompt: str = None, system_prompt: str = None) -> None:
+    # start_ns is time.perf_counter_ns() before the worker was called, to record the duration of the worker execution
+    # usage is the token usage of the LLM workers (AIWorker.get_usage()), it is recorded at all the levels except off
+    def log_worker(self, node_id: str, worker_name: str, worker_input: Any, worker_output: Any, prompt: str = None, system_prompt: str = None,
+                   start_ns: int = None, usage: dict = None) -> None:
         """Log details about a worker execution for the node"""
+        if not self.enabled:
+            return
         if node_id in self.traces:
+            capture_payloads = self.traces[node_id].capture_payloads
             worker_execution = WorkerExecution(
                 worker_name=worker_name,
-                worker_input=worker_input,
-                worker_output=worker_output,
-                worker_prompt=prompt,
-                worker_system_prompt=system_prompt,
-                execution_time=datetime.now()
+                worker_input=self._capture(worker_input) if capture_payloads else None,
+                worker_output=self._capture(worker_output) if capture_payloads else None,
+                worker_prompt=self._capture(prompt) if capture_payloads else None,
+                worker_system_prompt=self._capture(system_prompt) if capture_payloads else None,
+                execution_time=datetime.now(),
+                start_ns=start_ns,
+                end_ns=time.perf_counter_ns(),
+                usage=dict(usage) if usage else None
             )
             self.traces[node_id].worker_executions.append(worker_execution)
+            node_span = self.traces[node_id].span
+            if node_span:
+                worker_span = self._create_span(worker_name, "worker", node_span.span_id, worker_execution.start_ns or worker_execution.end_ns,
+                                                {"worker.name": worker_name, "node.id": node_id})
+                worker_span.trace_id = node_span.trace_id
+                worker_span.end_time_ns = self._to_epoch_ns(worker_execution.end_ns)
+                if usage:
+                    # OpenTelemetry semantic conventions for generative AI
+                    worker_span.attributes["gen_ai.request.model"] = usage.get("model")
+                    worker_span.attributes["gen_ai.usage.input_tokens"] = usage.get("prompt_tokens", 0)
+                    worker_span.attributes["gen_ai.usage.output_tokens"] = usage.get("completion_tokens", 0)
+                if isinstance(worker_input, str):
+                    worker_span.attributes["worker.input_chars"] = len(worker_input)
+                if isinstance(worker_output, str):
+                    worker_span.attributes["worker.output_chars"] = len(worker_output)
+                self._emit_end(worker_span)
             self.logger.debug(f"Logged worker {worker_name} details for node {node_id}")
         else:
             self.logger.warning(f"Tried to log worker for unknown node {node_id}")
 
     def log_error(self, node_id: str, error: str) -> None:
         """Log an error that occurred during node execution"""
+        if not self.enabled:
+            return
         if node_id in self.traces:
             self.traces[node_id].error = error
             self.logger.error(f"Error in node {node_id}: {error}")
@@ -99,110 +355,101 @@ class WorkflowTracer:
     def get_execution_time(self, node_id: str) -> Optional[float]:
         """Get execution time in seconds for a node"""
         trace = self.traces.get(node_id)
-        if trace and trace.end_time:
-            return (trace.end_time - trace.start_time).total_seconds()
+        if trace and trace.end_ns is not None:
+            return trace.duration_ns / 1e9
         return None
 
     def get_all_traces(self) -> Dict[str, NodeTrace]:
         """Get all trace data"""
         return self.traces
+
+    # Token usage, cost (token_costs.PRICES unless prices is given) and throughput of the LLM workers per node and for the run
+    # tokens_per_sec is the completion tokens divided by the generation time of the provider (ollama) or the worker duration
+    def get_token_usage(self, prices: Dict[str, tuple] = None) -> dict:
+        """Get the token usage per node and for the whole run"""
+        nodes = {}
+        total = self._new_usage()
+        for node_id, trace in self.traces.items():
+            node_usage = self._new_usage()
+            for worker_execution in trace.worker_executions:
+                if not worker_execution.usage:
+                    continue
+                for usage in (node_usage, total):
+                    self._add_usage(usage, worker_execution, prices)
+            if node_usage["requests"]:
+                nodes[node_id] = self._finish_usage(node_usage)
+        return {"nodes": nodes, "total": self._finish_usage(total)}
+
+    def _new_usage(self) -> dict:
+        return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "generation_seconds": 0.0, "cost": 0.0}
+
+    def _add_usage(self, usage: dict, worker_execution: WorkerExecution, prices: Dict[str, tuple]) -> None:
+        worker_usage = worker_execution.usage
+        prompt_tokens = worker_usage.get("prompt_tokens", 0)
+        completion_tokens = worker_usage.get("completion_tokens", 0)
+        usage["requests"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["generation_seconds"] += worker_usage.get("generation_seconds") or (worker_execution.duration_ns or 0) / 1e9
+        usage["cost"] += compute_cost(worker_usage.get("model"), prompt_tokens, completion_tokens, prices)
+
+    def _finish_usage(self, usage: dict) -> dict:
+        seconds = usage["generation_seconds"]
+        usage["tokens_per_sec"] = round(usage["completion_tokens"] / seconds, 2) if seconds > 0 else None
+        usage["generation_seconds"] = round(seconds, 3)
+        usage["cost"] = round(usage["cost"], 6)
+        return usage
+
+    def _to_epoch_ns(self, perf_counter_ns: int) -> int:
+        return perf_counter_ns + self.epoch_offset_ns
+
+    def _create_span(self, name: str, kind: str, parent_span_id: Optional[str], start_ns: int, attributes: dict = None) -> Span:
+        if self.trace_id is None:
+            # nodes traced outside of a workflow run
+            self.trace_id = os.urandom(16).hex()
+        return Span(self.trace_id, os.urandom(8).hex(), parent_span_id, name, kind, self._to_epoch_ns(start_ns), attributes=attributes or {})
+
+    # A failing sink must not fail the workflow
+    def _emit_start(self, span: Span) -> None:
+        for sink in self.sinks:
+            try:
+                sink.on_span_start(span)
+            except Exception as e:
+                self.logger.warning(f"Trace sink {type(sink).__name__} failed: {e}")
+
+    def _emit_end(self, span: Span) -> None:
+        for sink in self.sinks:
+            try:
+                sink.on_span_end(span)
+            except Exception as e:
+                self.logger.warning(f"Trace sink {type(sink).__name__} failed: {e}")
+
+    # The full level keeps a reference to the payload (no copy), the sampled level a digest
+    def _capture(self, payload: Any) -> Any:
+        if payload is None or self.level == TRACE_FULL:
+            return payload
+        return PayloadDigest.from_payload(payload, self.preview_size)
     
     # Generate a report of the workflow execution in HTML format with details of each node and workers
-    def generate_report_as_html(self) -> str:
+    # Use TraceReportWriter.write() for large runs, it streams the report to a file
+    def generate_report_as_html(self, connections: Dict[str, List[str]] = None) -> str:
         """Generate a report of the workflow execution"""
+        from workflows.trace_report import TraceReportWriter
+        return TraceReportWriter(self, connections).to_html()
 
-        truncate_size = 2000 # truncate output data if it exceeds this size
-        css = """
-            <style>
-                .hidden { display: none; }
-                .show-more { color: blue; cursor: pointer; text-decoration: underline; }
-            </style>
-            """
-        
-        javascript = """
-            <script>
-                function toggleOutput(id) {
-                    console.log(id);
-                    const shortText = document.getElementById('short-' + id);
-                    console.log(shortText);
-                    const fullText = document.getElementById('full-' + id);
-                    console.log(fullText);
-                    const link = document.getElementById('link-' + id);
-                    console.log(link);
-                    
-                    if (fullText.classList.contains('hidden')) {
-                        shortText.classList.add('hidden');
-                        fullText.classList.remove('hidden');
-                        link.textContent = 'Show Less';
-                    } else {
-                        shortText.classList.remove('hidden');
-                        fullText.classList.add('hidden');
-                        link.textContent = 'Show More';
-                    }
-                }
-            </script>
-            """
-
-        report = f"<html><head><title>Workflow Execution Report</title>{css}{javascript}</head><body>"
-        node_index = 0
-        for node_id, trace in self.traces.items():
-            report += f"<h2>Node: {node_id}</h2>"
-            report += f"<p>Start Time: {trace.start_time}</p>"
-            if trace.end_time:
-                report += f"<p>End Time: {trace.end_time}</p>"
-                report += f"<p>Execution Time: {self.get_execution_time(node_id)} seconds</p>"
-            if trace.input_data:
-                report += "<h3>Input Data:</h3>"
-                for i, input_data in enumerate(trace.input_data):
-                    report += f"<p>Input {i + 1}:</p>"
-                    element_suffix = f"input-{node_index}-{i}"
-                    input_html = self._create_expandable_text(element_suffix, input_data, truncate_size)
-                    report += input_html
-            if trace.output_data:
-                report += f"<h3>Output Data: (cache hit={trace.cache_hit}) </h3>"
-                output = trace.output_data
-                element_suffix = f"output-{node_index}"
-                output_html = self._create_expandable_text(element_suffix, output, truncate_size)
-                report += output_html
-            if trace.worker_executions:
-                report += "<h3>Worker Executions:</h3>"
-                for i, worker_execution in enumerate(trace.worker_executions):
-                    report += f"<p>Worker {i + 1}: {worker_execution.worker_name}</p>"
-                    report += f"<p>Input:</p>"
-                    input_element_suffix = f"worker-input-{node_index}-{i}"
-                    report += self._create_expandable_text(input_element_suffix, worker_execution.worker_input, truncate_size)
-                    
-                    report += f"<p>Output:</p>"
-                    output_element_suffix = f"worker-output-{node_index}-{i}"
-                    report += self._create_expandable_text(output_element_suffix, worker_execution.worker_output, truncate_size)
-
-                    if worker_execution.worker_prompt:
-                        report += f"<p>Prompt:</p>"
-                        prompt_element_suffix = f"worker-prompt-{node_index}-{i}"
-                        report += self._create_expandable_text(prompt_element_suffix, worker_execution.worker_prompt, truncate_size)
-
-                    if worker_execution.worker_system_prompt:
-                        report += f"<p>System Prompt:</p>"
-                        system_prompt_element_suffix = f"worker-system-prompt-{node_index}-{i}"
-                        report += self._create_expandable_text(system_prompt_element_suffix, worker_execution.worker_system_prompt, truncate_size)
-
-                    report += f"<p>Execution Time: {worker_execution.execution_time}</p>"
-            if trace.error:
-                report += f"<h3>Error:</h3><p>{trace.error}</p>"
-            node_index += 1
-        report += "</body></html>"
-        return report
-    
-    # Creates HTML to show the text fully if it is smaller than truncate_size, 
-    # or truncated and with a "Show More" link if it is larger
-    def _create_expandable_text(self, element_suffix: str, text: str, truncate_size: int = 1000) -> str:
-        """Create expandable text for HTML display"""
-        if len(text) > truncate_size:
-            return f"""
-                <div id="short-{element_suffix}">{text[:truncate_size]}...</div>
-                <div id="full-{element_suffix}" class="hidden">{text}</div>
-                <span class="show-more" id="link-{element_suffix}" 
-                    onclick="toggleOutput('{element_suffix}')">Show More (total {len(text)} chars)</span>
-            """
-        else:
-            return f"<p>{text}</p>"
\ No newline at end of file
+# Resident memory of the process from /proc (Linux), None on the other platforms
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024